@@ -0,0 +1,81 @@
+"""
+Parity check between the numba kernels and the pandas metric implementations.
+
+Usage (from offline/):
+    python -m benchmarks.kernel_parity --funds 500
+Exits non-zero if any metric differs (volatility allows 1e-10 relative, the
+gap between Welford and two-pass variance; drawdown must match exactly).
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from metrics import kernels
+from metrics.risk import calculate_max_drawdown, calculate_return_volatility
+
+def synthetic_series(rng, trading_days: pd.DatetimeIndex) -> pd.Series:
+    """
+    Random-walk NAVs with a random start, missing days and the odd zero print
+    """
+    start = int(rng.integers(0, len(trading_days) - 2))
+    dates = trading_days[start:]
+    dates = dates[rng.random(len(dates)) > 0.03]
+    navs = 10 * np.cumprod(1 + rng.normal(0.0003, 0.012, len(dates)))
+    if len(navs) > 20 and rng.random() < 0.05:
+        navs[int(rng.integers(1, len(navs)))] = 0.0
+    return pd.Series(navs, index=dates)
+
+def same(a, b, rel_tol: float = 0.0) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    if np.isnan(a) or np.isnan(b):
+        return bool(np.isnan(a) and np.isnan(b))
+    return a == b or abs(a - b) <= rel_tol * abs(a)
+
+def run_backend(backend: str, series_list: list) -> tuple[list, float]:
+    kernels.set_backend(backend)
+    start = time.perf_counter()
+    results = [
+        (
+            calculate_return_volatility(nav),
+            calculate_max_drawdown(nav),
+        )
+        for nav in series_list
+    ]
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not kernels.NUMBA_AVAILABLE:
+        print("numba is not installed; only the pandas backend is available.")
+        return 0
+
+    rng = np.random.default_rng(args.seed)
+    trading_days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=6 * 252)
+    series_list = [synthetic_series(rng, trading_days) for _ in range(args.funds)]
+
+    run_backend("numba", series_list[:1]) # JIT warm-up
+    numba_results, numba_secs = run_backend("numba", series_list)
+    pandas_results, pandas_secs = run_backend("pandas", series_list)
+
+    names = ["volatility", "max_drawdown"]
+    tolerances = [1e-10, 0.0]
+    mismatches = 0
+    for i, (nb, pd_) in enumerate(zip(numba_results, pandas_results)):
+        for name, tol, a, b in zip(names, tolerances, pd_, nb):
+            if not same(a, b, tol):
+                mismatches += 1
+                print(f"MISMATCH fund={i} metric={name} pandas={a} numba={b}")
+
+    print(f"funds={args.funds} pandas={pandas_secs:.3f}s numba={numba_secs:.3f}s mismatches={mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Benchmarks the metrics stages (load, relative, compute, normalize, write) and each per-fund
+metric function on a synthetic NAV universe, for every engine/backend.
+
+Usage (from offline/):
+    python -m benchmarks.metrics_benchmark --funds 16000 --engines batch,pandas:numba,pandas:pandas
+    python -m benchmarks.metrics_benchmark --output bench.json
+    python -m benchmarks.metrics_benchmark --baseline bench.json --tolerance 0.2
+
+Prints JSON with seconds, funds/sec and peak RSS per stage. Without --mongo-uri the
+write stage stops at building the docs; with it, they are bulk inserted into a
+scratch database. With --baseline, exits non-zero if any stage got slower
+than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.synthetic_universe import generate_universe, iter_nav_docs
+from metrics import kernels
+from metrics.batch_engine import compute_batch_metrics
+from metrics.cost import compute_cost_metrics
+from metrics.performance import calculate_cagr
+from metrics.relative import compute_relative_metrics
+from metrics.risk import calculate_max_drawdown, calculate_return_volatility, calculate_risk_adjusted_metrics
+from metrics.stability import compute_stability_metrics
+from pipelines.metrics_pipeline import (
+    NORMALIZED_METRICS,
+    _adaptive_chunksize,
+    _init_nav_store_worker,
+    unwrapper_compute_from_store,
+)
+from storage.nav_columnar_store import NavColumnarStore
+from validation.normalization import normalize_by_category, compute_category_stats
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+METRIC_FUNCTIONS = {
+    "cagr_3y": lambda nav: calculate_cagr(nav, 3),
+    "cagr_5y": lambda nav: calculate_cagr(nav, 5),
+    "volatility": calculate_return_volatility,
+    "max_drawdown": calculate_max_drawdown,
+    "risk_adjusted": calculate_risk_adjusted_metrics,
+    "rolling_stats": lambda nav: compute_stability_metrics(nav.to_frame("nav")),
+}
+
+def peak_rss_mb() -> dict:
+    if resource is None:
+        return {"self": None, "children": None}
+    # ru_maxrss is in KB on Linux
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+def timed(func, *args, count: int = None, **kwargs):
+    """
+    Runs func and returns (result, stage report)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    report = {"seconds": round(seconds, 4), "peak_rss_mb": peak_rss_mb()}
+    if count is not None:
+        report["funds_per_sec"] = round(count / seconds, 1) if seconds > 0 else None
+    return result, report
+
+def compute_batch(store, fund_ids, category_map, ter_map) -> list:
+    batch_metrics = compute_batch_metrics(store, fund_ids)
+    return [
+        {
+            "fund_id": f_id,
+            "scheme_category": category_map[f_id],
+            **batch_metrics[f_id],
+            **compute_cost_metrics(ter_map.get(f_id))
+        }
+        for f_id in fund_ids if f_id in batch_metrics
+    ]
+
+def compute_pandas(store_dir, backend, workers, fund_ids, category_map, ter_map) -> list:
+    tasks = [(f_id, category_map[f_id], ter_map.get(f_id)) for f_id in fund_ids]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_nav_store_worker,
+        initargs=(store_dir, backend)
+    ) as executor:
+        results = executor.map(unwrapper_compute_from_store, tasks, chunksize=_adaptive_chunksize(len(tasks), workers))
+        return [r for r in results if r is not None]
+
+def normalize(records: list, relative: dict) -> pd.DataFrame:
+    metrics_df = pd.DataFrame([{**record, **relative.get(record["fund_id"], {})} for record in records])
+    available = [m for m in NORMALIZED_METRICS if m in metrics_df.columns]
+    return normalize_by_category(metrics_df, available, stats=compute_category_stats(metrics_df, available))
+
+def write(normalized_df: pd.DataFrame, collection=None, batch_size: int = 5000) -> int:
+    """
+    Mirrors MetricsRepo.publish_metrics: stamped docs, unordered insert_many into a fresh collection
+    """
+    now = datetime.now()
+    docs = [{**doc, "last_updated": now} for doc in normalized_df.to_dict(orient="records")]
+    if collection is not None:
+        collection.drop()
+        for start in range(0, len(docs), batch_size):
+            collection.insert_many(docs[start:start + batch_size], ordered=False)
+        collection.create_index("fund_id", unique=True)
+    return len(docs)
+
+def bench_metric_functions(store, fund_ids, backends) -> dict:
+    series = [
+        pd.Series(navs, index=pd.DatetimeIndex(dates.view("datetime64[ns]")))
+        for dates, navs in (store.slice(f_id) for f_id in fund_ids)
+    ]
+
+    report = {}
+    for backend in backends:
+        kernels.set_backend(backend)
+        for func in METRIC_FUNCTIONS.values():
+            func(series[0]) # JIT warm-up / first-call imports
+        report[backend] = {
+            name: timed(lambda: [func(nav) for nav in series], count=len(series))[1]
+            for name, func in METRIC_FUNCTIONS.items()
+        }
+    return report
+
+def find_regressions(report: dict, baseline: dict, tolerance: float, min_seconds: float = 0.05) -> list:
+    """
+    Stages slower than baseline * (1 + tolerance); very short stages are ignored as noise
+    """
+    previous = {(r["engine"], r["backend"]): r["stages"] for r in baseline.get("engines", [])}
+    regressions = []
+    for run in report["engines"]:
+        old_stages = previous.get((run["engine"], run["backend"]), {})
+        for stage, result in run["stages"].items():
+            old = old_stages.get(stage)
+            if old and old["seconds"] >= min_seconds and result["seconds"] > old["seconds"] * (1 + tolerance):
+                regressions.append({
+                    "engine": run["engine"], "backend": run["backend"], "stage": stage,
+                    "baseline_seconds": old["seconds"], "seconds": result["seconds"]
+                })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=16000)
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--engines", default="batch,pandas:numba,pandas:pandas")
+    parser.add_argument("--workers", type=int, default=min(os.cpu_count(), 8))
+    parser.add_argument("--sample", type=int, default=500, help="funds used to time each metric function")
+    parser.add_argument("--skip-doc-load", action="store_true", help="skip decoding Mongo-shaped docs (slow at 16k funds)")
+    parser.add_argument("--mongo-uri", default=None, help="write stage target, e.g. mongodb://localhost:27017")
+    parser.add_argument("--mongo-db", default="mf_benchmark")
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    (store, category_map, ter_map), generate_report = timed(
+        generate_universe, args.funds, args.years, seed=args.seed, count=args.funds
+    )
+    fund_ids = [int(f_id) for f_id in store.fund_ids]
+
+    collection = None
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        collection = MongoClient(args.mongo_uri)[args.mongo_db].fund_metrics_benchmark
+
+    store_dir = tempfile.mkdtemp(prefix="nav_store_bench_")
+    try:
+        load = {"generate": generate_report}
+        if not args.skip_doc_load:
+            _, load["load_docs"] = timed(NavColumnarStore.from_cursor, iter_nav_docs(store), count=len(fund_ids))
+        _, load["save_store"] = timed(store.save, store_dir, count=len(fund_ids))
+        mapped, load["load_store"] = timed(NavColumnarStore.load, store_dir, count=len(fund_ids))
+        # Engine-independent, like in MetricsPipeline: one pass shared by every run below
+        relative, relative_report = timed(compute_relative_metrics, mapped, category_map, fund_ids, count=len(fund_ids))
+
+        runs = []
+        for spec in args.engines.split(","):
+            engine, _, backend = spec.partition(":")
+            backend = backend or "auto"
+            kernels.set_backend(backend)
+
+            if engine == "batch":
+                records, compute_report = timed(compute_batch, mapped, fund_ids, category_map, ter_map, count=len(fund_ids))
+            else:
+                records, compute_report = timed(
+                    compute_pandas, store_dir, backend, args.workers, fund_ids, category_map, ter_map, count=len(fund_ids)
+                )
+
+            normalized_df, normalize_report = timed(normalize, records, relative, count=len(records))
+            _, write_report = timed(write, normalized_df, collection, count=len(records))
+
+            runs.append({
+                "engine": engine,
+                "backend": backend,
+                "computed": len(records),
+                "stages": {"compute": compute_report, "normalize": normalize_report, "write": write_report},
+            })
+
+        backends = ["numba", "pandas"] if kernels.NUMBA_AVAILABLE else ["pandas"]
+        report = {
+            "universe": {"funds": len(fund_ids), "rows": int(len(store.navs)), "years": args.years, "seed": args.seed},
+            "workers": args.workers,
+            "load": load,
+            "relative": relative_report,
+            "engines": runs,
+            "metric_functions": bench_metric_functions(store, fund_ids[:args.sample], backends),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = find_regressions(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmarks ConcurrentNavFetcher against a local stub of the mfapi.in endpoint.
+
+Usage (from offline/):
+    python -m benchmarks.nav_fetch_benchmark --funds 500 --latency-ms 80 --workers 1,8,32 --rate 200
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ingestion.nav_fetcher import ConcurrentNavFetcher
+
+def build_payload(fund_id: int, days: int) -> bytes:
+    rng = random.Random(fund_id)
+    nav = 10.0
+    today = date.today()
+    data = []
+    for i in range(days):
+        nav *= 1 + rng.gauss(0.0004, 0.01)
+        data.append({"date": (today - timedelta(days=i)).strftime("%d-%m-%Y"), "nav": f"{nav:.4f}"})
+    return json.dumps({"meta": {"scheme_code": fund_id}, "data": data, "status": "SUCCESS"}).encode()
+
+def start_stub_server(latency_ms: float, error_rate: float, days: int):
+    cache = {}
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency_ms / 1000.0)
+            if random.random() < error_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+
+            fund_id = int(self.path.rstrip("/").split("/")[-1])
+            if fund_id not in cache:
+                cache[fund_id] = build_payload(fund_id, days)
+            body = cache[fund_id]
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=300)
+    parser.add_argument("--days", type=int, default=1500)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--workers", default="1,8,32")
+    parser.add_argument("--rate", type=float, default=200)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.latency_ms, args.error_rate, args.days)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/mf/"
+    fund_ids = list(range(100000, 100000 + args.funds))
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        fetcher = ConcurrentNavFetcher(max_workers=workers, rate_per_sec=args.rate, base_url=base_url)
+
+        start = time.perf_counter()
+        fetched = sum(1 for _, records in fetcher.fetch_history_many(fund_ids) if records)
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            "workers": workers,
+            "funds": args.funds,
+            "fetched": fetched,
+            "seconds": round(elapsed, 3),
+            "funds_per_sec": round(args.funds / elapsed, 1),
+        })
+
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Scenario checks for the NAV anomaly scan (validation/nav_validation.py).
+
+Usage (from offline/):
+    python -m benchmarks.nav_validation_check
+Builds one random-walk fund per scenario, injects the anomaly and compares the
+quarantine counts with the expected ones. Exits non-zero on any difference.
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from storage.nav_columnar_store import NavColumnarStore
+from validation.nav_validation import validate_nav
+
+N_ROWS = 1000
+
+def bad_latest(navs):
+    navs[-1] /= 2
+
+def bad_last_two(navs):
+    navs[-2:] /= 2
+
+def one_day_spike(navs):
+    navs[500] *= 3
+
+def three_day_bad_print(navs):
+    navs[500:503] /= 2
+
+def confirmed_split(navs):
+    navs[:600] *= 10
+
+# name: (inject, expected {reason: rows}, rows kept)
+SCENARIOS = {
+    "bad_latest": (bad_latest, {"spike": 1, "split": 0}, N_ROWS - 1),
+    "bad_last_two": (bad_last_two, {"spike": 2, "split": 0}, N_ROWS - 2),
+    "one_day_spike": (one_day_spike, {"spike": 1, "split": 0}, N_ROWS - 1),
+    "three_day_bad_print": (three_day_bad_print, {"spike": 3, "split": 0}, N_ROWS - 3),
+    "confirmed_split": (confirmed_split, {"spike": 0, "split": 600}, N_ROWS - 600),
+}
+
+def build_store(rng, scenarios: dict = SCENARIOS) -> NavColumnarStore:
+    dates = pd.bdate_range("2020-01-01", periods=N_ROWS).values.view("i8")
+    fund_ids, nav_dates, navs = [], [], []
+    for fund_id, (inject, _, _) in enumerate(scenarios.values()):
+        fund_navs = 10 * np.cumprod(1 + rng.normal(0.0003, 0.01, N_ROWS))
+        inject(fund_navs)
+        fund_ids.append(np.full(N_ROWS, fund_id))
+        nav_dates.append(dates)
+        navs.append(fund_navs)
+    return NavColumnarStore.from_rows(np.concatenate(fund_ids), np.concatenate(nav_dates), np.concatenate(navs))
+
+def main():
+    store = build_store(np.random.default_rng(7))
+    keep, reports = validate_nav(store)
+    kept = np.add.reduceat(keep, store.index["offset"])
+
+    failures = 0
+    for fund_id, (name, (_, expected, expected_kept)) in enumerate(SCENARIOS.items()):
+        flags = reports.get(fund_id, {}).get("flags", {})
+        got = {reason: flags.get(reason, 0) for reason in expected}
+        ok = got == expected and kept[fund_id] == expected_kept
+        failures += not ok
+        print(f"{name:<20} {'ok' if ok else 'FAIL'} flags={got} kept={kept[fund_id]}")
+
+    # A store where nothing is flagged (e.g. a few clean categories)
+    keep, reports = validate_nav(build_store(np.random.default_rng(7), {"clean": (lambda navs: None, {}, N_ROWS)}))
+    ok = bool(keep.all()) and not reports
+    failures += not ok
+    print(f"{'clean_store':<20} {'ok' if ok else 'FAIL'}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Checks that a sharded metrics run gives exactly the same output as a single-node run.
+
+Usage (from offline/):
+    python -m benchmarks.shard_parity --funds 3000 --shards 4
+        Synthetic universe; each shard's partial statistics are computed in its own
+        local process, merged, and the resulting z-scores compared bit for bit.
+    python -m benchmarks.shard_parity --mongo --shards 4
+        Against the configured database: runs main.py --metrics once, then N
+        `--metrics --shard i/N` processes plus `--merge-shards N`, and compares the
+        published fund_metrics docs. Publishes twice, so use a dev database.
+Exits non-zero on any difference.
+"""
+import argparse
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_universe import generate_universe
+from metrics.batch_engine import compute_batch_metrics
+from metrics.cost import compute_cost_metrics
+from metrics.relative import compute_relative_metrics
+from pipelines.metrics_pipeline import NORMALIZED_METRICS, shard_of, _raw_metrics_frame
+from validation.normalization import (
+    normalize_by_category,
+    compute_category_stats,
+    category_moments,
+    moments_to_docs,
+    merge_moment_docs,
+    moments_to_stats,
+)
+
+# Fields that legitimately differ between two publishes
+VOLATILE_FIELDS = ("_id", "last_updated", "metrics_version")
+
+def shard_moment_docs(args):
+    shard_df, metrics = args
+    return moments_to_docs(category_moments(shard_df, metrics))
+
+def apply_merged_zscores(metrics_df: pd.DataFrame, stats: pd.DataFrame, metrics: list) -> pd.DataFrame:
+    """
+    The arithmetic MetricsRepo.apply_zscores_to_staging runs server-side: (x - mean) / std
+    for real values in categories with std > 0, else 0
+    """
+    result = pd.DataFrame(index=metrics_df.index)
+    for metric in metrics:
+        mean = metrics_df["scheme_category"].map(stats[("mean", metric)]).to_numpy(dtype=np.float64)
+        std = metrics_df["scheme_category"].map(stats[("std", metric)]).to_numpy(dtype=np.float64)
+        values = metrics_df[metric].to_numpy(dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z_scores = (values - mean) / std
+        result[f"norm_{metric}"] = np.where((std > 0) & ~np.isnan(values), z_scores, 0.0)
+    return result
+
+def check_constant_category(n_shards: int) -> int:
+    """
+    A category where every fund has the same value (e.g. a shared TER) must get
+    std 0 on both paths
+    """
+    metrics_df = pd.DataFrame({
+        "fund_id": range(12),
+        "scheme_category": ["Constant"] * 12,
+        "expense_ratio": [1.05] * 12,
+    })
+    single_std = compute_category_stats(metrics_df, ["expense_ratio"])[("std", "expense_ratio")]
+    shard_ids = metrics_df["fund_id"].map(lambda f_id: shard_of(f_id, n_shards))
+    docs = [doc for i in range(n_shards) for doc in shard_moment_docs((metrics_df[shard_ids == i], ["expense_ratio"]))]
+    merged_std = moments_to_stats(merge_moment_docs(docs), ["expense_ratio"])[("std", "expense_ratio")]
+
+    mismatches = int((single_std != 0).sum() + (merged_std != 0).sum())
+    print(f"constant category std single={single_std.iloc[0]} merged={merged_std.iloc[0]}")
+    return mismatches
+
+def run_synthetic(n_funds: int, n_shards: int) -> int:
+    store, category_map, ter_map = generate_universe(n_funds)
+    fund_ids = [int(f_id) for f_id in store.fund_ids]
+    batch_metrics = compute_batch_metrics(store, fund_ids)
+    relative = compute_relative_metrics(store, category_map, fund_ids)
+    records = [
+        {
+            "fund_id": f_id, "scheme_category": category_map[f_id],
+            **batch_metrics[f_id], **relative[f_id], **compute_cost_metrics(ter_map[f_id])
+        }
+        for f_id in fund_ids
+    ]
+    metrics_df = _raw_metrics_frame(records)
+    metrics = [m for m in NORMALIZED_METRICS if m in metrics_df.columns]
+
+    single_stats = compute_category_stats(metrics_df, metrics)
+    single = normalize_by_category(metrics_df, metrics, stats=single_stats)
+
+    shard_ids = metrics_df["fund_id"].map(lambda f_id: shard_of(f_id, n_shards))
+    with ProcessPoolExecutor(max_workers=n_shards) as executor:
+        partials = executor.map(shard_moment_docs, [(metrics_df[shard_ids == i], metrics) for i in range(n_shards)])
+        merged_stats = moments_to_stats(merge_moment_docs(doc for docs in partials for doc in docs), metrics)
+    merged = apply_merged_zscores(metrics_df, merged_stats, metrics)
+
+    mismatches = 0
+    for stat in ("count", "mean", "std"):
+        a = single_stats[stat][metrics].to_numpy()
+        b = merged_stats[stat][metrics].reindex(single_stats.index).to_numpy()
+        mismatches += int(((a != b) & ~(np.isnan(a) & np.isnan(b))).sum())
+    for column in merged.columns:
+        mismatches += int((single[column].to_numpy() != merged[column].to_numpy()).sum())
+
+    print(f"funds={len(records)} shards={n_shards} categories={len(single_stats)} mismatches={mismatches}")
+    return mismatches + check_constant_category(n_shards)
+
+def published_docs(db) -> dict:
+    return {
+        doc["fund_id"]: {k: v for k, v in doc.items() if k not in VOLATILE_FIELDS}
+        for doc in db.fund_metrics.find()
+    }
+
+def same_doc(a: dict, b: dict) -> bool:
+    if a.keys() != b.keys():
+        return False
+    # NaN != NaN, so compare those by position
+    return all(
+        a[k] == b[k] or (isinstance(a[k], float) and isinstance(b[k], float) and np.isnan(a[k]) and np.isnan(b[k]))
+        for k in a
+    )
+
+def run_mongo(n_shards: int) -> int:
+    from storage.mongo_client import MongoDBClient
+    db = MongoDBClient().get_db()
+    run_id = "shard-parity"
+
+    subprocess.run([sys.executable, "main.py", "--metrics"], check=True)
+    single = published_docs(db)
+
+    shard_processes = [
+        subprocess.Popen([sys.executable, "main.py", "--metrics", "--shard", f"{i}/{n_shards}", "--shard-run", run_id])
+        for i in range(n_shards)
+    ]
+    if any(process.wait() != 0 for process in shard_processes):
+        print("A shard process failed")
+        return 1
+    subprocess.run([sys.executable, "main.py", "--merge-shards", str(n_shards), "--shard-run", run_id], check=True)
+    sharded = published_docs(db)
+
+    mismatches = len(single.keys() ^ sharded.keys())
+    mismatches += sum(1 for f_id in single.keys() & sharded.keys() if not same_doc(single[f_id], sharded[f_id]))
+    print(f"funds={len(single)} shards={n_shards} mismatches={mismatches}")
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=3000)
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--mongo", action="store_true")
+    args = parser.parse_args()
+
+    mismatches = run_mongo(args.shards) if args.mongo else run_synthetic(args.funds, args.shards)
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Synthetic NAV universe for the offline benchmarks.
+
+Funds get trading-day (Mon-Fri) random-walk NAVs with mixed history lengths
+(some launched within the window), random missing days, the odd multi-week gap
+and a rare zero print, spread over a set of categories with TER docs.
+
+Usage (from offline/), to inspect a universe:
+    python -m benchmarks.synthetic_universe --funds 16000 --years 6
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from storage.nav_columnar_store import NavColumnarStore
+
+def generate_universe(n_funds: int = 16000, years: int = 6, n_categories: int = 40, seed: int = 7):
+    """
+    Returns (NavColumnarStore, category_map {fund_id: category}, ter_map {fund_id: ter_doc}).
+    """
+    rng = np.random.default_rng(seed)
+    trading_days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=years * 261).asi8
+    n_days = len(trading_days)
+
+    fund_ids = np.arange(100000, 100000 + n_funds)
+    categories = [f"Synthetic Category {i:02d}" for i in range(n_categories)]
+
+    row_ids, row_dates, row_navs = [], [], []
+    for f_id in fund_ids:
+        # ~70% of funds cover the whole window, the rest launched inside it
+        start = 0 if rng.random() < 0.7 else int(rng.integers(0, n_days - 30))
+        keep = rng.random(n_days - start) > 0.02
+
+        if rng.random() < 0.1:
+            gap_start = int(rng.integers(0, len(keep)))
+            keep[gap_start:gap_start + int(rng.integers(5, 40))] = False
+
+        dates = trading_days[start:][keep]
+        navs = 10 * np.cumprod(1 + rng.normal(0.0004, rng.uniform(0.003, 0.02), len(dates)))
+        if len(navs) > 50 and rng.random() < 0.01:
+            navs[int(rng.integers(1, len(navs)))] = 0.0
+
+        row_ids.append(np.full(len(dates), f_id))
+        row_dates.append(dates)
+        row_navs.append(navs)
+
+    store = NavColumnarStore.from_rows(np.concatenate(row_ids), np.concatenate(row_dates), np.concatenate(row_navs))
+    category_map = {int(f_id): categories[int(rng.integers(0, n_categories))] for f_id in fund_ids}
+    ter_map = {
+        int(f_id): {"fund_id": int(f_id), "ter": round(float(rng.uniform(0.1, 2.5)), 2), "as_of_month": "2026-01"}
+        for f_id in fund_ids
+    }
+    return store, category_map, ter_map
+
+def iter_nav_docs(store: NavColumnarStore):
+    """
+    The store as a stream of Mongo-shaped {fund_id, nav_date, nav} docs
+    """
+    for f_id in store.fund_ids:
+        nav_dates, navs = store.slice(int(f_id))
+        for nav_date, nav in zip(pd.DatetimeIndex(nav_dates.view("datetime64[ns]")).to_pydatetime(), navs.tolist()):
+            yield {"fund_id": int(f_id), "nav_date": nav_date, "nav": nav}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--funds", type=int, default=16000)
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    store, category_map, _ = generate_universe(args.funds, args.years, seed=args.seed)
+    lengths = store.index["length"]
+    print(json.dumps({
+        "funds": len(store),
+        "rows": int(lengths.sum()),
+        "min_length": int(lengths.min()),
+        "median_length": int(np.median(lengths)),
+        "categories": len(set(category_map.values())),
+        "bytes": int(store.nav_dates.nbytes + store.navs.nbytes),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -4,4 +4,62 @@ DB_NAME = "mf_engine"
 
 NAV_COLLECTION = "nav_timeseries"
 
-NAV_FETCH_TIMEOUT_SEC = 10
\ No newline at end of file
+NAV_FETCH_TIMEOUT_SEC = 10
+
+# NAV fetch tuning (mfapi.in serves the same JSON that mftool wraps)
+NAV_API_BASE_URL = "https://api.mfapi.in/mf/"
+NAV_FETCH_WORKERS = 8
+NAV_FETCH_RATE_PER_SEC = 10
+NAV_FETCH_BURST = 20
+NAV_FETCH_MAX_RETRIES = 3
+
+# AMFI all-schemes latest NAV file (one line per scheme)
+NAV_ALL_URL = "https://www.amfiindia.com/spages/NAVAll.txt"
+
+# History sync checkpoints are written after this many funds
+NAV_SYNC_CHECKPOINT_EVERY = 200
+
+# Rows per $in lookup / insert_many in the batched NAV write path
+NAV_WRITE_BATCH_SIZE = 5000
+
+# Memory-mapped columnar NAV cache used by the metrics workers (--nav-store)
+NAV_STORE_DIR = "data/nav_store"
+
+# Metrics engine: "pandas" (per-fund, process pool) or "batch" (vectorized, --engine batch)
+METRICS_ENGINE = "pandas"
+
+# Per-fund metric kernels: "auto" (numba if installed), "numba" or "pandas" (--backend)
+METRICS_BACKEND = "auto"
+
+# Streaming metrics (--stream): cursor batch size and max NAV rows held in flight (~16 bytes each)
+METRICS_STREAM_BATCH_ROWS = 20000
+METRICS_STREAM_MAX_ROWS = 2_000_000
+
+
+# Extra normalized columns next to the z-scores: pct_<metric> ranks and robust_<metric> winsorized z-scores
+NORMALIZE_PERCENTILES = False
+NORMALIZE_ROBUST = False
+
+# Annual risk-free rate (decimal) for Sharpe / Sortino; roughly the 91-day T-bill yield
+RISK_FREE_RATE = 0.065
+
+# NAV anomaly checks before metrics: robust return z-score (spikes revert, splits persist for NAV_SPLIT_CONFIRM_ROWS more prints), calendar gaps, stale repeats
+NAV_SPIKE_Z = 10.0
+NAV_SPIKE_MIN_MOVE = 0.05
+NAV_SPLIT_MIN_MOVE = 0.4
+NAV_SPLIT_CONFIRM_ROWS = 3
+NAV_GAP_DAYS = 30
+NAV_STALE_MIN_RUN = 7
+
+# Fuzzy fund-name matching (TER name fallback): minimum combined token / trigram score, candidates scored per query
+FUZZY_MATCH_MIN_SCORE = 0.9
+FUZZY_MATCH_MAX_CANDIDATES = 20
+
+# TER ingestion: unordered bulk write batch size; sheets parsed in parallel by a batch load (--ter-dir)
+TER_WRITE_BATCH_SIZE = 5000
+TER_LOAD_WORKERS = 4
+
+# Fund cleanup: NAV rows needed for recommendations / to stay active, days without a NAV before a fund is stale
+CLEANUP_MIN_DAYS_FOR_RECO = 750
+CLEANUP_MIN_DAYS_FOR_ACTIVE = 60
+CLEANUP_STALE_LIMIT_DAYS = 30
\ No newline at end of file
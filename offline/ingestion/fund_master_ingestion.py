@@ -1,9 +1,13 @@
 import logging
+import numpy as np
 import pandas as pd
-from utils.string_utils import normalize_name, extract_base_name
+from utils.string_utils import normalize_names, extract_base_names
 
 logger = logging.getLogger(__name__)
 
+# The CSV packs a scheme's ISINs (payout / growth, reinvestment) into one cell without separators
+ISIN_PATTERN = r"IN[A-Z0-9]{10}"
+
 class FundMasterIngestor:
     def __init__(self, csv_path: str):
         self.csv_path = csv_path
@@ -21,40 +25,46 @@ class FundMasterIngestor:
 
         return df
     
-    @staticmethod
-    def derive_plan_type(name: str) -> str:
-        return "Direct" if "direct" in name.lower() else "Regular"
+    def transform(self, df: pd.DataFrame) -> list[dict]:
+        """
+        Derives every fund master record at once with pandas string ops.
+        Each record carries a content_hash of its derived fields (the state
+        fields excluded), so unchanged funds can be skipped on write.
+        """
+        # 'scheme_name' is generic, 'scheme_nav_name' is detailed
+        display_names = df["scheme_name"].astype(str)
+        if "scheme_nav_name" in df.columns:
+            full_detail_names = df["scheme_nav_name"].fillna(display_names).astype(str)
+        else:
+            full_detail_names = display_names
+        lower_names = full_detail_names.str.lower()
 
-    @staticmethod
-    def derive_option_type(name: str) -> str:
-        name_lower = name.lower()
-        if "idcw" in name_lower or "dividend" in name_lower:
-            return "IDCW"
-        return "Growth"
+        frame = pd.DataFrame({
+            "fund_id": df["code"].astype("int64"),
+            "scheme_name": full_detail_names,  # detailed name as primary
+            "display_name": display_names,     # generic name for fallback
+            "normalized_name": normalize_names(full_detail_names),
+            "base_name": normalize_names(extract_base_names(full_detail_names)),
+        })
+        for column in ["amc", "scheme_type", "scheme_category"]:
+            frame[column] = df[column] if column in df.columns else None
+        frame["plan_type"] = np.where(lower_names.str.contains("direct", regex=False), "Direct", "Regular")
+        frame["option_type"] = np.where(lower_names.str.contains("idcw|dividend", regex=True), "IDCW", "Growth")
 
-    def transform(self, df: pd.DataFrame) -> list[dict]:
-        records = []
-
-        for _, row in df.iterrows():
-            # 'scheme_name' is generic, 'scheme_nav_name' is detailed
-            display_name = str(row["scheme_name"])
-            full_detail_name = str(row.get("scheme_nav_name", display_name))
-
-            record = {
-                "fund_id": int(row["code"]),
-                "scheme_name": full_detail_name, # detailed name as primary
-                "display_name": display_name,     # generic name for fallback
-                "normalized_name": normalize_name(full_detail_name),
-                "base_name": normalize_name(extract_base_name(full_detail_name)),
-                "amc": row.get("amc"),
-                "scheme_type": row.get("scheme_type"),
-                "scheme_category": row.get("scheme_category"),
-                "plan_type": self.derive_plan_type(full_detail_name),
-                "option_type": self.derive_option_type(full_detail_name),
-                "is_active": True,
-                "eligible_for_reco": True
-            }
-
-            records.append(record)
-
-        return records
\ No newline at end of file
+        isin_columns = [c for c in df.columns if c.startswith("isin")]
+        if isin_columns:
+            isins = df[isin_columns[0]].fillna("").astype(str).str.upper().str.findall(ISIN_PATTERN)
+        else:
+            isins = pd.Series([[]] * len(df), index=df.index)
+        # Hashed as one string; stored as a list
+        frame["isins"] = isins.str.join(" ")
+
+        frame = frame.astype(object).where(frame.notna(), None)
+        frame["content_hash"] = [
+            f"{h:016x}" for h in pd.util.hash_pandas_object(frame, index=False)
+        ]
+        frame["isins"] = isins.to_numpy()
+        frame["is_active"] = True
+        frame["eligible_for_reco"] = True
+
+        return frame.to_dict("records")
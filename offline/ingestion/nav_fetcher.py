@@ -0,0 +1,172 @@
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import pandas as pd
+import requests
+
+from config.settings import (
+    NAV_API_BASE_URL,
+    NAV_FETCH_BURST,
+    NAV_FETCH_MAX_RETRIES,
+    NAV_FETCH_RATE_PER_SEC,
+    NAV_FETCH_TIMEOUT_SEC,
+    NAV_FETCH_WORKERS,
+)
+from utils.rate_limiter import TokenBucket, backoff_with_jitter
+
+logger = logging.getLogger(__name__)
+
+class ConcurrentNavFetcher:
+    """
+    Fetches NAV history for many funds in parallel.
+    - Bounded parallelism through a thread pool (HTTP calls release the GIL)
+    - One shared token bucket caps the request rate across all workers
+    - Retries back off with jitter on the failing worker only
+    """
+    def __init__(
+        self,
+        max_workers: int = NAV_FETCH_WORKERS,
+        rate_per_sec: float = NAV_FETCH_RATE_PER_SEC,
+        burst: int = NAV_FETCH_BURST,
+        base_url: str = NAV_API_BASE_URL,
+        timeout: float = NAV_FETCH_TIMEOUT_SEC,
+        max_retries: int = NAV_FETCH_MAX_RETRIES,
+        rate_limiter: TokenBucket = None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.rate_limiter = rate_limiter or TokenBucket(rate_per_sec, burst)
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        # requests.Session is not guaranteed thread-safe, so each worker keeps its own
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
+    def _get_scheme_data(self, fund_id: int):
+        """
+        Returns the raw [{date, nav}, ...] list for a scheme, or None after all retries fail
+        """
+        url = f"{self.base_url}/{fund_id}"
+
+        for attempt in range(self.max_retries):
+            self.rate_limiter.acquire()
+            try:
+                response = self._session().get(url, timeout=self.timeout)
+                # Client errors (other than throttling) won't succeed on retry
+                if 400 <= response.status_code < 500 and response.status_code != 429:
+                    logger.warning("NAV API rejected request | fund_id=%s | status=%s", fund_id, response.status_code)
+                    return None
+                response.raise_for_status()
+                return response.json().get("data") or []
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    logger.warning(
+                        "API failure, giving up after %s attempts | fund_id=%s | Error: %s",
+                        self.max_retries, fund_id, e
+                    )
+                    return None
+
+                wait_time = backoff_with_jitter(attempt)
+                logger.warning(
+                    "API failure (attempt %s/%s). Retrying in %.2fs... | fund_id=%s | Error: %s",
+                    attempt + 1, self.max_retries, wait_time, fund_id, e
+                )
+                time.sleep(wait_time)
+
+        return None
+
+    @staticmethod
+    def _to_frame(data: list[dict]) -> pd.DataFrame:
+        df = pd.DataFrame(data)
+        if df.empty or "date" not in df.columns:
+            return pd.DataFrame(columns=["nav"])
+
+        df["nav"] = pd.to_numeric(df["nav"], errors="coerce")
+        df.index = pd.to_datetime(df.pop("date"), format="%d-%m-%Y")
+        return df.dropna(subset=["nav"]).sort_index()
+
+    def fetch_history(self, fund_id: int, lookback_years: int = 6, since=None) -> list[dict] | None:
+        """
+        Returns a list of {fund_id, nav_date, nav} for the last N years,
+        restricted to dates after `since` (the fund's watermark) when given;
+        None if the fetch failed
+        """
+        data = self._get_scheme_data(fund_id)
+        if data is None:
+            return None
+        if not data:
+            return []
+
+        df = self._to_frame(data)
+        cutoff_date = datetime.now() - pd.DateOffset(years=lookback_years)
+        df = df[df.index >= cutoff_date]
+        if since is not None:
+            df = df[df.index > since]
+
+        return [
+            {"fund_id": fund_id, "nav_date": nav_date, "nav": float(nav)}
+            for nav_date, nav in zip(df.index, df["nav"])
+        ]
+
+    def fetch_latest_nav(self, fund_id: int):
+        """
+        Returns (nav_date, nav_value) or None
+        """
+        data = self._get_scheme_data(fund_id)
+        if not data:
+            return None
+
+        df = self._to_frame(data)
+        if df.empty:
+            return None
+
+        return df.index[-1], float(df["nav"].iloc[-1])
+
+    def map(self, func, fund_ids):
+        """
+        Runs func(fund_id) across the pool and yields (fund_id, result) as each completes.
+        Only a small window of futures is kept in flight so 16k funds don't queue up at once.
+        """
+        fund_iter = iter(fund_ids)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {
+                executor.submit(func, fund_id): fund_id
+                for fund_id in itertools.islice(fund_iter, self.max_workers * 2)
+            }
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    fund_id = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception:
+                        logger.exception("NAV fetch failed | fund_id=%s", fund_id)
+                        result = None
+
+                    yield fund_id, result
+
+                    next_fund_id = next(fund_iter, None)
+                    if next_fund_id is not None:
+                        pending[executor.submit(func, next_fund_id)] = next_fund_id
+
+    def fetch_history_many(self, fund_ids, lookback_years: int = 6, watermarks: dict = None):
+        watermarks = watermarks or {}
+        return self.map(
+            lambda fund_id: self.fetch_history(fund_id, lookback_years, watermarks.get(fund_id)),
+            fund_ids
+        )
+
+    def fetch_latest_many(self, fund_ids):
+        return self.map(self.fetch_latest_nav, fund_ids)
@@ -3,36 +3,42 @@ from datetime import datetime
 from mftool import Mftool
 import pandas as pd
 import logging
+from config.settings import NAV_FETCH_RATE_PER_SEC, NAV_FETCH_BURST
+from utils.rate_limiter import TokenBucket, backoff_with_jitter
 
 logger = logging.getLogger(__name__)
 
 class NavIngestion:
-    def __init__(self):
+    def __init__(self, rate_limiter: TokenBucket = None):
         self.mf = Mftool()
+        self.rate_limiter = rate_limiter or TokenBucket(NAV_FETCH_RATE_PER_SEC, NAV_FETCH_BURST)
 
     def _with_retries(self, func, *args, max_retries=3, initial_wait=2, **kwargs):
-        """Helper to retry API calls with exponential backoff"""
+        """Helper to retry API calls with jittered exponential backoff"""
         for i in range(max_retries):
             try:
-                # Optimized for faster re-ingestion
-                time.sleep(0.1) 
+                # Shared rate limit instead of a fixed per-call sleep
+                self.rate_limiter.acquire()
                 return func(*args, **kwargs)
             except Exception as e:
-                wait_time = initial_wait * (2 ** i)
+                wait_time = backoff_with_jitter(i, initial_wait)
                 logger.warning(
-                    "API failure (attempt %s/%s). Retrying in %ss... | Error: %s",
+                    "API failure (attempt %s/%s). Retrying in %.2fs... | Error: %s",
                     i + 1, max_retries, wait_time, e
                 )
                 time.sleep(wait_time)
         return None
 
-    def fetch_history(self, fund_id: int, lookback_years: int = 6) -> list[dict]:
+    def fetch_history(self, fund_id: int, lookback_years: int = 6, since=None) -> list[dict] | None:
         """
-        Returns a list of {nav_date, nav_value} for the last N years
+        Returns a list of {nav_date, nav_value} for the last N years,
+        only after `since` (the fund's watermark) when given; None if the fetch failed
         """
         try:
             df = self._with_retries(self.mf.get_scheme_historical_nav, fund_id, as_Dataframe=True)
-            if df is None or df.empty:
+            if df is None:
+                return None
+            if df.empty:
                 return []
 
             if not isinstance(df.index, pd.DatetimeIndex):
@@ -41,6 +47,8 @@ class NavIngestion:
             # Calculate the cutoff date
             cutoff_date = datetime.now() - pd.DateOffset(years=lookback_years)
             df = df[df.index >= cutoff_date]
+            if since is not None:
+                df = df[df.index > since]
 
             records = []
             for date, row in df.iterrows():
@@ -53,7 +61,7 @@ class NavIngestion:
 
         except Exception as exc:
             logger.exception("Failed to fetch history | fund_id=%s", fund_id)
-            return []
+            return None
 
     def fetch_latest_nav(self, fund_id: int):
         """
@@ -0,0 +1,74 @@
+import logging
+from datetime import datetime
+import requests
+from config.settings import NAV_FETCH_TIMEOUT_SEC
+
+logger = logging.getLogger(__name__)
+
+class NavSnapshotIngestor:
+    """
+    Parses an AMFI-style "all schemes latest NAV" file (NAVAll.txt) in one streaming pass.
+
+    Data lines look like:
+        Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date
+        119551;INF209KA12Z1;INF209KA13Z9;Aditya Birla Sun Life Banking & PSU Debt Fund - DIRECT - IDCW;105.4212;15-Oct-2026
+    Category / AMC headers and blank lines are interleaved and skipped.
+    """
+    def __init__(self, source: str):
+        # Either a local path or an http(s) URL
+        self.source = source
+
+    def iter_lines(self):
+        if self.source.startswith(("http://", "https://")):
+            with requests.get(self.source, stream=True, timeout=NAV_FETCH_TIMEOUT_SEC) as response:
+                response.raise_for_status()
+                response.encoding = response.encoding or "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if line:
+                        yield line
+        else:
+            with open(self.source, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    yield line
+
+    def parse(self, fund_ids: set[int]) -> list[dict]:
+        """
+        Returns {fund_id, nav_date, nav} rows for the requested funds only.
+        Unparseable rows (header, 'N.A.' NAVs, bad dates) are skipped.
+        """
+        records = []
+        date_cache = {}
+        skipped = 0
+
+        for line in self.iter_lines():
+            parts = line.strip().split(";")
+            if len(parts) < 6 or not parts[0].isdigit():
+                continue
+
+            fund_id = int(parts[0])
+            if fund_id not in fund_ids:
+                continue
+
+            try:
+                nav = float(parts[4])
+                date_str = parts[5].strip()
+                # The whole file shares a handful of dates, so parse each once
+                nav_date = date_cache.get(date_str)
+                if nav_date is None:
+                    nav_date = datetime.strptime(date_str, "%d-%b-%Y")
+                    date_cache[date_str] = nav_date
+            except ValueError:
+                skipped += 1
+                continue
+
+            if nav <= 0:
+                skipped += 1
+                continue
+
+            records.append({"fund_id": fund_id, "nav_date": nav_date, "nav": nav})
+
+        logger.info(
+            "Parsed NAV snapshot | source=%s | rows=%s | skipped=%s",
+            self.source, len(records), skipped
+        )
+        return records
@@ -1,60 +1,169 @@
+import numpy as np
 import pandas as pd
-from utils.string_utils import normalize_name
-from ingestion.fund_master_ingestion import derive_plan_type
+from openpyxl import load_workbook
+from utils.string_utils import normalize_names
+
 class TerIngestor:
-    def __init__(self, file_path: str, as_of_month: str):
+    # Sheet columns the ingestion reads, after name normalization
+    SCHEME_CODE = "nsdl_scheme_code"
+    SCHEME_NAME = "scheme_name"
+    TER_DATE = "ter_date"
+    TER_COLUMNS = {
+        "Regular": "regular_plan_-_total_ter_(%)",
+        "Direct": "direct_plan_-_total_ter_(%)"
+    }
+
+    def __init__(self, file_path: str, as_of_month: str | None = None):
+        """
+        as_of_month ("YYYY-MM") defaults to the month of the sheet's latest TER date
+        """
         self.file_path = file_path
         self.as_of_month = as_of_month
 
+    @staticmethod
+    def _column_name(header) -> str:
+        return str(header).strip().lower().replace(" ", "_")
+
     def load(self) -> pd.DataFrame:
-        df = pd.read_excel(self.file_path)
+        """
+        Streams the first worksheet with openpyxl's read-only reader, keeping
+        only the columns the ingestion reads
+        """
+        columns = {self.SCHEME_CODE, self.SCHEME_NAME, self.TER_DATE, *self.TER_COLUMNS.values()}
 
-        df.columns = (
-            df.columns
-            .str.strip()
-            .str.lower()
-            .str.replace(" ", "_")
-        )
+        workbook = load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [self._column_name(h) for h in next(rows, ())]
+            keep = [i for i, name in enumerate(header) if name in columns]
+            data = [
+                [row[i] if i < len(row) else None for i in keep]
+                for row in rows
+                if any(value is not None for value in row)
+            ]
+        finally:
+            workbook.close()
 
+        df = pd.DataFrame(data, columns=[header[i] for i in keep])
+        if self.as_of_month is None:
+            self.as_of_month = self.sheet_month(df)
         return df
 
-    # @staticmethod
-    # def derive_plan_type(name: str) -> str:
-    #     return "Direct" if "direct" in name else "Regular"
-
-    def transform(self, df: pd.DataFrame, fund_map: dict) -> list[dict]:
-        records = []
-
-        # Map DataFrame columns to plan types
-        column_map = {
-            "Regular": "regular_plan_-_total_ter_(%)",
-            "Direct": "direct_plan_-_total_ter_(%)"
-        }
-
-        for _, row in df.iterrows():
-            scheme_name_raw = str(row["scheme_name"])
-            base_name = normalize_name(scheme_name_raw)
-
-            # Get funds matching this base name
-            matched_funds = fund_map.get(base_name, [])
-            
-            for fund in matched_funds:
-                fund_id = fund["fund_id"]
-                plan_type = fund["plan_type"]
-                
-                col_name = column_map.get(plan_type)
-                if col_name in row and pd.notnull(row[col_name]):
-                    try:
-                        ter_value = float(row[col_name])
-                        record = {
-                            "fund_id": fund_id,
-                            "plan_type": plan_type,
-                            "ter": ter_value,
-                            "as_of_month": self.as_of_month,
-                            "source": "AMFI"
-                        }
-                        records.append(record)
-                    except (ValueError, TypeError):
-                        continue
-
-        return records
+    def sheet_month(self, df: pd.DataFrame) -> str:
+        dates = pd.to_datetime(df.get(self.TER_DATE), errors="coerce")
+        if dates is None or dates.isna().all():
+            raise ValueError(f"No TER dates in {self.file_path}; pass as_of_month")
+        return dates.max().strftime("%Y-%m")
+
+    @staticmethod
+    def _clean_code(code) -> str | None:
+        if pd.isnull(code) or not str(code).strip():
+            return None
+        return str(code).strip()
+
+    def _codes(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Every row's scheme code, or None
+        """
+        if self.SCHEME_CODE not in df.columns:
+            return pd.Series(None, index=df.index, dtype=object)
+        return df[self.SCHEME_CODE].map(self._clean_code).astype(object)
+
+    def _names(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Every row's normalized scheme name (each distinct name normalized once)
+        """
+        names = df[self.SCHEME_NAME].astype(str)
+        distinct = pd.Series(names.unique())
+        return names.map(dict(zip(distinct, normalize_names(distinct))))
+
+    def _ter_values(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Every row's numeric TER per plan type (NaN when blank or the column is missing)
+        """
+        missing = pd.Series(np.nan, index=df.index)
+        return pd.DataFrame({
+            plan_type: pd.to_numeric(df[column] if column in df.columns else missing, errors="coerce")
+            for plan_type, column in self.TER_COLUMNS.items()
+        })
+
+    def _by_code(self, codes: pd.Series, code_map: dict) -> pd.DataFrame:
+        """
+        Per plan type, whether the row joins by scheme code: its code is linked to a
+        fund of that plan. Other plans of the row fall back to its name.
+        """
+        return pd.DataFrame({
+            plan_type: codes.isin([code for code, funds in code_map.items() if any(f["plan_type"] == plan_type for f in funds)])
+            for plan_type in self.TER_COLUMNS
+        })
+
+    def scheme_codes(self, df: pd.DataFrame) -> set[str]:
+        return set(self._codes(df).dropna())
+
+    def names_without_code(self, df: pd.DataFrame, code_map: dict) -> list[str]:
+        """
+        Normalized scheme names of the rows that fall back to name matching: their
+        scheme code isn't in code_map, or it has no fund for a plan the row has a TER for
+        """
+        codes = self._codes(df)
+        uncovered = (~self._by_code(codes, code_map) & self._ter_values(df).notna()).any(axis=1)
+        return sorted(set(self._names(df)[~codes.isin(code_map.keys()) | uncovered]))
+
+    def transform(self, df: pd.DataFrame, code_map: dict, fund_map: dict) -> tuple[list[dict], list[dict]]:
+        """
+        Matches each TER row and plan to its funds by NSDL scheme code (code_map, from
+        the crossref) and falls back to the normalized scheme name against the funds'
+        base names (fund_map). Records keep the row's scheme_code and the
+        match_confidence of fuzzy name matches (1.0 for exact ones).
+        A fund matched by several rows keeps the last row's TER.
+        Returns (records, code links): the links [{id_value, fund_id, plan_type}] are
+        every fund an exact name match gave a row's scheme code that code_map lacks,
+        including funds whose TER cell is blank this month.
+        """
+        codes, names = self._codes(df), self._names(df)
+        by_code, values = self._by_code(codes, code_map), self._ter_values(df)
+        rows = pd.concat(
+            [
+                pd.DataFrame({
+                    "key": np.where(by_code[plan_type], "code:" + codes.fillna(""), "name:" + names),
+                    "plan_type": plan_type,
+                    "scheme_code": codes,
+                    "ter": values[plan_type],
+                })
+                for plan_type in self.TER_COLUMNS
+            ],
+            ignore_index=True
+        )
+
+        links = pd.DataFrame(
+            [
+                (f"{prefix}:{key}", fund["fund_id"], fund["plan_type"], fund.get("match_confidence", 1.0))
+                for prefix, key_map in (("code", code_map), ("name", fund_map))
+                for key, funds in key_map.items()
+                for fund in funds
+            ],
+            columns=["key", "fund_id", "plan_type", "match_confidence"]
+        )
+
+        # Inner merge keeps the rows' order within each plan, so "last" matches a row-by-row upsert
+        matched = rows.merge(links, on=["key", "plan_type"], how="inner")
+
+        known = {(code, fund["fund_id"]) for code, funds in code_map.items() for fund in funds}
+        learnable = matched[
+            matched["key"].str.startswith("name:") & matched["scheme_code"].notna() & (matched["match_confidence"] == 1.0)
+        ].drop_duplicates(subset=["scheme_code", "fund_id"])
+        code_links = [
+            {"id_value": code, "fund_id": int(fund_id), "plan_type": plan_type}
+            for code, fund_id, plan_type in learnable[["scheme_code", "fund_id", "plan_type"]].itertuples(index=False)
+            if (code, fund_id) not in known
+        ]
+
+        matched = (
+            matched.dropna(subset=["ter"])
+            .drop_duplicates(subset=["fund_id", "plan_type"], keep="last")
+        )
+        matched["as_of_month"] = self.as_of_month
+        matched["source"] = "AMFI"
+
+        columns = ["fund_id", "plan_type", "ter", "scheme_code", "match_confidence", "as_of_month", "source"]
+        return matched[columns].to_dict("records"), code_links
@@ -4,12 +4,24 @@ from pipelines.nav_pipeline import NavPipeline
 from pipelines.fund_master_pipeline import FundMasterPipeline
 from pipelines.ter_pipeline import TerPipeline
 from pipelines.metrics_pipeline import MetricsPipeline
+from config.settings import NAV_API_BASE_URL, NAV_FETCH_RATE_PER_SEC, NAV_ALL_URL, NAV_STORE_DIR, METRICS_ENGINE, METRICS_BACKEND, METRICS_STREAM_MAX_ROWS
 import logging
 
 import sys
+from datetime import date
 
 logger = logging.getLogger(__name__)
 
+def get_arg_value(flag: str, default=None, cast=str):
+    """
+    Returns the value that follows a flag, e.g. `--workers 16` -> 16
+    """
+    if flag in sys.argv:
+        idx = sys.argv.index(flag)
+        if idx + 1 < len(sys.argv):
+            return cast(sys.argv[idx + 1])
+    return default
+
 if __name__=="__main__":
     logging.config.dictConfig(LOGGING_CONFIG)
     
@@ -20,10 +32,71 @@ if __name__=="__main__":
     run_master = "--master" in sys.argv
     run_metrics = "--metrics" in sys.argv
     run_cleanup = "--cleanup" in sys.argv
+    run_compact = "--compact-nav" in sys.argv
+    # With --compact-nav: --reclaim also runs `compact` to hand the freed space back to the OS
+    reclaim_space = "--reclaim" in sys.argv
     clear_ter = "--clear-ter" in sys.argv
+    # TER: one sheet (--ter-file, month from its TER dates unless --ter-month 2026-01),
+    # or every monthly sheet in a directory: --ter-dir data/ter
+    ter_file = get_arg_value("--ter-file", "data/ter_data.xlsx")
+    ter_month = get_arg_value("--ter-month")
+    ter_dir = get_arg_value("--ter-dir")
+    # Sharded metrics: every node runs --metrics --shard i/N, then one node runs --merge-shards N
+    # (all with the same --shard-run id, default: today's date)
+    shard_spec = get_arg_value("--shard")
+    merge_shards = get_arg_value("--merge-shards", None, int)
+    shard_run_id = get_arg_value("--shard-run", date.today().isoformat())
+    metrics_shard = tuple(int(part) for part in shard_spec.split("/")) if shard_spec else None
+    if merge_shards:
+        run_metrics = True
+    # Backtesting: --backfill-metrics --backfill-start 2022-01 [--backfill-end 2026-09], then
+    # --evaluate-weights "0.4,0.25,0.2,0.15;0.25,0.25,0.25,0.25" [--horizon-months 12 --top-k 5]
+    backfill_start = get_arg_value("--backfill-start")
+    backfill_end = get_arg_value("--backfill-end")
+    weight_spec = get_arg_value("--evaluate-weights")
+    run_backfill = "--backfill-metrics" in sys.argv
+    rollback_metrics = "--rollback-metrics" in sys.argv # Swap the previous fund_metrics version back in
+    restart_history = "--restart" in sys.argv # Ignore an unfinished history run instead of resuming it
+
+    # NAV fetch tuning: --workers 16 --rate 25 [--nav-api-url http://localhost:8001/mf/]
+    nav_workers = get_arg_value("--workers", 1, int)
+    nav_rate = get_arg_value("--rate", NAV_FETCH_RATE_PER_SEC, float)
+    nav_api_url = get_arg_value("--nav-api-url", NAV_API_BASE_URL)
+
+    # Daily NAV from one all-schemes file: --snapshot [--snapshot-source data/NAVAll.txt]
+    use_snapshot = "--snapshot" in sys.argv
+    snapshot_source = get_arg_value("--snapshot-source", NAV_ALL_URL)
+
+    # Columnar NAV cache: refreshed after NAV syncs and memory-mapped by metrics workers
+    use_nav_store = "--nav-store" in sys.argv
+    nav_store_dir = NAV_STORE_DIR if use_nav_store else None
+    metrics_engine = get_arg_value("--engine", METRICS_ENGINE)
+    metrics_backend = get_arg_value("--backend", METRICS_BACKEND)
+    incremental_metrics = "--incremental" in sys.argv # Only recompute funds whose NAV data changed
+    stream_metrics = "--stream" in sys.argv # Compute while the NAV cursor is read, bounded memory (pandas engine without --nav-store)
+    stream_max_rows = get_arg_value("--stream-max-rows", METRICS_STREAM_MAX_ROWS, int)
     
-    # If no specific flags, run all (excluding cleanup)
-    if not run_nav and not run_ter and not run_master and not run_metrics and not run_cleanup:
+    # Rollback is a standalone operation
+    if rollback_metrics:
+        from storage.mongo_client import MongoDBClient
+        from storage.metrics_repo import MetricsRepo
+        MetricsRepo(MongoDBClient().get_db()).rollback_metrics()
+        sys.exit(0)
+
+    if run_backfill or weight_spec:
+        backtest_pipeline = MetricsPipeline(nav_store_dir=nav_store_dir, engine="batch")
+        if run_backfill:
+            backtest_pipeline.run_backfill(backfill_start, backfill_end)
+        if weight_spec:
+            backtest_pipeline.evaluate_weights(
+                [[float(w) for w in vector.split(",")] for vector in weight_spec.split(";")],
+                horizon_months=get_arg_value("--horizon-months", 12, int),
+                top_k=get_arg_value("--top-k", 5, int)
+            )
+        sys.exit(0)
+
+    # If no specific flags, run all (excluding cleanup and compaction)
+    if not run_nav and not run_ter and not run_master and not run_metrics and not run_cleanup and not run_compact:
         run_nav = True
         run_ter = True
         run_master = True
@@ -32,12 +105,24 @@ if __name__=="__main__":
     fund_master_pipeline = FundMasterPipeline(
         csv_path="data/scheme_details.csv"
     )
-    nav_pipeline = NavPipeline()
+    nav_pipeline = NavPipeline(
+        max_workers=nav_workers,
+        rate_per_sec=nav_rate,
+        base_url=nav_api_url,
+        nav_store_dir=nav_store_dir
+    )
     ter_pipeline = TerPipeline(
-        ter_file="data/ter_data.xlsx",
-        as_of_month="2026-01"
+        ter_file=ter_file,
+        as_of_month=ter_month
     ) 
-    metrics_pipeline = MetricsPipeline()
+    metrics_pipeline = MetricsPipeline(
+        nav_store_dir=nav_store_dir,
+        engine=metrics_engine,
+        backend=metrics_backend,
+        incremental=incremental_metrics,
+        stream=stream_metrics,
+        stream_max_rows=stream_max_rows
+    )
 
     # 1. Update master list
     if run_master:
@@ -47,20 +132,34 @@ if __name__=="__main__":
     if run_nav:
         if is_history_sync:
             logger.info("Running FULL historical NAV sync...")
-            nav_pipeline.run_history()
+            nav_pipeline.run_history(resume=not restart_history)
+        elif use_snapshot:
+            logger.info("Running daily NAV sync from all-schemes snapshot...")
+            nav_pipeline.run_snapshot(source=snapshot_source)
         else:
             logger.info("Running daily incremental NAV sync...")
             nav_pipeline.run()
 
     # 3. Sync TER (Optional)
     if run_ter:
-        ter_pipeline.run(delete_month=clear_ter)
+        if ter_dir:
+            ter_pipeline.run_batch(ter_dir, delete_months=clear_ter)
+        else:
+            ter_pipeline.run(delete_month=clear_ter)
 
     # 4. Compute Metrics (Optional)
     if run_metrics:
-        metrics_pipeline.run()
+        if merge_shards:
+            metrics_pipeline.merge_shards(shard_run_id, merge_shards)
+        else:
+            metrics_pipeline.run(shard=metrics_shard, run_id=shard_run_id)
+
+    # 5. Remove duplicate NAV rows before counts are used (Optional, safe alongside ingestion)
+    if run_compact:
+        from utils.nav_compactor import compact_nav_duplicates
+        compact_nav_duplicates(reclaim=reclaim_space)
 
-    # 5. Cleanup and Validate (Optional)
+    # 6. Cleanup and Validate (Optional)
     if run_cleanup:
         from utils.fund_cleaner import cleanup_funds
-        cleanup_funds()
\ No newline at end of file
+        cleanup_funds()
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+"""
+Backtest of recommendation score weights over point-in-time metric snapshots.
+
+Every (as-of date, fund) row from fund_metrics_history is scored by every
+weight vector with one matrix product, and ranked against the fund's forward
+NAV return over the horizon. Per weight vector this gives the mean rank IC
+(Spearman correlation of score vs forward return within each date) and the
+mean forward return of the top-k funds per date.
+"""
+
+# norm_<metric> inputs of RecommendationEngine's score, in weight order:
+# 0.4*CAGR + 0.25*Consistency + 0.2*MaxDrawdown + 0.15*ExpenseRatio
+SCORE_COMPONENTS = ["cagr_3y", "rolling_3y_consistency", "max_drawdown", "expense_ratio"]
+CURRENT_WEIGHTS = (0.4, 0.25, 0.2, 0.15)
+
+def forward_returns(nav_store, as_of, horizon_months: int, max_staleness_days: int = 10) -> pd.Series:
+    """
+    {fund_id: NAV(as_of + horizon) / NAV(as_of) - 1} from the last NAV on or before
+    each date; funds without a recent enough NAV at either end are left out
+    """
+    end = as_of + pd.DateOffset(months=horizon_months)
+    staleness = pd.Timedelta(days=max_staleness_days).value
+
+    navs = {}
+    for label, cutoff in (("start", as_of), ("end", end)):
+        fund_ids, last_dates, last_navs = nav_store.as_of(cutoff).last_observations()
+        fresh = last_dates >= pd.Timestamp(cutoff).value - staleness
+        navs[label] = pd.Series(last_navs[fresh], index=fund_ids[fresh])
+
+    start_navs = navs["start"][navs["start"] > 0]
+    returns = navs["end"].reindex(start_navs.index) / start_navs - 1
+    return returns.dropna()
+
+def _snapshot_frame(snapshots: list[dict], nav_store, horizon_months: int) -> pd.DataFrame:
+    """
+    One row per (as_of, fund) with the score components and the forward return
+    """
+    frames = []
+    for snapshot in snapshots:
+        frame = pd.DataFrame({f"norm_{m}": snapshot["norm"][m] for m in SCORE_COMPONENTS}, dtype=np.float64)
+        frame["fund_id"] = snapshot["fund_ids"]
+        frame["as_of"] = snapshot["as_of"]
+
+        returns = forward_returns(nav_store, pd.Timestamp(snapshot["as_of"]), horizon_months)
+        frame["forward_return"] = frame["fund_id"].map(returns)
+        frames.append(frame.dropna(subset=["forward_return"]))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def evaluate_weight_vectors(
+    snapshots: list[dict],
+    nav_store,
+    weight_vectors: list,
+    horizon_months: int = 12,
+    top_k: int = 5
+) -> pd.DataFrame:
+    """
+    Scores every weight vector (len(SCORE_COMPONENTS) weights each) across all
+    snapshot dates at once. Returns one row per vector: mean_ic, ic_std, ic_ir,
+    top_k_return, top_k_excess (over the date's universe mean) and n_dates.
+    """
+    rows = _snapshot_frame(snapshots, nav_store, horizon_months)
+    if rows.empty:
+        return pd.DataFrame()
+
+    weights = np.asarray(weight_vectors, dtype=np.float64)
+    features = rows[[f"norm_{m}" for m in SCORE_COMPONENTS]].fillna(0).to_numpy()
+    # [rows x vectors] in one product
+    scores = pd.DataFrame(features @ weights.T, index=rows.index)
+
+    dates = rows["as_of"]
+    score_ranks = scores.groupby(dates).rank()
+    return_ranks = rows["forward_return"].groupby(dates).rank()
+
+    # Pearson correlation of ranks within each date, for all vectors at once
+    demeaned_scores = score_ranks - score_ranks.groupby(dates).transform("mean")
+    demeaned_returns = return_ranks - return_ranks.groupby(dates).transform("mean")
+    covariance = demeaned_scores.mul(demeaned_returns, axis=0).groupby(dates).sum()
+    score_var = (demeaned_scores ** 2).groupby(dates).sum()
+    return_var = (demeaned_returns ** 2).groupby(dates).sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ic = covariance.div(np.sqrt(score_var.mul(return_var, axis=0)))
+
+    # Mean forward return of each date's top_k funds (ties broken by order)
+    in_top_k = scores.groupby(dates).rank(ascending=False, method="first") <= top_k
+    top_returns = in_top_k.mul(rows["forward_return"], axis=0).groupby(dates).sum() / in_top_k.groupby(dates).sum()
+    excess = top_returns.sub(rows["forward_return"].groupby(dates).mean(), axis=0)
+
+    ic_mean, ic_std = ic.mean(), ic.std()
+    return pd.DataFrame({
+        "weights": [tuple(float(w) for w in vector) for vector in weights],
+        "mean_ic": ic_mean.to_numpy(),
+        "ic_std": ic_std.to_numpy(),
+        "ic_ir": (ic_mean / ic_std).to_numpy(),
+        "top_k_return": top_returns.mean().to_numpy(),
+        "top_k_excess": excess.mean().to_numpy(),
+        "n_dates": ic.count().to_numpy(),
+    })
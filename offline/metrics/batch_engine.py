@@ -0,0 +1,178 @@
+import numpy as np
+import pandas as pd
+from utils.date_utils import NS_PER_DAY
+from metrics.rolling import compute_rolling_stats, rolling_metric_names
+from metrics.risk_adjusted import compute_risk_adjusted_stats, risk_adjusted_metric_names
+
+"""
+Vectorized cross-fund metrics engine.
+
+Funds are processed in blocks. Each block is aligned onto a shared trading-date
+axis as a (fund x date) matrix with NaN where a fund has no NAV, and every
+metric is computed for the whole block with array operations instead of
+per-fund pandas calls. Results follow the per-fund functions in
+performance.py / risk.py, including their None rules; rolling-return stats
+come from the same multi-fund pass stability.py uses (metrics/rolling.py).
+Returns between observations are computed once per block and shared by
+volatility and the risk-adjusted bundle (metrics/risk_adjusted.py).
+"""
+
+BATCH_METRICS = (
+    ["cagr_3y", "cagr_5y", "volatility", "max_drawdown"] + rolling_metric_names() + risk_adjusted_metric_names()
+)
+
+def build_nav_matrix(slices: list):
+    """
+    slices: [(nav_dates int64 ns, navs float64), ...] one per fund, each sorted by date.
+    Returns (date_axis [T], matrix [F, T]) with NaN where a fund has no NAV on that date.
+    """
+    lengths = np.array([len(d) for d, _ in slices], dtype=np.int64)
+    all_dates = np.concatenate([d for d, _ in slices])
+    all_navs = np.concatenate([v for _, v in slices])
+
+    date_axis = np.unique(all_dates)
+    rows = np.repeat(np.arange(len(slices)), lengths)
+    cols = np.searchsorted(date_axis, all_dates)
+
+    matrix = np.full((len(slices), len(date_axis)), np.nan)
+    matrix[rows, cols] = all_navs
+    return date_axis, matrix
+
+def _ffill_columns(valid: np.ndarray) -> np.ndarray:
+    """
+    For every cell, the column of the latest valid cell at or before it (0 if none)
+    """
+    idx = np.where(valid, np.arange(valid.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return idx
+
+def _to_optional(values: np.ndarray, missing: np.ndarray) -> list:
+    return [None if m else float(v) for v, m in zip(values, missing)]
+
+def batch_cagr(matrix, valid, date_axis, last_col, years: int) -> list:
+    """
+    Vectorized calculate_cagr: start NAV is the fund's observation nearest to
+    (end - N years), ties going to the later date like Index.get_indexer('nearest').
+    """
+    n_funds, n_dates = matrix.shape
+    fund_rows = np.arange(n_funds)
+
+    end_dates = date_axis[last_col]
+    end_navs = matrix[fund_rows, last_col]
+    targets = (pd.DatetimeIndex(end_dates.view("datetime64[ns]")) - pd.DateOffset(years=years)).asi8
+
+    # Valid cells flattened row-major are sorted by (fund, date), so one searchsorted
+    # over composite keys finds each fund's first observation on/after its target
+    rows, cols = np.nonzero(valid)
+    keys = rows * n_dates + cols
+    target_cols = np.searchsorted(date_axis, targets, side="left")
+    right_pos = np.searchsorted(keys, fund_rows * n_dates + target_cols, side="left")
+    right_cols = cols[right_pos]
+    right_dates = date_axis[right_cols]
+
+    exact = right_dates == targets
+    left_pos = np.where(exact, right_pos, right_pos - 1)
+    has_left = exact | ((left_pos >= 0) & (rows[np.maximum(left_pos, 0)] == fund_rows))
+    left_cols = cols[np.maximum(left_pos, 0)]
+    left_dates = date_axis[left_cols]
+
+    choose_left = has_left & (np.abs(left_dates - targets) < np.abs(right_dates - targets))
+    start_cols = np.where(choose_left, left_cols, right_cols)
+    start_navs = matrix[fund_rows, start_cols]
+
+    actual_years = ((end_dates - date_axis[start_cols]) // NS_PER_DAY) / 365.25
+    counts = valid.sum(axis=1)
+
+    missing = (
+        (counts < 2)
+        | (actual_years < (years - 0.1))
+        | np.isnan(start_navs) | np.isnan(end_navs)
+        | (start_navs <= 0) | (end_navs <= 0)
+    )
+
+    # Final power on numpy scalars, exactly as the per-fund path evaluates it
+    return [
+        None if m else float((end / start) ** (1 / years) - 1)
+        for end, start, m in zip(end_navs, start_navs, missing)
+    ]
+
+def observation_returns(matrix, valid):
+    """
+    Returns between consecutive observations of each fund, as ([F, T-1] returns,
+    mask of finite ones). Column t holds the return into date t + 1.
+    """
+    n_funds = matrix.shape[0]
+    prev_cols = _ffill_columns(valid)[:, :-1]
+    prev_navs = matrix[np.arange(n_funds)[:, None], prev_cols]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = matrix[:, 1:] / prev_navs - 1
+
+    # A fund's first observation has no previous one (prev_navs is NaN or another date's column)
+    has_prev = np.cumsum(valid, axis=1)[:, :-1] > 0
+    return returns, valid[:, 1:] & has_prev & np.isfinite(returns)
+
+def batch_volatility(returns, finite) -> list:
+    """
+    Vectorized calculate_volatility(calculate_daily_returns(...)): sample std (ddof=1)
+    of finite returns between consecutive observations of each fund
+    (returns / finite from observation_returns).
+    """
+
+    count = finite.sum(axis=1)
+    safe_returns = np.where(finite, returns, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = safe_returns.sum(axis=1, dtype=np.float64) / count
+        sqr = np.where(finite, (avg[:, None] - returns) ** 2, 0.0)
+        var = sqr.sum(axis=1, dtype=np.float64) / (count - 1)
+    std = np.where(count > 1, np.sqrt(np.where(count > 1, var, 0.0)), np.nan)
+
+    return _to_optional(std, count == 0)
+
+def batch_max_drawdown(matrix, valid) -> list:
+    """
+    Vectorized calculate_max_drawdown: running max via fmax.accumulate (NaN-skipping).
+    """
+    running_max = np.fmax.accumulate(matrix, axis=1)
+    safe_max = np.where(running_max == 0, np.nan, running_max)
+    with np.errstate(invalid="ignore"):
+        drawdown = np.where(valid, (matrix - safe_max) / safe_max, np.nan)
+
+    all_nan = np.isnan(drawdown).all(axis=1)
+    mdd = np.full(matrix.shape[0], np.nan)
+    mdd[~all_nan] = np.nanmin(drawdown[~all_nan], axis=1)
+
+    # An empty series returns None; an all-NaN drawdown returns NaN like Series.min()
+    return _to_optional(mdd, valid.sum(axis=1) == 0)
+
+def compute_batch_metrics(nav_store, fund_ids: list[int], block_size: int = 2048) -> dict:
+    """
+    Computes BATCH_METRICS for every fund in nav_store (a NavColumnarStore).
+    Returns {fund_id: {metric: value}}; funds without NAV rows are omitted.
+    """
+    present = [f_id for f_id in fund_ids if f_id in nav_store]
+    results = {}
+
+    for start in range(0, len(present), block_size):
+        block_ids = present[start:start + block_size]
+        slices = [nav_store.slice(f_id) for f_id in block_ids]
+
+        date_axis, matrix = build_nav_matrix(slices)
+        valid = ~np.isnan(matrix)
+        last_col = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        returns, has_return = observation_returns(matrix, valid)
+
+        columns = {
+            "cagr_3y": batch_cagr(matrix, valid, date_axis, last_col, 3),
+            "cagr_5y": batch_cagr(matrix, valid, date_axis, last_col, 5),
+            "volatility": batch_volatility(returns, has_return),
+            "max_drawdown": batch_max_drawdown(matrix, valid),
+            **compute_risk_adjusted_stats(returns, has_return, date_axis, valid),
+        }
+        rolling = compute_rolling_stats(slices)
+
+        for i, f_id in enumerate(block_ids):
+            results[f_id] = {metric: values[i] for metric, values in columns.items()}
+            results[f_id].update(rolling[i])
+
+    return results
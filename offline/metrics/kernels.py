@@ -0,0 +1,88 @@
+import math
+import numpy as np
+from config.settings import METRICS_BACKEND
+
+"""
+Optional numba backend for the per-fund metric functions.
+
+Kernels work on raw float64 NAV arrays in a single pass without temporary
+Series. When numba isn't installed (or the backend is set to "pandas"),
+risk.py keeps using its pandas implementations. Rolling returns don't need a
+kernel: metrics/rolling.py is already a linear searchsorted pass.
+"""
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # Leaves the kernels as plain Python so this module still imports
+        def wrap(func):
+            return func
+        return wrap
+
+_backend = METRICS_BACKEND
+
+def set_backend(backend: str):
+    """
+    "auto" (numba when installed), "numba" or "pandas".
+    Also used as a ProcessPoolExecutor initializer so workers follow the parent.
+    """
+    global _backend
+    if backend not in ("auto", "numba", "pandas"):
+        raise ValueError(f"Unknown metrics backend: {backend}")
+    _backend = backend
+
+def use_numba() -> bool:
+    return NUMBA_AVAILABLE and _backend in ("auto", "numba")
+
+@njit(cache=True)
+def max_drawdown_kernel(navs):
+    """
+    Running max and worst drawdown in one pass. NaN if no drawdown is defined
+    (e.g. every running max is 0), matching Series.min() on an all-NaN series.
+    """
+    running_max = np.nan
+    worst = np.nan
+    for i in range(navs.shape[0]):
+        nav = navs[i]
+        if math.isnan(nav):
+            continue
+        if math.isnan(running_max) or nav > running_max:
+            running_max = nav
+        if running_max == 0:
+            continue
+        drawdown = (nav - running_max) / running_max
+        if math.isnan(worst) or drawdown < worst:
+            worst = drawdown
+    return worst
+
+@njit(cache=True)
+def return_volatility_kernel(navs):
+    """
+    Sample std (ddof=1) of finite daily returns via Welford's update.
+    Returns (count, std); std is NaN when fewer than 2 returns exist.
+    """
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    prev = np.nan
+    for i in range(navs.shape[0]):
+        nav = navs[i]
+        if math.isnan(nav):
+            continue
+        if not math.isnan(prev):
+            # Division by a zero NAV gives inf/NaN, which pandas filters out too
+            ret = nav / prev - 1 if prev != 0 else np.nan
+            if math.isfinite(ret):
+                count += 1
+                delta = ret - mean
+                mean += delta / count
+                m2 += delta * (ret - mean)
+        prev = nav
+
+    if count < 2:
+        return count, np.nan
+    return count, math.sqrt(m2 / (count - 1))
@@ -0,0 +1,113 @@
+import numpy as np
+from metrics.batch_engine import build_nav_matrix, observation_returns
+from utils.date_utils import NS_PER_DAY
+from metrics.risk_adjusted import TRADING_DAYS_PER_YEAR
+
+"""
+Category-relative metrics engine.
+
+Each scheme_category is aligned as one (fund x date) matrix over the last
+RELATIVE_WINDOW_YEARS. Its equal-weight category return on a date is the mean
+of every member fund's return on that date (the fund itself included), and
+each fund's beta, alpha, tracking error, information ratio and up/down capture
+against that series come from masked column sums over the whole matrix, with
+no per-fund loop. Alpha and tracking error are annualized with
+TRADING_DAYS_PER_YEAR; captures are ratios of mean returns on the category's
+up (down) days.
+"""
+
+RELATIVE_WINDOW_YEARS = 3
+
+# About half a year of trading days; fewer paired returns give None
+RELATIVE_MIN_OBSERVATIONS = 126
+
+RELATIVE_METRICS = ["beta", "alpha", "tracking_error", "information_ratio", "up_capture", "down_capture"]
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, missing: np.ndarray) -> list:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = numerator / denominator
+    missing = missing | (denominator == 0) | ~np.isfinite(values)
+    return [None if m else float(v) for v, m in zip(values, missing)]
+
+def relative_to_category(returns: np.ndarray, has_return: np.ndarray, min_observations: int = RELATIVE_MIN_OBSERVATIONS) -> dict:
+    """
+    returns / has_return: [F, T] return matrix of one category and its validity mask.
+    Returns {metric: [value or None] * F} against the equal-weight category series.
+    """
+    counts = has_return.sum(axis=0)
+    fund_returns = np.where(has_return, returns, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        category = fund_returns.sum(axis=0) / counts
+
+    # Every cell a fund has a return for also has a category return
+    n = has_return.sum(axis=1)
+    too_short = n < max(min_observations, 2)
+    category_returns = np.where(has_return, category, 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fund_mean = fund_returns.sum(axis=1) / n
+        category_mean = category_returns.sum(axis=1) / n
+        fund_dev = np.where(has_return, returns - fund_mean[:, None], 0.0)
+        category_dev = np.where(has_return, category - category_mean[:, None], 0.0)
+        covariance = (fund_dev * category_dev).sum(axis=1) / (n - 1)
+        category_var = (category_dev ** 2).sum(axis=1) / (n - 1)
+        beta = covariance / category_var
+
+        active = np.where(has_return, returns - category, 0.0)
+        active_mean = active.sum(axis=1) / n
+        active_dev = np.where(has_return, active - active_mean[:, None], 0.0)
+        tracking_error = np.sqrt((active_dev ** 2).sum(axis=1) / (n - 1)) * np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    no_beta = too_short | (category_var == 0)
+    up_days = has_return & (category > 0)
+    down_days = has_return & (category < 0)
+
+    return {
+        "beta": _ratio(covariance, category_var, too_short),
+        "alpha": _ratio((fund_mean - np.where(no_beta, 0.0, beta) * category_mean) * TRADING_DAYS_PER_YEAR, 1.0, no_beta),
+        "tracking_error": _ratio(tracking_error, 1.0, too_short),
+        "information_ratio": _ratio(active_mean * TRADING_DAYS_PER_YEAR, tracking_error, too_short),
+        "up_capture": _ratio(
+            np.where(up_days, returns, 0.0).sum(axis=1), np.where(up_days, category, 0.0).sum(axis=1), too_short
+        ),
+        "down_capture": _ratio(
+            np.where(down_days, returns, 0.0).sum(axis=1), np.where(down_days, category, 0.0).sum(axis=1), too_short
+        ),
+    }
+
+def compute_relative_metrics(
+    nav_store,
+    category_map: dict,
+    fund_ids: list[int],
+    years: int = RELATIVE_WINDOW_YEARS,
+    min_observations: int = RELATIVE_MIN_OBSERVATIONS
+) -> dict:
+    """
+    Computes RELATIVE_METRICS for every fund in nav_store (a NavColumnarStore)
+    against its category. Returns {fund_id: {metric: value}}; funds without
+    NAV rows are omitted.
+    """
+    by_category = {}
+    for f_id in fund_ids:
+        if f_id in nav_store:
+            by_category.setdefault(category_map[f_id], []).append(f_id)
+
+    results = {}
+    for category_ids in by_category.values():
+        slices = [nav_store.slice(f_id) for f_id in category_ids]
+        window_start = max(int(dates[-1]) for dates, _ in slices) - years * 365 * NS_PER_DAY
+
+        # Each fund keeps its last NAV before the window so the first in-window return exists
+        windowed = []
+        for dates, navs in slices:
+            first = max(int(np.searchsorted(dates, window_start, side="left")) - 1, 0)
+            windowed.append((dates[first:], navs[first:]))
+
+        _, matrix = build_nav_matrix(windowed)
+        returns, has_return = observation_returns(matrix, ~np.isnan(matrix))
+        columns = relative_to_category(returns, has_return, min_observations)
+
+        for i, f_id in enumerate(category_ids):
+            results[f_id] = {metric: columns[metric][i] for metric in RELATIVE_METRICS}
+
+    return results
@@ -1,5 +1,8 @@
 import pandas as pd
 import numpy as np
+from metrics.kernels import use_numba, max_drawdown_kernel, return_volatility_kernel
+from metrics.batch_engine import build_nav_matrix, observation_returns
+from metrics.risk_adjusted import compute_risk_adjusted_stats
 
 def calculate_daily_returns(nav_series: pd.Series) -> pd.Series:
     """
@@ -25,18 +28,44 @@ def calculate_max_drawdown(nav_series: pd.Series) -> float:
     """
     if nav_series.empty:
         return None
-    
+
+    if use_numba():
+        return float(max_drawdown_kernel(nav_series.to_numpy(dtype=np.float64)))
+    return _max_drawdown_pandas(nav_series)
+
+def _max_drawdown_pandas(nav_series: pd.Series) -> float:
     running_max = nav_series.cummax()
     # Mask zeros to avoid division by zero warning
     safe_max = running_max.replace(0, np.nan)
     drawdown = (nav_series - safe_max) / safe_max
     return float(drawdown.min())
 
+def calculate_return_volatility(nav_series: pd.Series) -> float:
+    """
+    Volatility straight from NAVs: one allocation-free pass with numba,
+    otherwise calculate_volatility(calculate_daily_returns(...)).
+    """
+    if use_numba():
+        count, std = return_volatility_kernel(nav_series.to_numpy(dtype=np.float64))
+        return float(std) if count else None
+    return calculate_volatility(calculate_daily_returns(nav_series))
+
+def calculate_risk_adjusted_metrics(nav_series: pd.Series) -> dict:
+    """
+    Annualized volatility, Sharpe, downside deviation, Sortino and Calmar for
+    1y, 3y and 5y windows from one returns pass, shared with the batch engine.
+    """
+    date_axis, matrix = build_nav_matrix([(nav_series.index.asi8, nav_series.to_numpy(dtype=np.float64))])
+    valid = ~np.isnan(matrix)
+    returns, has_return = observation_returns(matrix, valid)
+    stats = compute_risk_adjusted_stats(returns, has_return, date_axis, valid)
+    return {metric: values[0] for metric, values in stats.items()}
+
 def compute_risk_metrics(nav_df: pd.DataFrame) -> dict:
     nav_series = nav_df['nav']
-    daily_returns = calculate_daily_returns(nav_series)
     
     return {
-        "volatility": calculate_volatility(daily_returns),
-        "max_drawdown": calculate_max_drawdown(nav_series)
+        "volatility": calculate_return_volatility(nav_series),
+        "max_drawdown": calculate_max_drawdown(nav_series),
+        **calculate_risk_adjusted_metrics(nav_series)
     }
@@ -0,0 +1,89 @@
+import numpy as np
+from config.settings import RISK_FREE_RATE
+from utils.date_utils import NS_PER_DAY
+
+"""
+Risk-adjusted return bundle.
+
+Works on the batch engine's aligned (fund x date) return matrix, so the
+per-fund and batch paths share one implementation. The returns are computed
+once, and every window (1y, 3y, 5y) reads the same array through a date mask.
+The masked sums give annualized volatility, Sharpe, downside deviation and
+Sortino, and a cumulative log-wealth pass gives the Calmar ratio. A window is
+None when the fund's history doesn't cover it (same 0.1 year slack as CAGR).
+"""
+
+TRADING_DAYS_PER_YEAR = 252
+
+RISK_WINDOWS = (1, 3, 5)
+RISK_STATS = ("volatility", "sharpe", "downside_deviation", "sortino", "calmar")
+
+def risk_adjusted_metric_names(windows=RISK_WINDOWS) -> list[str]:
+    return [f"{stat}_{w}y" for w in windows for stat in RISK_STATS]
+
+def _to_optional(values: np.ndarray, missing: np.ndarray) -> list:
+    missing = missing | ~np.isfinite(values)
+    return [None if m else float(v) for v, m in zip(values, missing)]
+
+def compute_risk_adjusted_stats(
+    returns: np.ndarray,
+    has_return: np.ndarray,
+    date_axis: np.ndarray,
+    valid: np.ndarray,
+    windows=RISK_WINDOWS,
+    risk_free_rate: float = RISK_FREE_RATE
+) -> dict:
+    """
+    returns / has_return: [F, T-1] from batch_engine.observation_returns, where
+    column t is the return into date_axis[t + 1]; valid: [F, T] NAV mask.
+    risk_free_rate is annual; the daily rate is risk_free_rate / 252.
+    Returns {<stat>_<N>y: [value or None] * F}.
+    """
+    n_funds, n_dates = valid.shape
+    if n_dates < 2:
+        return {name: [None] * n_funds for name in risk_adjusted_metric_names(windows)}
+
+    first_col = np.argmax(valid, axis=1)
+    last_col = n_dates - 1 - np.argmax(valid[:, ::-1], axis=1)
+    first_dates, last_dates = date_axis[first_col], date_axis[last_col]
+    return_dates = date_axis[1:]
+
+    daily_rf = risk_free_rate / TRADING_DAYS_PER_YEAR
+    annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.where(has_return, np.log1p(returns), 0.0)
+
+    results = {}
+    for years in windows:
+        cutoff = last_dates - years * 365 * NS_PER_DAY
+        in_window = has_return & (return_dates[None, :] > cutoff[:, None])
+        n = in_window.sum(axis=1)
+        short = (n < 2) | (first_dates > last_dates - int((years - 0.1) * 365.25 * NS_PER_DAY))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(in_window, returns, 0.0).sum(axis=1) / n
+            deviation = np.where(in_window, returns - mean[:, None], 0.0)
+            volatility = np.sqrt((deviation ** 2).sum(axis=1) / (n - 1)) * annualize
+            excess = (mean - daily_rf) * TRADING_DAYS_PER_YEAR
+
+            shortfall = np.where(in_window, np.minimum(returns - daily_rf, 0.0), 0.0)
+            downside = np.sqrt((shortfall ** 2).sum(axis=1) / n) * annualize
+
+            # Wealth starts at 1 (log 0) when the window opens; drawdown from the running peak
+            log_wealth = np.cumsum(np.where(in_window, log_returns, 0.0), axis=1)
+            peak = np.maximum.accumulate(np.maximum(log_wealth, 0.0), axis=1)
+            max_drawdown = np.expm1(np.where(in_window, log_wealth - peak, 0.0).min(axis=1))
+            annual_return = np.expm1(log_wealth[:, -1] / n * TRADING_DAYS_PER_YEAR)
+
+            stats = {
+                "volatility": volatility,
+                "sharpe": excess / volatility,
+                "downside_deviation": downside,
+                "sortino": excess / downside,
+                "calmar": annual_return / np.abs(max_drawdown),
+            }
+
+        for stat in RISK_STATS:
+            results[f"{stat}_{years}y"] = _to_optional(stats[stat], short)
+
+    return results
@@ -0,0 +1,99 @@
+import numpy as np
+from utils.date_utils import NS_PER_DAY
+
+"""
+Trading-day rolling-return engine.
+
+Each NAV date is paired with the fund's last NAV on or before the date N years
+(N * 365 days) earlier using searchsorted over the original trading-day index,
+so no calendar-day resampling is needed. One pass yields consistency (share of
+positive rolling returns) and a compact distribution (min, p10, median, p90)
+for every window. Works on many funds at once: composite (fund, time) keys keep
+every lookup inside its own fund.
+"""
+
+NS_PER_SEC = 10**9
+
+ROLLING_WINDOWS = (1, 3, 5)
+ROLLING_STATS = ("consistency", "min", "p10", "median", "p90")
+
+def rolling_metric_names(windows=ROLLING_WINDOWS) -> list[str]:
+    return [f"rolling_{w}y_{stat}" for w in windows for stat in ROLLING_STATS]
+
+def _group_quantile(values, starts, counts, q: float) -> np.ndarray:
+    """
+    Linear-interpolated quantile of each group in `values` (sorted within groups)
+    """
+    pos = (counts - 1) * q
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, counts - 1)
+    frac = pos - lo
+    low_vals = values[starts + lo]
+    return low_vals + (values[starts + hi] - low_vals) * frac
+
+def compute_rolling_stats(slices: list, windows=ROLLING_WINDOWS) -> list[dict]:
+    """
+    slices: [(nav_dates int64 ns, navs float64), ...] each sorted by date.
+    Returns one {rolling_<N>y_<stat>: value or None} dict per slice.
+    """
+    n_funds = len(slices)
+    results = [{name: None for name in rolling_metric_names(windows)} for _ in range(n_funds)]
+    if n_funds == 0:
+        return results
+
+    lengths = np.array([len(d) for d, _ in slices], dtype=np.int64)
+    if lengths.sum() == 0:
+        return results
+
+    nav_dates = np.concatenate([d for d, _ in slices]).astype(np.int64)
+    navs = np.concatenate([v for _, v in slices]).astype(np.float64)
+    ranks = np.repeat(np.arange(n_funds), lengths)
+
+    # Seconds resolution keeps rank * span inside int64 for any realistic universe
+    max_window = max(windows) * 365 * NS_PER_DAY
+    base = (nav_dates.min() - max_window) // NS_PER_SEC
+    span = nav_dates.max() // NS_PER_SEC - base + 1
+    keys = ranks * span + (nav_dates // NS_PER_SEC - base)
+
+    for window in windows:
+        prefix = f"rolling_{window}y_"
+        target_keys = ranks * span + ((nav_dates - window * 365 * NS_PER_DAY) // NS_PER_SEC - base)
+
+        # Last observation of the same fund on/before (date - window)
+        start_pos = np.searchsorted(keys, target_keys, side="right") - 1
+        paired = (start_pos >= 0) & (ranks[np.maximum(start_pos, 0)] == ranks)
+
+        start_navs = navs[np.maximum(start_pos, 0)]
+        paired &= start_navs != 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = navs / start_navs - 1
+        paired &= np.isfinite(returns)
+
+        fund_ranks = ranks[paired]
+        returns = returns[paired]
+        if len(returns) == 0:
+            continue
+
+        # Sort by (fund, return) so each fund's returns are a sorted contiguous run
+        order = np.lexsort((returns, fund_ranks))
+        fund_ranks, returns = fund_ranks[order], returns[order]
+
+        counts = np.bincount(fund_ranks, minlength=n_funds)
+        positives = np.bincount(fund_ranks[returns > 0], minlength=n_funds)
+        has_data = np.nonzero(counts)[0]
+        starts = (np.cumsum(counts) - counts)[has_data]
+        group_counts = counts[has_data]
+
+        stats = {
+            "consistency": positives[has_data] / group_counts,
+            "min": returns[starts],
+            "p10": _group_quantile(returns, starts, group_counts, 0.10),
+            "median": _group_quantile(returns, starts, group_counts, 0.50),
+            "p90": _group_quantile(returns, starts, group_counts, 0.90),
+        }
+
+        for i, rank in enumerate(has_data):
+            for stat in ROLLING_STATS:
+                results[rank][prefix + stat] = float(stats[stat][i])
+
+    return results
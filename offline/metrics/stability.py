@@ -1,41 +1,25 @@
 import pandas as pd
 import numpy as np
+from metrics.rolling import compute_rolling_stats, ROLLING_WINDOWS
+
+def _series_slice(nav_series: pd.Series):
+    return nav_series.index.asi8, nav_series.to_numpy(dtype=np.float64)
 
 def calculate_rolling_consistency(nav_series: pd.Series, window_years: int = 3) -> float:
     """
-    1. Compute rolling N-year returns.
+    1. Pair each trading day with the last NAV on/before the day N years earlier.
     2. Measure consistency as the proportion of periods with positive returns.
     """
     if nav_series.empty or len(nav_series) < 2:
         return None
 
-    # Number of days in 3 years roughly (business days vary, using calendar days approximation)
-    window_size = window_years * 365
-    
-    # We'll use shift to get the NAV from 3 years ago for each day
-    # This requires daily frequency or reindexing
-    # First, ensure daily frequency to make shifting reliable
-    daily_nav = nav_series.resample('D').ffill()
-    
-    if len(daily_nav) <= window_size:
-        return None
-        
-    # NAV_t / NAV_{t-window} - 1
-    # Mask zeros to avoid division by zero warning
-    shifted_nav = daily_nav.shift(window_size).replace(0, np.nan)
-    rolling_returns = (daily_nav / shifted_nav) - 1
-    rolling_returns = rolling_returns.dropna()
-    
-    if rolling_returns.empty:
-        return None
-        
-    positive_periods = (rolling_returns > 0).sum()
-    total_periods = len(rolling_returns)
-    
-    return float(positive_periods / total_periods)
+    stats = compute_rolling_stats([_series_slice(nav_series)], windows=(window_years,))[0]
+    return stats[f"rolling_{window_years}y_consistency"]
 
 def compute_stability_metrics(nav_df: pd.DataFrame) -> dict:
+    """
+    Consistency plus min / p10 / median / p90 rolling returns for 1y, 3y and 5y
+    windows, all from one trading-day pass (no daily resampling).
+    """
     nav_series = nav_df['nav']
-    return {
-        "rolling_3y_consistency": calculate_rolling_consistency(nav_series, 3)
-    }
+    return compute_rolling_stats([_series_slice(nav_series)], windows=ROLLING_WINDOWS)[0]
@@ -1,6 +1,7 @@
 import logging 
 from storage.mongo_client import MongoDBClient
 from storage.fund_master_repo import FundMasterRepository
+from storage.fund_crossref_repo import FundCrossrefRepo
 from ingestion.fund_master_ingestion import FundMasterIngestor  
 
 logger = logging.getLogger(__name__)
@@ -9,6 +10,7 @@ class FundMasterPipeline:
     def __init__(self, csv_path: str):
         db = MongoDBClient().get_db()
         self.fund_master_repo = FundMasterRepository(db)
+        self.crossref_repo = FundCrossrefRepo(db)
         self.fund_master_ingestor = FundMasterIngestor(csv_path)
 
     def run(self):
@@ -17,10 +19,13 @@ class FundMasterPipeline:
         df = self.fund_master_ingestor.load_csv()
         records = self.fund_master_ingestor.transform(df)
 
-        for record in records:
-            self.fund_master_repo.upsert_fund(record)
+        # Only new funds and funds whose derived fields changed are written
+        stored_hashes = self.fund_master_repo.get_content_hashes()
+        changed = [r for r in records if stored_hashes.get(r["fund_id"]) != r["content_hash"]]
+        written = self.fund_master_repo.bulk_upsert_funds(changed)
+        self.crossref_repo.replace_isin_links(changed)
 
         logger.info(
-            "Fund master ingestion completed | total_funds=%s",
-            len(records)
+            "Fund master ingestion completed | total_funds=%s | written=%s | unchanged=%s",
+            len(records), written, len(records) - written
         )
\ No newline at end of file
@@ -1,67 +1,379 @@
 import logging
+import numpy as np
 import pandas as pd
 from storage.mongo_client import MongoDBClient
 from storage.nav_repo import NavRepo
 from storage.ter_repo import TerRepo
 from storage.metrics_repo import MetricsRepo
+from storage.category_stats_repo import CategoryStatsRepo
+from storage.metrics_shard_repo import MetricsShardRepo
+from storage.metrics_history_repo import MetricsHistoryRepo
+from storage.nav_quality_repo import NavQualityRepo
 from metrics.performance import compute_performance_metrics
 from metrics.risk import compute_risk_metrics
 from metrics.stability import compute_stability_metrics
 from metrics.cost import compute_cost_metrics
-from validation.normalization import normalize_by_category
-from concurrent.futures import ProcessPoolExecutor
-import functools
+from metrics.batch_engine import compute_batch_metrics, BATCH_METRICS
+from metrics.relative import compute_relative_metrics, RELATIVE_METRICS
+from metrics.risk_adjusted import risk_adjusted_metric_names
+from metrics.backtest import evaluate_weight_vectors
+from metrics.kernels import set_backend
+from validation.nav_validation import validate_nav, quarantine_ranges, drop_quarantined
+from validation.normalization import (
+    normalize_by_category,
+    compute_category_stats,
+    category_stats_to_docs,
+    category_moments,
+    moments_to_docs,
+    merge_moment_docs,
+    moments_to_stats,
+)
+from storage.nav_columnar_store import NavColumnarStore
+from storage.nav_shared_memory import SharedNavArrays
+from config.settings import METRICS_ENGINE, METRICS_BACKEND, METRICS_STREAM_MAX_ROWS, NORMALIZE_PERCENTILES, NORMALIZE_ROBUST
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 
 logger = logging.getLogger(__name__)
 
-def _compute_single_fund_metrics(fund_id, category, nav_records, ter_doc):
+# Fields of a fund_metrics doc that are not raw metrics (rebuilt on every run)
+_NON_RAW_FIELDS = ("last_updated", "data_fingerprint", "metrics_version")
+
+# Metrics that get category z-scores (norm_<metric>)
+NORMALIZED_METRICS = [
+    "cagr_3y", "cagr_5y", "volatility", "max_drawdown", "rolling_3y_consistency", "expense_ratio"
+] + risk_adjusted_metric_names() + RELATIVE_METRICS
+
+# Set once per worker process by _init_nav_store_worker (memory-mapped, shared pages)
+_WORKER_NAV_STORE = None
+
+# Set once per worker process by _init_shared_nav_worker (attached shared_memory block)
+_WORKER_SHARED_NAV = None
+
+def shard_of(fund_id: int, n_shards: int) -> int:
+    """
+    Stable hash partition (Knuth multiplicative hash) that spreads consecutive ids
+    """
+    return (fund_id * 2654435761 % 2**32) % n_shards
+
+def _raw_metrics_frame(records: list[dict]) -> pd.DataFrame:
+    """
+    Raw metric records as a frame with every metric column numeric (None -> NaN),
+    so single-node and sharded runs store missing values the same way
+    """
+    metrics_df = pd.DataFrame(records)
+    metric_columns = [c for c in metrics_df.columns if c not in ("fund_id", "scheme_category", "data_fingerprint")]
+    metrics_df[metric_columns] = metrics_df[metric_columns].apply(pd.to_numeric, errors="coerce")
+    return metrics_df
+
+def _compute_metrics_from_frame(fund_id, category, df, ter_doc):
     """
-    Helper function for multiprocessing.
-    Must be standalone (not a class method) to be picklable.
+    Computes all metric groups for a fund from a DatetimeIndex'd DataFrame with a 'nav' column
+    """
+    perf_metrics = compute_performance_metrics(df)
+    risk_metrics = compute_risk_metrics(df)
+    stability_metrics = compute_stability_metrics(df)
+    cost_metrics = compute_cost_metrics(ter_doc)
+
+    # Consolidate
+    return {
+        "fund_id": fund_id,
+        "scheme_category": category,
+        **perf_metrics,
+        **risk_metrics,
+        **stability_metrics,
+        **cost_metrics
+    }
+
+def _compute_fund_metrics_from_arrays(fund_id, category, nav_dates, navs, ter_doc):
+    """
+    Computes a fund's metrics from columnar arrays (int64 epoch-ns dates,
+    float64 NAVs) already sorted by date.
+    Must be standalone (not a class method) to be picklable; errors return None
+    instead of logging to avoid issues with multiprocess logging.
     """
     try:
-        if not nav_records:
+        if len(navs) == 0:
             return None
-            
-        # Prepare DataFrame
-        df = pd.DataFrame(nav_records)
-        df['nav_date'] = pd.to_datetime(df['nav_date'])
-        df.set_index('nav_date', inplace=True)
-        df.sort_index(inplace=True)
-        
-        # Compute Metrics
-        perf_metrics = compute_performance_metrics(df)
-        risk_metrics = compute_risk_metrics(df)
-        stability_metrics = compute_stability_metrics(df)
-        cost_metrics = compute_cost_metrics(ter_doc)
-        
-        # Consolidate
-        return {
-            "fund_id": fund_id,
-            "scheme_category": category,
-            **perf_metrics,
-            **risk_metrics,
-            **stability_metrics,
-            **cost_metrics
-        }
-    except Exception as e:
-        # We don't log here to avoid issues with multiprocess logging, 
-        # return None and handle in main process
+
+        df = pd.DataFrame(
+            {"nav": navs},
+            index=pd.DatetimeIndex(nav_dates.view("datetime64[ns]"), name="nav_date")
+        )
+        return _compute_metrics_from_frame(fund_id, category, df, ter_doc)
+    except Exception:
         return None
 
+def _init_nav_store_worker(store_dir, backend):
+    global _WORKER_NAV_STORE
+    set_backend(backend)
+    _WORKER_NAV_STORE = NavColumnarStore.load(store_dir, mmap=True)
+
+def _compute_fund_metrics_from_store(fund_id, category, ter_doc, quarantine=None):
+    """
+    Worker side of the NAV store path: only (fund_id, category, ter_doc, quarantine)
+    is pickled, the NAV arrays are zero-copy slices of the memory-mapped store.
+    quarantine: the fund's quarantined (start, end) date ranges, if any
+    """
+    nav_slice = _WORKER_NAV_STORE.slice(fund_id)
+    if nav_slice is None:
+        return None
+    if quarantine:
+        nav_slice = drop_quarantined(*nav_slice, quarantine)
+    return _compute_fund_metrics_from_arrays(fund_id, category, *nav_slice, ter_doc)
+
+def _init_shared_nav_worker(shm_name, n_rows, backend):
+    global _WORKER_SHARED_NAV
+    set_backend(backend)
+    _WORKER_SHARED_NAV = SharedNavArrays.attach(shm_name, n_rows)
+
+def _compute_fund_metrics_from_shared(fund_id, category, offset, length, ter_doc):
+    """
+    Worker side of the shared-memory path: NAV arrays are views into the parent's block
+    """
+    return _compute_fund_metrics_from_arrays(fund_id, category, *_WORKER_SHARED_NAV.slice(offset, length), ter_doc)
+
+def _adaptive_chunksize(n_tasks: int, num_workers: int, max_chunk: int = 256) -> int:
+    """
+    About 4 chunks per worker: few enough to keep IPC round trips negligible,
+    enough that one slow chunk doesn't leave the other workers idle
+    """
+    return max(1, min(max_chunk, n_tasks // (num_workers * 4)))
+
 class MetricsPipeline:
-    def __init__(self):
+    def __init__(
+        self,
+        nav_store_dir: str = None,
+        engine: str = METRICS_ENGINE,
+        backend: str = METRICS_BACKEND,
+        incremental: bool = False,
+        stream: bool = False,
+        stream_max_rows: int = METRICS_STREAM_MAX_ROWS
+    ):
+        """
+        nav_store_dir: read NAVs from the memory-mapped columnar store instead of Mongo
+        engine: "pandas" (per-fund functions in a process pool) or
+                "batch" (vectorized cross-fund kernel, single process)
+        backend: kernels used by the per-fund functions ("auto", "numba", "pandas")
+        incremental: only recompute funds whose NAV fingerprint changed since the last run
+        stream: read NAVs from Mongo fund by fund and compute while loading, holding
+                at most stream_max_rows NAV rows in memory (pandas engine, no NAV store;
+                ignored with a warning otherwise, since those paths load every NAV)
+        """
+        if engine not in ("pandas", "batch"):
+            raise ValueError(f"Unknown metrics engine: {engine}")
+        if stream and (engine == "batch" or nav_store_dir):
+            logger.warning(
+                "Streaming ignored: the %s loads all NAVs in memory",
+                "batch engine" if engine == "batch" else "NAV store"
+            )
+            stream = False
+
         db = MongoDBClient().get_db()
         self.nav_repo = NavRepo(db)
         self.ter_repo = TerRepo(db)
         self.metrics_repo = MetricsRepo(db)
+        self.category_stats_repo = CategoryStatsRepo(db)
+        self.shard_repo = MetricsShardRepo(db)
+        self.history_repo = MetricsHistoryRepo(db)
+        self.nav_quality_repo = NavQualityRepo(db)
         self.db = db
+        self.nav_store_dir = nav_store_dir
+        self.engine = engine
+        self.backend = backend
+        self.incremental = incremental
+        self.stream = stream
+        self.stream_max_rows = stream_max_rows
+        set_backend(backend)
 
-    def run(self, fund_ids: list[int] = None):
+    def run(self, fund_ids: list[int] = None, shard: tuple[int, int] = None, run_id: str = None):
         """
         Runs the metric computation with massive speed optimizations:
         1. Bulk Data Fetching (reduces DB roundtrips)
         2. Multiprocessing (uses all CPU cores)
+        shard: (index, count) computes raw metrics for this node's hash partition
+        only and leaves normalization to merge_shards(run_id, count).
+        """
+        all_metrics_data = self._compute_raw_metrics(fund_ids, shard)
+        if not all_metrics_data:
+            logger.warning("No metrics were successfully computed.")
+            return
+
+        metrics_df = _raw_metrics_frame(all_metrics_data)
+        available_metrics = [m for m in NORMALIZED_METRICS if m in metrics_df.columns]
+
+        if shard:
+            # Raw metrics plus this shard's exact per-category sums; the merge does the rest
+            self.shard_repo.save_shard(
+                run_id, shard[0], shard[1],
+                metrics_df.to_dict(orient="records"),
+                moments_to_docs(category_moments(metrics_df, available_metrics))
+            )
+            return
+
+        # 4. NORMALIZE (Collective)
+        logger.info("Normalizing metrics across all funds...")
+        category_stats = compute_category_stats(metrics_df, available_metrics)
+        normalized_df = normalize_by_category(
+            metrics_df,
+            available_metrics,
+            percentiles=NORMALIZE_PERCENTILES,
+            robust=NORMALIZE_ROBUST,
+            stats=category_stats
+        )
+        self.category_stats_repo.save_stats(category_stats_to_docs(category_stats))
+
+        # 5. PUBLISH: a full run swaps in a new version, a subset run updates its funds in place
+        logger.info("Saving %s records to database...", len(normalized_df))
+        final_records = normalized_df.to_dict(orient="records")
+        if fund_ids:
+            self.metrics_repo.bulk_upsert_metrics(final_records)
+        else:
+            self.metrics_repo.publish_metrics(final_records)
+
+        logger.info("Optimization complete! Metric computation finished.")
+
+    def merge_shards(self, run_id: str, n_shards: int):
+        """
+        Final step of a sharded run: combines every shard's category sums into
+        z-score stats, applies them server-side to the staged raw metrics and
+        publishes. Output is identical to a single-node run over the same funds.
+        """
+        completed = [
+            doc for doc in self.shard_repo.get_completed_shards(run_id)
+            if doc["n_shards"] == n_shards
+        ]
+        missing = sorted(set(range(n_shards)) - {doc["shard"] for doc in completed})
+        if missing:
+            raise ValueError(f"Metrics run {run_id} is missing shards {missing} of {n_shards}")
+
+        if NORMALIZE_PERCENTILES or NORMALIZE_ROBUST:
+            logger.warning("Percentile ranks and robust z-scores need the whole universe; sharded runs publish z-scores only.")
+
+        self.shard_repo.stage_records(run_id, MetricsRepo.STAGING)
+        moments = merge_moment_docs(self.shard_repo.get_moment_docs(run_id))
+        moments.update(self._stage_relative_metrics())
+
+        present = {metric for _, metric in moments}
+        available_metrics = [m for m in NORMALIZED_METRICS if m in present]
+        category_stats = moments_to_stats(moments, available_metrics)
+
+        logger.info("Merging %s shards | categories=%s", n_shards, len(category_stats))
+        self.metrics_repo.apply_zscores_to_staging(
+            {
+                category: {
+                    metric: (float(category_stats.loc[category, ("mean", metric)]), float(category_stats.loc[category, ("std", metric)]))
+                    for metric in available_metrics
+                }
+                for category in category_stats.index
+            },
+            available_metrics
+        )
+        self.category_stats_repo.save_stats(category_stats_to_docs(category_stats))
+
+        self.metrics_repo.publish_staging(sum(doc["fund_count"] for doc in completed))
+        self.shard_repo.clear_run(run_id)
+
+    def _stage_relative_metrics(self) -> dict:
+        """
+        Category-relative metrics need whole categories, so a sharded run computes
+        them here over every staged fund. Writes them into staging and returns
+        their category moments.
+        """
+        category_map = self.metrics_repo.get_staged_categories()
+        fund_ids = sorted(category_map)
+        nav_arrays, _ = self._validate_nav_arrays(self._load_nav_arrays(fund_ids), fund_ids, save=False)
+        relative = compute_relative_metrics(nav_arrays, category_map, fund_ids)
+        if not relative:
+            return {}
+
+        logger.info("Computing category-relative metrics for %s staged funds...", len(relative))
+        relative_df = _raw_metrics_frame([
+            {"fund_id": f_id, "scheme_category": category_map[f_id], **metrics}
+            for f_id, metrics in relative.items()
+        ])
+        self.metrics_repo.set_staged_fields(relative_df.drop(columns="scheme_category").to_dict(orient="records"))
+        return category_moments(relative_df, RELATIVE_METRICS)
+
+    def run_backfill(self, start, end=None, max_staleness_days: int = 10):
+        """
+        Point-in-time metrics for every month-end between start and end, stored in
+        fund_metrics_history. NAV arrays are loaded once; each date works on
+        zero-copy prefix views (NavColumnarStore.as_of) with the batch engine.
+        Funds are today's eligible set; a fund enters a date once it has a NAV
+        within max_staleness_days of it.
+        """
+        funds_list = list(self.db.fund_master.find(
+            {"is_active": True, "eligible_for_reco": True},
+            {"fund_id": 1, "scheme_category": 1}
+        ))
+        all_fund_ids = [f["fund_id"] for f in funds_list]
+        category_map = {f["fund_id"]: f.get("scheme_category", "Unknown") for f in funds_list}
+
+        nav_arrays, _ = self._validate_nav_arrays(self._load_nav_arrays(all_fund_ids), all_fund_ids, save=False)
+        ter_history = self._fetch_ter_history(all_fund_ids)
+        start = start or pd.Timestamp.today() - pd.DateOffset(years=5)
+        as_of_dates = pd.date_range(start, end or pd.Timestamp.today(), freq=pd.offsets.MonthEnd())
+        logger.info("Backfilling metrics | dates=%s | funds=%s", len(as_of_dates), len(all_fund_ids))
+
+        ter_map, ter_pos = {}, 0
+        for as_of in as_of_dates:
+            # TER docs are sorted by month, so the as-of TER map only ever moves forward
+            month = as_of.strftime("%Y-%m")
+            while ter_pos < len(ter_history) and ter_history[ter_pos]["as_of_month"] <= month:
+                ter_map[ter_history[ter_pos]["fund_id"]] = ter_history[ter_pos]
+                ter_pos += 1
+
+            view = nav_arrays.as_of(as_of)
+            fund_ids, last_dates, _ = view.last_observations()
+            fresh = last_dates >= (as_of - pd.Timedelta(days=max_staleness_days)).value
+            fund_ids = [int(f_id) for f_id in fund_ids[fresh] if int(f_id) in category_map]
+            if not fund_ids:
+                continue
+
+            batch_metrics = compute_batch_metrics(view, fund_ids)
+            relative = compute_relative_metrics(view, category_map, fund_ids)
+            metrics_df = _raw_metrics_frame([
+                {
+                    "fund_id": f_id,
+                    "scheme_category": category_map[f_id],
+                    **batch_metrics[f_id],
+                    **relative[f_id],
+                    **compute_cost_metrics(ter_map.get(f_id))
+                }
+                for f_id in fund_ids
+            ])
+            available_metrics = [m for m in NORMALIZED_METRICS if m in metrics_df.columns]
+            normalized_df = normalize_by_category(metrics_df, available_metrics)
+            self.history_repo.save_snapshot(as_of.to_pydatetime(), normalized_df, available_metrics)
+
+    def evaluate_weights(self, weight_vectors: list, horizon_months: int = 12, top_k: int = 5) -> pd.DataFrame:
+        """
+        Backtests score weight vectors against forward returns over all stored snapshots
+        """
+        snapshots = self.history_repo.get_snapshots()
+        if not snapshots:
+            logger.warning("No metric snapshots found; run the backfill first.")
+            return pd.DataFrame()
+
+        fund_ids = sorted({f_id for snapshot in snapshots for f_id in snapshot["fund_ids"]})
+        nav_arrays, _ = self._validate_nav_arrays(self._load_nav_arrays(fund_ids), fund_ids, save=False)
+        results = evaluate_weight_vectors(snapshots, nav_arrays, weight_vectors, horizon_months, top_k)
+        for row in results.itertuples():
+            logger.info(
+                "Weights %s | mean_ic=%.4f | ic_ir=%.3f | top_%s_return=%.4f | excess=%.4f | dates=%s",
+                row.weights, row.mean_ic, row.ic_ir, top_k, row.top_k_return, row.top_k_excess, row.n_dates
+            )
+        return results
+
+    def _fetch_ter_history(self, all_fund_ids: list[int]) -> list[dict]:
+        return list(self.db.ter_snapshot.find(
+            {"fund_id": {"$in": all_fund_ids}},
+            {"_id": 0, "fund_id": 1, "as_of_month": 1, "ter": 1}
+        ).sort("as_of_month", 1))
+
+    def _compute_raw_metrics(self, fund_ids: list[int] = None, shard: tuple[int, int] = None) -> list[dict]:
+        """
+        Steps 1-3: eligible funds, TER, fingerprints and the raw (unnormalized) metrics
         """
         # 1. Fetch eligible funds
         query = {"is_active": True, "eligible_for_reco": True}
@@ -70,28 +382,72 @@ class MetricsPipeline:
             
         logger.info("Fetching eligible funds and historical data...")
         funds_list = list(self.db.fund_master.find(query, {"fund_id": 1, "scheme_category": 1}))
+        if shard:
+            funds_list = [f for f in funds_list if shard_of(f["fund_id"], shard[1]) == shard[0]]
+            logger.info("Metrics shard %s/%s | funds=%s", shard[0], shard[1], len(funds_list))
         
         if not funds_list:
             logger.info("No eligible funds found.")
-            return
+            return []
 
         all_fund_ids = [f["fund_id"] for f in funds_list]
         category_map = {f["fund_id"]: f.get("scheme_category", "Unknown") for f in funds_list}
 
-        # 2. BULK FETCH NAV (The biggest optimization)
-        logger.info("Bulk fetching NAV data for %s funds...", len(all_fund_ids))
-        nav_cursor = self.db.nav_timeseries.find(
-            {"fund_id": {"$in": all_fund_ids}},
-            {"fund_id": 1, "nav_date": 1, "nav": 1}
-        ).sort([("fund_id", 1), ("nav_date", 1)])
-        
-        # Group NAV records by fund_id for processing
-        from collections import defaultdict
-        nav_data_map = defaultdict(list)
-        for record in nav_cursor:
-            nav_data_map[record["fund_id"]].append(record)
+        # 2. BULK FETCH TER and data fingerprints
+        ter_map = self._fetch_ter_map(all_fund_ids)
+        fingerprints = self._fetch_fingerprints(all_fund_ids, ter_map)
+
+        compute_ids, cached_metrics = all_fund_ids, []
+        if self.incremental:
+            compute_ids, cached_metrics = self._split_by_fingerprint(all_fund_ids, category_map, ter_map, fingerprints)
 
-        # 3. BULK FETCH TER
+        import os
+        num_workers = min(os.cpu_count(), 8) # Avoid overwhelming system
+
+        # 3. COMPUTE
+        # NAV validation runs on the same load the batch and shared-memory paths use;
+        # quarantined rows are dropped before any metric sees them.
+        # Category-relative metrics: a category's average moves whenever any member's
+        # NAVs do, so categories with a changed fund are recomputed whole and the rest
+        # keep their cached values. Sharded runs get them in merge_shards.
+        # self.stream is only set when the streaming path runs (see __init__).
+        nav_arrays, nav_reports, relative = None, {}, {}
+        if self.stream:
+            logger.warning("NAV validation and category-relative metrics need all NAVs in memory; skipped in streaming mode.")
+            # Streamed funds get no relative metrics; cached ones drop theirs too, so a
+            # category isn't normalized over a mix of missing and stale values
+            for record in cached_metrics:
+                for metric in RELATIVE_METRICS:
+                    record.pop(metric, None)
+        else:
+            load_ids = self._nav_load_ids(all_fund_ids, compute_ids, cached_metrics, category_map, shard)
+            if load_ids:
+                nav_arrays = self._load_nav_arrays(load_ids)
+                if self.nav_store_dir and len(load_ids) < len(all_fund_ids):
+                    nav_arrays = nav_arrays.subset(load_ids)
+                nav_arrays, nav_reports = self._validate_nav_arrays(nav_arrays, load_ids)
+                if not shard:
+                    logger.info("Computing category-relative metrics for %s funds...", len(load_ids))
+                    relative = compute_relative_metrics(nav_arrays, category_map, load_ids)
+
+        if not compute_ids:
+            results = []
+        elif self.engine == "batch":
+            results = self._compute_batch(compute_ids, category_map, ter_map, nav_arrays)
+        elif self.nav_store_dir:
+            results = self._compute_from_store(compute_ids, category_map, ter_map, num_workers, nav_reports)
+        elif self.stream:
+            results = self._compute_streaming(compute_ids, category_map, ter_map, num_workers)
+        else:
+            results = self._compute_from_mongo(compute_ids, category_map, ter_map, num_workers, nav_arrays)
+
+        all_metrics_data = [r for r in results if r is not None] + cached_metrics
+        for record in all_metrics_data:
+            record["data_fingerprint"] = fingerprints[record["fund_id"]]
+            record.update(relative.get(record["fund_id"], {}))
+        return all_metrics_data
+
+    def _fetch_ter_map(self, all_fund_ids: list[int]) -> dict:
         logger.info("Bulk fetching TER data...")
         # Get latest TER for all these funds using aggregation (faster than 1000 queries)
         ter_pipeline = [
@@ -100,51 +456,235 @@ class MetricsPipeline:
             {"$group": {"_id": "$fund_id", "doc": {"$first": "$$ROOT"}}}
         ]
         ter_results = list(self.db.ter_snapshot.aggregate(ter_pipeline))
-        ter_map = {item["_id"]: item["doc"] for item in ter_results}
+        return {item["_id"]: item["doc"] for item in ter_results}
 
-        # 4. PARALLEL COMPUTATION
-        logger.info("Computing metrics in parallel...")
-        all_metrics_data = []
-        
-        # Prepare arguments for multiprocessing
-        tasks = [
-            (f_id, category_map[f_id], nav_data_map[f_id], ter_map.get(f_id))
+    def _fetch_fingerprints(self, all_fund_ids: list[int], ter_map: dict) -> dict:
+        """
+        {fund_id: {last_nav_date, nav_count, ter_as_of_month}} describing the inputs
+        of this run, read from the same NAV source the metrics are computed from.
+        """
+        if self.nav_store_dir:
+            nav_fingerprints = self._load_nav_arrays(all_fund_ids).fingerprints()
+        else:
+            nav_fingerprints = self.nav_repo.get_nav_fingerprints(all_fund_ids)
+
+        empty = {"last_nav_date": None, "nav_count": 0}
+        return {
+            f_id: {
+                **nav_fingerprints.get(f_id, empty),
+                "ter_as_of_month": (ter_map.get(f_id) or {}).get("as_of_month")
+            }
             for f_id in all_fund_ids
+        }
+
+    @staticmethod
+    def _nav_load_ids(all_fund_ids, compute_ids, cached_metrics, category_map, shard) -> list[int]:
+        """
+        Funds whose NAVs this run reads: the changed funds and, for the category-relative
+        metrics, every member of a category that has a changed fund or a cached record
+        without them. Nothing when no fund changed.
+        """
+        if shard or len(compute_ids) == len(all_fund_ids):
+            return compute_ids
+
+        categories = {category_map[f_id] for f_id in compute_ids}
+        categories |= {
+            record["scheme_category"] for record in cached_metrics
+            if any(metric not in record for metric in RELATIVE_METRICS)
+        }
+        return [f_id for f_id in all_fund_ids if category_map[f_id] in categories]
+
+    def _split_by_fingerprint(self, all_fund_ids, category_map, ter_map, fingerprints) -> tuple[list, list]:
+        """
+        Returns (fund_ids to recompute, raw metric records reused from fund_metrics).
+        A fund is recomputed when its NAV fingerprint changed, it has no cached doc,
+        the doc predates a metric every engine now produces (BATCH_METRICS), or the
+        fund moved category (its new category's relative metrics need a reload).
+        Reused records only get their category and cost metrics refreshed, which
+        needs no NAV data, so a new TER month doesn't force a NAV reload.
+        """
+        cached_docs = self.metrics_repo.get_cached_metrics(all_fund_ids)
+        compute_ids, cached_metrics = [], []
+
+        for f_id in all_fund_ids:
+            doc = cached_docs.get(f_id)
+            previous = (doc or {}).get("data_fingerprint") or {}
+            current = fingerprints[f_id]
+
+            if (
+                doc is None
+                or any(previous.get(k) != current[k] for k in ("last_nav_date", "nav_count"))
+                or any(metric not in doc for metric in BATCH_METRICS)
+                or doc.get("scheme_category") != category_map[f_id]
+            ):
+                compute_ids.append(f_id)
+                continue
+
+            record = {
+                k: v for k, v in doc.items()
+                if not k.startswith(("norm_", "pct_", "robust_")) and k not in _NON_RAW_FIELDS
+            }
+            record["scheme_category"] = category_map[f_id]
+            record.update(compute_cost_metrics(ter_map.get(f_id)))
+            cached_metrics.append(record)
+
+        logger.info(
+            "Incremental metrics | changed=%s | reused=%s",
+            len(compute_ids), len(cached_metrics)
+        )
+        return compute_ids, cached_metrics
+
+    def _validate_nav_arrays(self, nav_arrays: NavColumnarStore, all_fund_ids: list[int], save: bool = True):
+        """
+        NAV anomaly checks on loaded arrays. Returns (arrays without the quarantined
+        rows, {fund_id: quality report} for this run's flagged funds); with save,
+        the reports replace these funds' entries in nav_quality.
+        """
+        keep, reports = validate_nav(nav_arrays)
+        fund_set = set(all_fund_ids)
+        reports = {f_id: report for f_id, report in reports.items() if f_id in fund_set}
+        logger.info(
+            "NAV validation | flagged=%s | quarantined_rows=%s",
+            len(reports), sum(q["rows"] for report in reports.values() for q in report["quarantine"])
+        )
+        if save:
+            self.nav_quality_repo.save_reports(all_fund_ids, reports)
+        return (nav_arrays if keep.all() else nav_arrays.filtered(keep)), reports
+
+    def _load_nav_arrays(self, all_fund_ids: list[int]) -> NavColumnarStore:
+        """
+        Columnar NAV arrays for the main process: the mapped store if enabled, else one Mongo read
+        """
+        if self.nav_store_dir:
+            store = NavColumnarStore.load(self.nav_store_dir)
+            if store is None:
+                logger.info("NAV store not found, building it...")
+                store = NavColumnarStore.refresh(self.nav_store_dir, self.db.nav_timeseries)
+            return store
+
+        logger.info("Bulk fetching NAV data for %s funds...", len(all_fund_ids))
+        nav_cursor = self.db.nav_timeseries.find(
+            {"fund_id": {"$in": all_fund_ids}},
+            {"fund_id": 1, "nav_date": 1, "nav": 1, "_id": 0}
+        ).sort([("fund_id", 1), ("nav_date", 1)])
+        return NavColumnarStore.from_cursor(nav_cursor)
+
+    def _compute_batch(self, all_fund_ids, category_map, ter_map, nav_arrays=None) -> list:
+        # 3a. One columnar load, then 3b. one vectorized pass over all funds
+        if nav_arrays is None:
+            nav_arrays = self._load_nav_arrays(all_fund_ids)
+
+        logger.info("Computing metrics with the vectorized batch engine...")
+        batch_metrics = compute_batch_metrics(nav_arrays, all_fund_ids)
+
+        return [
+            {
+                "fund_id": f_id,
+                "scheme_category": category_map[f_id],
+                **batch_metrics[f_id],
+                **compute_cost_metrics(ter_map.get(f_id))
+            }
+            for f_id in all_fund_ids if f_id in batch_metrics
         ]
 
-        import os
-        num_workers = min(os.cpu_count(), 8) # Avoid overwhelming system
-        
-        with ProcessPoolExecutor(max_workers=num_workers) as executor:
-            # map maintains order and returns results as they finish
-            results = list(executor.map(
-                functools.partial(unwrapper_compute), # helper to unpack tuple
-                tasks
-            ))
-            
-        all_metrics_data = [r for r in results if r is not None]
+    def _compute_from_mongo(self, all_fund_ids, category_map, ter_map, num_workers, nav_arrays=None) -> list:
+        # 3a. BULK FETCH NAV into columnar arrays, then one shared_memory block
+        if nav_arrays is None:
+            nav_arrays = self._load_nav_arrays(all_fund_ids)
+        compute_set = set(all_fund_ids)
+        shared = SharedNavArrays.create(nav_arrays.nav_dates, nav_arrays.navs)
 
-        if not all_metrics_data:
-            logger.warning("No metrics were successfully computed.")
-            return
+        # 3b. PARALLEL COMPUTATION
+        logger.info("Computing metrics in parallel from shared memory...")
+        # Only (fund_id, category, offset, length, ter_doc) crosses the process boundary.
+        # Longest series first so the tail of the schedule is made of short tasks.
+        tasks = [
+            (int(f_id), category_map[int(f_id)], int(offset), int(length), ter_map.get(int(f_id)))
+            for f_id, offset, length in np.sort(nav_arrays.index, order="length")[::-1]
+            if int(f_id) in compute_set
+        ]
+        del nav_arrays
 
-        # 5. NORMALIZE (Collective)
-        logger.info("Normalizing metrics across all funds...")
-        metrics_df = pd.DataFrame(all_metrics_data)
-        available_metrics = [
-            m for m in ["cagr_3y", "cagr_5y", "volatility", "max_drawdown", "rolling_3y_consistency", "expense_ratio"] 
-            if m in metrics_df.columns
+        try:
+            with ProcessPoolExecutor(
+                max_workers=num_workers,
+                initializer=_init_shared_nav_worker,
+                initargs=(shared.name, shared.n_rows, self.backend)
+            ) as executor:
+                return list(executor.map(
+                    unwrapper_compute_from_shared,
+                    tasks,
+                    chunksize=_adaptive_chunksize(len(tasks), num_workers)
+                ))
+        finally:
+            shared.close()
+
+    def _compute_from_store(self, all_fund_ids, category_map, ter_map, num_workers, nav_reports=None) -> list:
+        # 3a. Workers map the columnar store themselves; nothing NAV-sized is pickled,
+        # quarantined rows travel as date ranges for the few funds that have them
+        self._load_nav_arrays(all_fund_ids) # builds the store on first use
+        nav_reports = nav_reports or {}
+
+        # 3b. PARALLEL COMPUTATION
+        logger.info("Computing metrics in parallel from NAV store...")
+        tasks = [
+            (f_id, category_map[f_id], ter_map.get(f_id), quarantine_ranges(nav_reports[f_id]) if f_id in nav_reports else None)
+            for f_id in all_fund_ids
         ]
-        
-        normalized_df = normalize_by_category(metrics_df, available_metrics)
-        
-        # 6. BULK UPDATE
-        logger.info("Saving %s records to database...", len(normalized_df))
-        final_records = normalized_df.to_dict(orient="records")
-        self.metrics_repo.bulk_upsert_metrics(final_records)
+        chunksize = _adaptive_chunksize(len(tasks), num_workers)
 
-        logger.info("Optimization complete! Metric computation finished.")
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=_init_nav_store_worker,
+            initargs=(self.nav_store_dir, self.backend)
+        ) as executor:
+            return list(executor.map(unwrapper_compute_from_store, tasks, chunksize=chunksize))
+
+    def _compute_streaming(self, all_fund_ids, category_map, ter_map, num_workers) -> list:
+        # 3a + 3b overlap: each fund is submitted as soon as its last row is read.
+        # Rows held = the fund being read + funds queued or running, capped at stream_max_rows.
+        logger.info("Streaming NAV data and computing metrics for %s funds...", len(all_fund_ids))
+        results = []
+        in_flight = {}
+        rows_in_flight = 0
+        funds_read = 0
+
+        def collect(done):
+            nonlocal rows_in_flight
+            for future in done:
+                rows_in_flight -= in_flight.pop(future)
+                results.append(future.result())
+
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            initializer=set_backend,
+            initargs=(self.backend,)
+        ) as executor:
+            for f_id, nav_dates, navs in self.nav_repo.iter_fund_arrays(all_fund_ids):
+                # Backpressure: stop reading until enough queued work has finished
+                while in_flight and rows_in_flight + len(navs) > self.stream_max_rows:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+                future = executor.submit(
+                    _compute_fund_metrics_from_arrays,
+                    f_id, category_map[f_id], nav_dates, navs, ter_map.get(f_id)
+                )
+                in_flight[future] = len(navs)
+                rows_in_flight += len(navs)
+                funds_read += 1
 
-def unwrapper_compute(args):
+                if funds_read % 1000 == 0:
+                    logger.info("Streaming metrics | funds_read=%s | computed=%s", funds_read, len(results))
+
+            collect(wait(in_flight).done)
+
+        return results
+
+def unwrapper_compute_from_shared(args):
     """Bridge for ProcessPoolExecutor.map with multiple arguments"""
-    return _compute_single_fund_metrics(*args)
+    return _compute_fund_metrics_from_shared(*args)
+
+def unwrapper_compute_from_store(args):
+    """Bridge for ProcessPoolExecutor.map on the NAV store path"""
+    return _compute_fund_metrics_from_store(*args)
@@ -1,15 +1,78 @@
 import logging
 from storage.mongo_client import MongoDBClient
 from ingestion.nav_ingestion import NavIngestion
+from ingestion.nav_fetcher import ConcurrentNavFetcher
+from ingestion.nav_snapshot_ingestion import NavSnapshotIngestor
 from storage.nav_repo import NavRepo
+from storage.nav_sync_state_repo import NavSyncStateRepo
+from storage.nav_columnar_store import NavColumnarStore
+from config.settings import NAV_API_BASE_URL, NAV_FETCH_RATE_PER_SEC, NAV_FETCH_BURST, NAV_ALL_URL, NAV_SYNC_CHECKPOINT_EVERY
+from utils.rate_limiter import TokenBucket
 
 logger = logging.getLogger(__name__)
 
 class NavPipeline:
-    def __init__(self):
+    def __init__(
+        self,
+        max_workers: int = 1,
+        rate_per_sec: float = NAV_FETCH_RATE_PER_SEC,
+        base_url: str = NAV_API_BASE_URL,
+        nav_store_dir: str = None
+    ):
+        """
+        max_workers=1 keeps the original sequential mftool path.
+        max_workers>1 switches to the concurrent fetcher with a shared rate limit.
+        Both paths are capped at rate_per_sec.
+        nav_store_dir: columnar NAV store to refresh incrementally after each sync.
+        """
         db = MongoDBClient().get_db()
         self.nav_repo = NavRepo(db)
-        self.nav_ingestion = NavIngestion()
+        self.sync_state_repo = NavSyncStateRepo(db)
+        self.nav_fetcher = None
+        self.nav_ingestion = None
+        self.nav_store_dir = nav_store_dir
+
+        rate_limiter = TokenBucket(rate_per_sec, NAV_FETCH_BURST)
+        if max_workers > 1:
+            self.nav_fetcher = ConcurrentNavFetcher(
+                max_workers=max_workers,
+                base_url=base_url,
+                rate_limiter=rate_limiter
+            )
+        else:
+            self.nav_ingestion = NavIngestion(rate_limiter=rate_limiter)
+
+    def _fetch_latest(self, fund_ids: list[int]):
+        """Yields (fund_id, (nav_date, nav_value) or None)"""
+        if self.nav_fetcher:
+            return self.nav_fetcher.fetch_latest_many(fund_ids)
+        return ((f_id, self.nav_ingestion.fetch_latest_nav(f_id)) for f_id in fund_ids)
+
+    def _fetch_history(self, fund_ids: list[int], watermarks: dict = None):
+        """Yields (fund_id, [nav records after the fund's watermark], or None if the fetch failed)"""
+        watermarks = watermarks or {}
+        if self.nav_fetcher:
+            return self.nav_fetcher.fetch_history_many(fund_ids, watermarks=watermarks)
+        return (
+            (f_id, self.nav_ingestion.fetch_history(f_id, since=watermarks.get(f_id)))
+            for f_id in fund_ids
+        )
+
+    def _collect_latest(self, fund_ids: list[int]) -> list[dict]:
+        """Fetches run concurrently (if enabled); rows are gathered on this thread"""
+        rows = []
+        for fund_id, result in self._fetch_latest(fund_ids):
+            if not result:
+                continue
+
+            nav_date, nav_value = result
+            if nav_date and nav_value:
+                rows.append({"fund_id": fund_id, "nav_date": nav_date, "nav": nav_value})
+        return rows
+
+    def _refresh_nav_store(self):
+        if self.nav_store_dir:
+            NavColumnarStore.refresh(self.nav_store_dir, self.nav_repo.collection)
 
     def run(self, fund_ids: list[int] = None):
         if fund_ids is None:
@@ -22,24 +85,77 @@ class NavPipeline:
 
         logger.info("NAV ingestion started | fund_count=%s", len(fund_ids))
 
-        inserted = 0
+        # Collect the whole day's rows, then write them in one set-based pass
+        rows = self._collect_latest(fund_ids)
+        inserted, failed = self.nav_repo.upsert_nav_batch(rows)
+        if failed:
+            logger.warning("NAV write failed | fund_count=%s | fund_ids=%s", len(failed), sorted(failed)[:50])
 
-        for fund_id in fund_ids:
-            result = self.nav_ingestion.fetch_latest_nav(fund_id)
-            if not result:
-                continue
+        # Clean up data older than 6 years
+        self.nav_repo.delete_old_nav(lookback_years=6)
 
-            nav_date, nav_value = result
-            if nav_date and nav_value:
-                if self.nav_repo.insert_nav(fund_id, nav_date, nav_value):
-                    inserted += 1
+        self._refresh_nav_store()
+
+        logger.info("NAV ingestion completed | inserted=%s", inserted)
+
+    def run_snapshot(self, source: str = NAV_ALL_URL, fund_ids: list[int] = None, fallback: bool = True):
+        """
+        Daily sync from a single all-schemes NAV file instead of 16k history downloads.
+        Funds missing from the file fall back to the per-fund fetch path.
+        """
+        if fund_ids is None:
+            logger.info("No fund_ids provided, fetching active fund_ids from master...")
+            fund_ids = [
+                f["fund_id"] for f in self.nav_repo.collection.database.fund_master.find(
+                    {"is_active": True}, {"fund_id": 1}
+                )
+            ]
+
+        logger.info("NAV snapshot ingestion started | fund_count=%s | source=%s", len(fund_ids), source)
+
+        records = NavSnapshotIngestor(source).parse(set(fund_ids))
+
+        found = {rec["fund_id"] for rec in records}
+        missing = [f_id for f_id in fund_ids if f_id not in found]
+        logger.info("NAV snapshot parsed | matched=%s | missing=%s", len(found), len(missing))
+
+        if fallback and missing:
+            logger.info("Falling back to per-fund NAV fetch | fund_count=%s", len(missing))
+            records.extend(self._collect_latest(missing))
+
+        inserted, failed = self.nav_repo.upsert_nav_batch(records)
+        if failed:
+            logger.warning("NAV write failed | fund_count=%s | fund_ids=%s", len(failed), sorted(failed)[:50])
 
         # Clean up data older than 6 years
         self.nav_repo.delete_old_nav(lookback_years=6)
 
-        logger.info("NAV ingestion completed | inserted=%s", inserted)
+        self._refresh_nav_store()
+
+        logger.info("NAV snapshot ingestion completed | inserted=%s", inserted)
 
-    def run_history(self, fund_ids: list[int] = None):
+    def _flush_history(self, records: list[dict], checkpoints: dict, failed: list) -> int:
+        # Rows first, then checkpoints: a crash in between only costs a refetch.
+        # upsert_nav_batch skips rows already stored (daily syncs, a crashed batch).
+        # Funds whose write failed aren't checkpointed and go to `failed`.
+        inserted, failed_writes = self.nav_repo.upsert_nav_batch(records)
+        self.sync_state_repo.save_checkpoints(
+            {f_id: last for f_id, last in checkpoints.items() if f_id not in failed_writes}
+        )
+        failed.extend(sorted(failed_writes))
+        records.clear()
+        checkpoints.clear()
+        return inserted
+
+    def run_history(self, fund_ids: list[int] = None, resume: bool = True, checkpoint_every: int = NAV_SYNC_CHECKPOINT_EVERY):
+        """
+        Incremental history sync driven by per-fund watermarks.
+        Only rows newer than the last nav_date a history sync stored for the fund are
+        requested (rows the daily sync already wrote are skipped on insert), and funds
+        are checkpointed in batches so an interrupted run can resume.
+        Failed fetches and writes aren't checkpointed and leave the run open, so the
+        next resumed run retries just those funds.
+        """
         if fund_ids is None:
             logger.info("Fetching active fund_ids for historical sync...")
             fund_ids = [
@@ -48,15 +164,51 @@ class NavPipeline:
                 )
             ]
 
-        logger.info("Historical NAV ingestion started | fund_count=%s", len(fund_ids))
-        for fund_id in fund_ids:
-            records = self.nav_ingestion.fetch_history(fund_id)
-            if records:
-                self.nav_repo.bulk_insert_nav(records)
-            
+        started_at, resumed = self.sync_state_repo.start_run(resume=resume)
+        if resumed:
+            done = self.sync_state_repo.get_synced_fund_ids(started_at)
+            fund_ids = [f_id for f_id in fund_ids if f_id not in done]
+            logger.info("Skipping already checkpointed funds | skipped=%s", len(done))
+
+        # From the history checkpoints, not the stored rows: a daily row must not
+        # hide a fund's missing history
+        watermarks = self.sync_state_repo.get_watermarks(fund_ids)
+
+        logger.info(
+            "Historical NAV ingestion started | fund_count=%s | with_watermark=%s",
+            len(fund_ids), len(watermarks)
+        )
+
+        pending_records = []
+        checkpoints = {}
+        total_inserted = 0
+        failed = []
+
+        for fund_id, records in self._fetch_history(fund_ids, watermarks):
+            if records is None:
+                failed.append(fund_id)
+                continue
+
+            pending_records.extend(records)
+            checkpoints[fund_id] = max(rec["nav_date"] for rec in records) if records else None
+
             logger.info("Historical NAV sync complete | fund_id=%s | records=%s", fund_id, len(records))
 
+            if len(checkpoints) >= checkpoint_every:
+                total_inserted += self._flush_history(pending_records, checkpoints, failed)
+
+        total_inserted += self._flush_history(pending_records, checkpoints, failed)
+        if failed:
+            logger.warning(
+                "History fetch or write failed; run left open for a resume | failed=%s | fund_ids=%s",
+                len(failed), failed[:50]
+            )
+        else:
+            self.sync_state_repo.complete_run()
+
         # Clean up data older than 6 years
         self.nav_repo.delete_old_nav(lookback_years=6)
 
-        logger.info("Historical NAV ingestion completed")
+        self._refresh_nav_store()
+
+        logger.info("Historical NAV ingestion completed | inserted=%s", total_inserted)
@@ -1,26 +1,42 @@
+import glob
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from storage.mongo_client import MongoDBClient
 from storage.ter_repo import TerRepo
+from storage.fund_crossref_repo import FundCrossrefRepo
+from utils.fuzzy_matcher import FuzzyNameMatcher
 from ingestion.ter_ingestion import TerIngestor
-from utils.string_utils import normalize_name
+from config.settings import TER_LOAD_WORKERS
 
 logger = logging.getLogger(__name__)
 
+def _load_sheet(file_path: str) -> tuple:
+    """
+    Process-pool worker: (ingestor with its month resolved, loaded sheet)
+    """
+    ingestor = TerIngestor(file_path)
+    return ingestor, ingestor.load()
+
 class TerPipeline:
-    def __init__(self, ter_file: str, as_of_month: str):
+    def __init__(self, ter_file: str, as_of_month: str | None = None):
         db = MongoDBClient().get_db()
         self.repo = TerRepo(db)
+        self.crossref_repo = FundCrossrefRepo(db)
         self.ingestor = TerIngestor(ter_file, as_of_month)
         self.db = db
+        self._fuzzy_index = None
 
-    def build_fund_map(self) -> dict:
+    def build_fund_map(self, base_names: list[str] | None = None) -> dict:
         """
         Groups funds by their stored base name for matching with TER data.
+        With base_names, only those names are looked up (indexed $in).
         """
         fund_map = {}
+        query = {} if base_names is None else {"base_name": {"$in": base_names}}
 
         for fund in self.db.fund_master.find(
-            {}, {"fund_id": 1, "base_name": 1, "plan_type": 1}
+            query, {"fund_id": 1, "base_name": 1, "plan_type": 1}
         ):
             key = fund.get("base_name")
             if not key:
@@ -36,21 +52,125 @@ class TerPipeline:
 
         return fund_map
 
+    def add_fuzzy_matches(self, names: list[str], fund_map: dict, claimed_fund_ids: set) -> tuple[dict, list]:
+        """
+        Fuzzy-matches names against the base names of funds no other TER row has
+        claimed, and adds the matched funds to fund_map under the query name with
+        their match_confidence. Each base name goes to its closest query only, so
+        two schemes never share a fund.
+        Returns ({name: confidence}, [{query, best_score}] for the unmatched names).
+        """
+        # One full fund_master read and index build per pipeline run, shared by its sheets
+        if self._fuzzy_index is None:
+            all_funds = self.build_fund_map()
+            self._fuzzy_index = (FuzzyNameMatcher(list(all_funds)), all_funds)
+        matcher, all_funds = self._fuzzy_index
+
+        base_map = {
+            base: [fund for fund in funds if fund["fund_id"] not in claimed_fund_ids]
+            for base, funds in all_funds.items()
+        }
+        matches, report = matcher.match_many(names, candidates=[base for base, funds in base_map.items() if funds])
+
+        confidences, unmatched, taken = {}, report["unmatched"], set()
+        for name, (base, score) in sorted(matches.items(), key=lambda m: -m[1][1]):
+            if base in taken:
+                unmatched.append({"query": name, "best_score": round(score, 4)})
+                continue
+            taken.add(base)
+            confidences[name] = round(score, 4)
+            fund_map[name] = [{**fund, "match_confidence": confidences[name]} for fund in base_map[base]]
+
+        return confidences, unmatched
+
+    def match_sheet(self, ingestor: TerIngestor, df, code_map: dict) -> list[dict]:
+        """
+        TER records of one loaded sheet. Codes resolved by an exact base-name match
+        are saved to the crossref and added to code_map, so later sheets join on them
+        exactly; fuzzy matches are never learned and go through the matcher (and its
+        confidence) again next time.
+        """
+        # Exact scheme-code join first; only rows (plans) the code doesn't cover need the name map
+        fallback_names = ingestor.names_without_code(df, code_map)
+        fund_map = self.build_fund_map(fallback_names) if fallback_names else {}
+
+        # Names without an exact base-name match go through the fuzzy matcher,
+        # over the funds that no code or exact name already claims
+        unknown_names = [name for name in fallback_names if name not in fund_map]
+        if unknown_names:
+            claimed = {fund["fund_id"] for code in ingestor.scheme_codes(df) for fund in code_map.get(code, [])}
+            claimed |= {fund["fund_id"] for funds in fund_map.values() for fund in funds}
+            confidences, unmatched = self.add_fuzzy_matches(unknown_names, fund_map, claimed)
+
+            logger.info(
+                "TER fuzzy name matching | month=%s | queries=%s | matched=%s | min_confidence=%s | mean_confidence=%s",
+                ingestor.as_of_month, len(unknown_names), len(confidences),
+                min(confidences.values(), default=None),
+                round(sum(confidences.values()) / len(confidences), 4) if confidences else None
+            )
+            if unmatched:
+                logger.warning(
+                    "TER schemes without a fund match | month=%s | count=%s | names=%s",
+                    ingestor.as_of_month, len(unmatched), [u["query"] for u in unmatched]
+                )
+
+        records, learned = ingestor.transform(df, code_map, fund_map)
+
+        self.crossref_repo.add_links(FundCrossrefRepo.SCHEME_CODE, learned)
+        for link in learned:
+            code_map.setdefault(link["id_value"], []).append(
+                {"fund_id": link["fund_id"], "plan_type": link["plan_type"]}
+            )
+
+        logger.info(
+            "TER sheet matched | month=%s | rows=%s | records=%s | fallback_names=%s",
+            ingestor.as_of_month, len(df), len(records), len(fallback_names)
+        )
+        return records
+
     def run(self, delete_month: bool = False):
         logger.info("TER ingestion started")
 
+        df = self.ingestor.load()
         if delete_month:
             self.repo.delete_month_data(self.ingestor.as_of_month)
 
-        df = self.ingestor.load()
-        fund_map = self.build_fund_map()
+        code_map = self.crossref_repo.get_fund_map(FundCrossrefRepo.SCHEME_CODE)
+        records = self.match_sheet(self.ingestor, df, code_map)
+        written = self.repo.bulk_upsert(records)
+
+        logger.info(
+            "TER ingestion completed | month=%s | inserted_or_updated=%s",
+            self.ingestor.as_of_month, written
+        )
+
+    def run_batch(self, ter_dir: str, delete_months: bool = False, max_workers: int = TER_LOAD_WORKERS):
+        """
+        Ingests every .xlsx TER sheet in ter_dir (each sheet's month comes from its
+        TER dates). Sheets are parsed in parallel, matched oldest month first, and
+        all months are written together in unordered bulk writes.
+        """
+        paths = sorted(glob.glob(os.path.join(ter_dir, "*.xlsx")))
+        if not paths:
+            logger.warning("No TER sheets found | dir=%s", ter_dir)
+            return
+
+        logger.info("TER batch ingestion started | dir=%s | sheets=%s", ter_dir, len(paths))
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+            sheets = list(executor.map(_load_sheet, paths))
+        sheets.sort(key=lambda sheet: sheet[0].as_of_month)
 
-        records = self.ingestor.transform(df, fund_map)
+        if delete_months:
+            for month in sorted({ingestor.as_of_month for ingestor, _ in sheets}):
+                self.repo.delete_month_data(month)
 
-        for rec in records:
-            self.repo.upsert(rec)
+        code_map = self.crossref_repo.get_fund_map(FundCrossrefRepo.SCHEME_CODE)
+        records = []
+        for ingestor, df in sheets:
+            records.extend(self.match_sheet(ingestor, df, code_map))
+        written = self.repo.bulk_upsert(records)
 
         logger.info(
-            "TER ingestion completed | inserted_or_updated=%s",
-            len(records)
+            "TER batch ingestion completed | months=%s | inserted_or_updated=%s",
+            [ingestor.as_of_month for ingestor, _ in sheets], written
         )
@@ -0,0 +1,39 @@
+import logging
+from datetime import datetime
+from pymongo import ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+class CategoryStatsRepo:
+    """
+    Per-category metric statistics from the last metrics run, so a single fund
+    can be normalized without reloading every fund in its category.
+    """
+    def __init__(self, db):
+        self.collection = db.category_stats
+        self.collection.create_index("scheme_category", unique=True)
+
+    def save_stats(self, docs: list[dict]):
+        """
+        Replaces the stats of every category in docs in one unordered bulk write
+        """
+        if not docs:
+            return
+
+        now = datetime.now()
+        operations = [
+            ReplaceOne(
+                {"scheme_category": doc["scheme_category"]},
+                {**doc, "updated_at": now},
+                upsert=True
+            )
+            for doc in docs
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+        logger.info("Saved category stats | categories=%s", len(docs))
+
+    def get_stats(self, scheme_category: str):
+        return self.collection.find_one({"scheme_category": scheme_category}, {"_id": 0})
+
+    def get_all_stats(self) -> dict:
+        return {doc["scheme_category"]: doc for doc in self.collection.find({}, {"_id": 0})}
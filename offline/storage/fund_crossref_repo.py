@@ -0,0 +1,70 @@
+import logging
+from datetime import datetime
+from pymongo import UpdateOne, DeleteMany
+
+logger = logging.getLogger(__name__)
+
+class FundCrossrefRepo:
+    """
+    Identifier cross-reference, one doc per link: {id_type, id_value, fund_id, plan_type, updated_at}
+    - isin: ISINs from the scheme master CSV, refreshed whenever a fund's master record changes
+    - scheme_code: NSDL scheme codes of the TER sheets, learned from TER rows matched by exact base name
+    """
+    ISIN = "isin"
+    SCHEME_CODE = "scheme_code"
+
+    def __init__(self, db):
+        self.collection = db.fund_crossref
+        self.collection.create_index([("id_type", 1), ("id_value", 1), ("fund_id", 1)], unique=True)
+        self.collection.create_index("fund_id")
+
+    def _link(self, id_type: str, id_value: str, fund_id: int, plan_type: str, now: datetime) -> UpdateOne:
+        return UpdateOne(
+            {"id_type": id_type, "id_value": id_value, "fund_id": fund_id},
+            {"$set": {"plan_type": plan_type, "updated_at": now}},
+            upsert=True
+        )
+
+    def replace_isin_links(self, fund_docs: list[dict]):
+        """
+        Replaces the ISIN links of the given fund master records in one bulk write
+        (ordered, so the old links are gone before the new ones land)
+        """
+        if not fund_docs:
+            return
+
+        now = datetime.now()
+        operations = [DeleteMany({"id_type": self.ISIN, "fund_id": {"$in": [doc["fund_id"] for doc in fund_docs]}})]
+        operations += [
+            self._link(self.ISIN, isin, doc["fund_id"], doc["plan_type"], now)
+            for doc in fund_docs
+            for isin in doc.get("isins") or []
+        ]
+        self.collection.bulk_write(operations)
+
+    def add_links(self, id_type: str, links: list[dict]):
+        """
+        links: [{id_value, fund_id, plan_type}], upserted in one unordered bulk write
+        """
+        if not links:
+            return
+
+        now = datetime.now()
+        operations = [
+            self._link(id_type, link["id_value"], link["fund_id"], link["plan_type"], now)
+            for link in links
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+        logger.info("Saved crossref links | id_type=%s | links=%s", id_type, len(operations))
+
+    def get_fund_map(self, id_type: str) -> dict:
+        """
+        {id_value: [{fund_id, plan_type}]} for one identifier type
+        """
+        fund_map = {}
+        for doc in self.collection.find({"id_type": id_type}, {"_id": 0, "id_value": 1, "fund_id": 1, "plan_type": 1}):
+            fund_map.setdefault(doc["id_value"], []).append({
+                "fund_id": doc["fund_id"],
+                "plan_type": doc.get("plan_type", "Regular")
+            })
+        return fund_map
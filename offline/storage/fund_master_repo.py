@@ -1,7 +1,11 @@
 import logging
+from pymongo import UpdateOne
 
 logger = logging.getLogger(__name__)
 
+# Preserved once set: the cleanup script manages them
+STATE_FIELDS = ["is_active", "eligible_for_reco"]
+
 class FundMasterRepository:
     def __init__(self, db):
         self.collection = db.fund_master
@@ -13,10 +17,8 @@ class FundMasterRepository:
         fund_id = fund_doc["fund_id"]
 
         # Preserve fields managed by the cleanup script (don't overwrite them if they exist)
-        state_fields = ["is_active", "eligible_for_reco"]
-        
-        update_data = {k: v for k, v in fund_doc.items() if k not in state_fields}
-        insert_data = {k: v for k, v in fund_doc.items() if k in state_fields}
+        update_data = {k: v for k, v in fund_doc.items() if k not in STATE_FIELDS}
+        insert_data = {k: v for k, v in fund_doc.items() if k in STATE_FIELDS}
 
         self.collection.update_one(
             {"fund_id": fund_id},
@@ -27,4 +29,59 @@ class FundMasterRepository:
             upsert=True,
         )
 
-        logger.debug("Upserted fund | fund_id=%s", fund_id)
\ No newline at end of file
+        logger.debug("Upserted fund | fund_id=%s", fund_id)
+
+    def get_content_hashes(self) -> dict:
+        """
+        {fund_id: content_hash} of every stored fund, in one query
+        """
+        return {
+            doc["fund_id"]: doc.get("content_hash")
+            for doc in self.collection.find({}, {"_id": 0, "fund_id": 1, "content_hash": 1})
+        }
+
+    def bulk_upsert_funds(self, fund_docs: list[dict]) -> int:
+        """
+        upsert_fund for many funds in one unordered bulk write
+        """
+        if not fund_docs:
+            return 0
+
+        operations = [
+            UpdateOne(
+                {"fund_id": doc["fund_id"]},
+                {
+                    "$set": {k: v for k, v in doc.items() if k not in STATE_FIELDS},
+                    "$setOnInsert": {k: v for k, v in doc.items() if k in STATE_FIELDS}
+                },
+                upsert=True,
+            )
+            for doc in fund_docs
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def get_statuses(self) -> list[dict]:
+        """
+        Every fund's current cleanup status {fund_id, is_active, eligible_for_reco, status_note}
+        """
+        return list(self.collection.find(
+            {}, {"_id": 0, "fund_id": 1, "is_active": 1, "eligible_for_reco": 1, "status_note": 1}
+        ))
+
+    def bulk_set_status(self, updates: list[dict]) -> int:
+        """
+        $set of each {fund_id, ...fields} in one unordered bulk write
+        """
+        if not updates:
+            return 0
+
+        operations = [
+            UpdateOne(
+                {"fund_id": update["fund_id"]},
+                {"$set": {k: v for k, v in update.items() if k != "fund_id"}}
+            )
+            for update in updates
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
\ No newline at end of file
@@ -0,0 +1,44 @@
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+class MetricsHistoryRepo:
+    """
+    Point-in-time metric snapshots for backtesting, one columnar doc per as-of date:
+        {as_of, fund_ids: [...], scheme_category: [...],
+         metrics: {metric: [...]}, norm: {metric: [...]}}
+    About 1.5 MB per date for 16k funds, well under the 16 MB document limit.
+    """
+    def __init__(self, db):
+        self.collection = db.fund_metrics_history
+        self.collection.create_index("as_of", unique=True)
+
+    def save_snapshot(self, as_of: datetime, normalized_df: pd.DataFrame, metrics: list[str]):
+        def column(name):
+            values = normalized_df[name].to_numpy(dtype=np.float64)
+            return [None if np.isnan(v) else float(v) for v in values]
+
+        doc = {
+            "as_of": as_of,
+            "fund_ids": [int(f_id) for f_id in normalized_df["fund_id"]],
+            "scheme_category": normalized_df["scheme_category"].tolist(),
+            "metrics": {m: column(m) for m in metrics},
+            "norm": {m: column(f"norm_{m}") for m in metrics},
+            "created_at": datetime.now()
+        }
+        self.collection.replace_one({"as_of": as_of}, doc, upsert=True)
+        logger.info("Saved metrics snapshot | as_of=%s | funds=%s", as_of.date(), len(doc["fund_ids"]))
+
+    def get_snapshots(self, start: datetime = None, end: datetime = None) -> list[dict]:
+        query = {}
+        if start or end:
+            query["as_of"] = {}
+            if start:
+                query["as_of"]["$gte"] = start
+            if end:
+                query["as_of"]["$lte"] = end
+        return list(self.collection.find(query, {"_id": 0}).sort("as_of", 1))
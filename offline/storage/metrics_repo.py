@@ -1,13 +1,30 @@
 import logging
 from datetime import datetime
+from pymongo import ReturnDocument
 
 logger = logging.getLogger(__name__)
 
 class MetricsRepo:
+    """
+    fund_metrics is what the online engine reads. Full runs are published
+    blue/green: written to a staging collection, validated, then swapped in with
+    one renameCollection; the replaced version is kept for rollback.
+    """
+    LIVE = "fund_metrics"
+    STAGING = "fund_metrics_staging"
+    PREVIOUS = "fund_metrics_previous"
+    META_ID = "fund_metrics"
+
     def __init__(self, db):
-        self.collection = db.fund_metrics
-        self.collection.create_index("fund_id", unique=True)
-        self.collection.create_index("last_updated")
+        self.db = db
+        self.collection = db[self.LIVE]
+        self.meta = db.metrics_meta
+        self._create_indexes(self.collection)
+
+    @staticmethod
+    def _create_indexes(collection):
+        collection.create_index("fund_id", unique=True)
+        collection.create_index("last_updated")
 
     def upsert_metrics(self, fund_metrics: dict):
         """
@@ -44,6 +61,157 @@ class MetricsRepo:
         if operations:
             self.collection.bulk_write(operations, ordered=False)
 
+    def publish_metrics(self, metrics_list: list[dict], batch_size: int = 5000) -> int:
+        """
+        Replaces the whole fund_metrics collection with metrics_list and returns
+        the new version number. Raises ValueError (live data untouched) if the
+        staged copy fails validation.
+        """
+        staging = self.db[self.STAGING]
+        staging.drop()
+        for start in range(0, len(metrics_list), batch_size):
+            # Copies, so the caller's dicts don't pick up an _id
+            staging.insert_many([dict(doc) for doc in metrics_list[start:start + batch_size]], ordered=False)
+
+        return self.publish_staging(len(metrics_list))
+
+    def get_staged_categories(self) -> dict:
+        """
+        {fund_id: scheme_category} of every staged doc
+        """
+        cursor = self.db[self.STAGING].find({}, {"_id": 0, "fund_id": 1, "scheme_category": 1})
+        return {doc["fund_id"]: doc.get("scheme_category", "Unknown") for doc in cursor}
+
+    def set_staged_fields(self, records: list[dict], batch_size: int = 5000):
+        """
+        Sets extra fields on staged docs: records are {fund_id, field: value, ...}
+        """
+        from pymongo import UpdateOne
+        staging = self.db[self.STAGING]
+        staging.create_index("fund_id", unique=True)
+        for start in range(0, len(records), batch_size):
+            staging.bulk_write(
+                [
+                    UpdateOne({"fund_id": record["fund_id"]}, {"$set": record})
+                    for record in records[start:start + batch_size]
+                ],
+                ordered=False
+            )
+
+    def apply_zscores_to_staging(self, stats: dict, metrics: list[str]):
+        """
+        Server-side z-scores for raw metrics already in the staging collection.
+        stats: {scheme_category: {metric: (mean, std)}}. Same rules as
+        normalize_by_category: 0 when std is 0/undefined or the value is missing.
+        """
+        staging = self.db[self.STAGING]
+        staging.update_many({}, {"$set": {f"norm_{m}": 0 for m in metrics}})
+
+        for category, metric_stats in stats.items():
+            norm_fields = {}
+            for metric in metrics:
+                mean, std = metric_stats.get(metric, (None, None))
+                if std is None or not std > 0:
+                    continue
+                norm_fields[f"norm_{metric}"] = {
+                    "$cond": [
+                        # Numbers sort above NaN and null sorts below it: true only for real values
+                        {"$gt": [f"${metric}", float("nan")]},
+                        {"$divide": [{"$subtract": [f"${metric}", mean]}, std]},
+                        0
+                    ]
+                }
+            if norm_fields:
+                staging.update_many({"scheme_category": category}, [{"$set": norm_fields}])
+
+    def publish_staging(self, expected_count: int) -> int:
+        """
+        Stamps, indexes and validates the staging collection, then swaps it in
+        """
+        # Versions come from a counter that never goes back, so a rollback followed by a
+        # new publish can't reuse a number caches have already seen
+        counter = self.meta.find_one_and_update(
+            {"_id": self.META_ID},
+            {"$inc": {"last_version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        version = counter["last_version"]
+        now = datetime.now()
+
+        staging = self.db[self.STAGING]
+        staging.update_many({}, {"$set": {"last_updated": now, "metrics_version": version}})
+        self._create_indexes(staging)
+
+        try:
+            self._validate_staging(staging, expected_count)
+        except ValueError:
+            staging.drop()
+            raise
+
+        # Copy the live version aside ($out replaces the target atomically), then swap
+        if self.LIVE in self.db.list_collection_names():
+            self.collection.aggregate([{"$match": {}}, {"$out": self.PREVIOUS}])
+        staging.rename(self.LIVE, dropTarget=True)
+
+        self.meta.update_one(
+            {"_id": self.META_ID},
+            {"$set": {
+                "version": version,
+                "previous_version": counter.get("version"),
+                "published_at": now,
+                "fund_count": expected_count
+            }},
+            upsert=True
+        )
+        logger.info("Published fund_metrics | version=%s | funds=%s", version, expected_count)
+        return version
+
+    def _validate_staging(self, staging, expected_count: int):
+        count = staging.count_documents({})
+        if count != expected_count:
+            raise ValueError(f"Staged metrics count mismatch: expected {expected_count}, found {count}")
+
+        # Normalized scores are always finite (missing values become 0); NaN matches NaN in queries
+        sample = staging.find_one({}, {"_id": 0}) or {}
+        norm_fields = [k for k in sample if k.startswith("norm_")]
+        if norm_fields:
+            nan_count = staging.count_documents({"$or": [{f: float("nan")} for f in norm_fields]})
+            if nan_count:
+                raise ValueError(f"Staged metrics contain NaN normalized scores in {nan_count} docs")
+
+    def rollback_metrics(self) -> int:
+        """
+        Swaps the kept previous version back in. Returns the now-live version.
+        """
+        if self.PREVIOUS not in self.db.list_collection_names():
+            raise ValueError("No previous fund_metrics version to roll back to")
+
+        meta = self.meta.find_one({"_id": self.META_ID}) or {}
+        self.db[self.PREVIOUS].rename(self.LIVE, dropTarget=True)
+        # $out copies don't carry secondary indexes
+        self._create_indexes(self.collection)
+
+        version = meta.get("previous_version") or 0
+        self.meta.update_one(
+            {"_id": self.META_ID},
+            {"$set": {"version": version, "previous_version": None, "published_at": datetime.now()}},
+            upsert=True
+        )
+        logger.info("Rolled back fund_metrics | version=%s", version)
+        return version
+
+    def get_version(self) -> int:
+        meta = self.meta.find_one({"_id": self.META_ID}, {"version": 1})
+        return (meta or {}).get("version", 0)
+
+    def get_cached_metrics(self, fund_ids: list[int]) -> dict:
+        """
+        {fund_id: doc} for funds that already have metrics, in one query
+        """
+        cursor = self.collection.find({"fund_id": {"$in": fund_ids}}, {"_id": 0})
+        return {doc["fund_id"]: doc for doc in cursor}
+
     def get_metrics(self, fund_id: int):
         return self.collection.find_one({"fund_id": fund_id})
 
@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class MetricsShardRepo:
+    """
+    Hand-off between shard nodes and the merge step of a sharded metrics run:
+        metrics_shard_records  raw (unnormalized) metrics, one doc per fund
+        metrics_shard_stats    per-shard category sufficient statistics
+        metrics_shard_runs     one doc per finished shard
+    Everything is keyed by run_id so concurrent or repeated runs don't mix.
+    """
+    def __init__(self, db):
+        self.records = db.metrics_shard_records
+        self.stats = db.metrics_shard_stats
+        self.runs = db.metrics_shard_runs
+        self.records.create_index([("run_id", 1), ("shard", 1)])
+        self.stats.create_index([("run_id", 1), ("shard", 1)])
+        self.runs.create_index([("run_id", 1), ("shard", 1)], unique=True)
+
+    def save_shard(self, run_id: str, shard: int, n_shards: int, records: list[dict], moment_docs: list[dict]):
+        """
+        Replaces this shard's output (a retried shard overwrites its previous attempt)
+        and marks it finished last, so the merge never sees half a shard.
+        """
+        key = {"run_id": run_id, "shard": shard}
+        self.runs.delete_one(key)
+        self.records.delete_many(key)
+        self.stats.delete_many(key)
+
+        if records:
+            self.records.insert_many([{**record, **key} for record in records], ordered=False)
+        if moment_docs:
+            self.stats.insert_many([{**doc, **key} for doc in moment_docs], ordered=False)
+
+        self.runs.update_one(
+            key,
+            {"$set": {"n_shards": n_shards, "fund_count": len(records), "completed_at": datetime.now()}},
+            upsert=True
+        )
+        logger.info("Saved metrics shard | run=%s | shard=%s/%s | funds=%s", run_id, shard, n_shards, len(records))
+
+    def get_completed_shards(self, run_id: str) -> list[dict]:
+        return list(self.runs.find({"run_id": run_id}, {"_id": 0}))
+
+    def get_moment_docs(self, run_id: str):
+        return self.stats.find({"run_id": run_id}, {"_id": 0})
+
+    def stage_records(self, run_id: str, staging_name: str):
+        """
+        Copies every shard's raw records into the staging collection, server-side
+        """
+        self.records.aggregate([
+            {"$match": {"run_id": run_id}},
+            {"$unset": ["_id", "run_id", "shard"]},
+            {"$out": staging_name}
+        ])
+
+    def clear_run(self, run_id: str):
+        key = {"run_id": run_id}
+        for collection in (self.records, self.stats, self.runs):
+            collection.delete_many(key)
@@ -0,0 +1,241 @@
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+class NavColumnarStore:
+    """
+    Columnar NAV cache: per-fund contiguous arrays plus an offset index.
+
+    On disk each build is a version directory, and a CURRENT file names the live one:
+        fund_index.npy  (fund_id, offset, length) sorted by fund_id
+        nav_dates.npy   int64 epoch-ns, ascending within each fund
+        navs.npy        float64, aligned with nav_dates
+        meta.json       build time and row counts
+    Loading with mmap gives every worker process zero-copy slices of the same pages.
+    """
+    INDEX_DTYPE = np.dtype([("fund_id", "i8"), ("offset", "i8"), ("length", "i8")])
+
+    def __init__(self, index: np.ndarray, nav_dates: np.ndarray, navs: np.ndarray, meta: dict = None):
+        self.index = index
+        self.nav_dates = nav_dates
+        self.navs = navs
+        self.meta = meta or {}
+        self._positions = {int(f_id): i for i, f_id in enumerate(index["fund_id"])}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, fund_id):
+        return fund_id in self._positions
+
+    @property
+    def fund_ids(self) -> np.ndarray:
+        return self.index["fund_id"]
+
+    def slice(self, fund_id: int):
+        """
+        Returns (nav_dates, navs) views for a fund, or None if it isn't stored
+        """
+        pos = self._positions.get(fund_id)
+        if pos is None:
+            return None
+        offset, length = int(self.index["offset"][pos]), int(self.index["length"][pos])
+        return self.nav_dates[offset:offset + length], self.navs[offset:offset + length]
+
+    def as_of(self, cutoff_date):
+        """
+        Zero-copy point-in-time view: every fund's rows up to and including
+        cutoff_date. Rows are sorted per fund, so each fund keeps a prefix and
+        only the index is rebuilt; funds with no rows yet are left out.
+        """
+        cutoff_ns = pd.Timestamp(cutoff_date).value
+        if len(self.index) == 0:
+            return NavColumnarStore(self.index, self.nav_dates, self.navs, self.meta)
+
+        lengths = np.add.reduceat(self.nav_dates <= cutoff_ns, self.index["offset"], dtype=np.int64)
+        index = self.index.copy()
+        index["length"] = np.minimum(lengths, self.index["length"])
+        return NavColumnarStore(index[index["length"] > 0], self.nav_dates, self.navs, self.meta)
+
+    def last_observations(self):
+        """
+        (fund_ids, last nav_dates, last navs) of every fund, vectorized
+        """
+        last = self.index["offset"] + self.index["length"] - 1
+        return self.index["fund_id"], self.nav_dates[last], self.navs[last]
+
+    def fingerprints(self) -> dict:
+        """
+        {fund_id: {"last_nav_date", "nav_count"}} straight from the offset index
+        """
+        last_dates = self.nav_dates[self.index["offset"] + self.index["length"] - 1] if len(self.index) else []
+        return {
+            int(f_id): {"last_nav_date": pd.Timestamp(int(last)).to_pydatetime(), "nav_count": int(length)}
+            for f_id, length, last in zip(self.index["fund_id"], self.index["length"], last_dates)
+        }
+
+    @classmethod
+    def from_rows(cls, row_fund_ids: np.ndarray, nav_dates: np.ndarray, navs: np.ndarray, meta: dict = None):
+        """
+        Builds the store from unordered rows. Rows are sorted by (fund_id, nav_date)
+        and repeated keys keep the last occurrence, so merging old + new rows is safe.
+        """
+        row_fund_ids = np.asarray(row_fund_ids, dtype="i8")
+        nav_dates = np.asarray(nav_dates, dtype="i8")
+        navs = np.asarray(navs, dtype="f8")
+
+        if len(row_fund_ids):
+            # Stable sort keeps later rows after earlier ones for equal keys
+            order = np.lexsort((nav_dates, row_fund_ids))
+            row_fund_ids, nav_dates, navs = row_fund_ids[order], nav_dates[order], navs[order]
+
+            is_last = np.ones(len(row_fund_ids), dtype=bool)
+            is_last[:-1] = (row_fund_ids[1:] != row_fund_ids[:-1]) | (nav_dates[1:] != nav_dates[:-1])
+            row_fund_ids, nav_dates, navs = row_fund_ids[is_last], nav_dates[is_last], navs[is_last]
+
+        fund_ids, offsets, lengths = np.unique(row_fund_ids, return_index=True, return_counts=True)
+        index = np.empty(len(fund_ids), dtype=cls.INDEX_DTYPE)
+        index["fund_id"], index["offset"], index["length"] = fund_ids, offsets, lengths
+
+        return cls(index, nav_dates, navs, meta)
+
+    @classmethod
+    def from_cursor(cls, cursor, meta: dict = None):
+        """
+        Builds the store from a Mongo cursor of {fund_id, nav_date, nav} docs
+        """
+        fund_ids, nav_dates, navs = [], [], []
+        for doc in cursor:
+            fund_ids.append(doc["fund_id"])
+            nav_dates.append(doc["nav_date"])
+            navs.append(doc["nav"])
+
+        dates_ns = np.array(nav_dates, dtype="datetime64[ns]").view("i8")
+        return cls.from_rows(np.array(fund_ids, dtype="i8"), dates_ns, np.array(navs, dtype="f8"), meta)
+
+    def drop_before(self, cutoff_date):
+        """
+        Returns a copy without rows older than cutoff_date (retention window)
+        """
+        cutoff_ns = pd.Timestamp(cutoff_date).value
+        keep = self.nav_dates >= cutoff_ns
+        row_fund_ids = np.repeat(self.index["fund_id"], self.index["length"])
+        return NavColumnarStore.from_rows(row_fund_ids[keep], self.nav_dates[keep], self.navs[keep], self.meta)
+
+    def filtered(self, keep: np.ndarray):
+        """
+        Returns a copy without the rows where keep is False. Rows stay in order,
+        so only the lengths are recounted; funds left with no rows are dropped.
+        Expects a loaded store (the index covers every row), not an as_of view.
+        """
+        if len(self.index) == 0:
+            return self
+
+        index = self.index.copy()
+        index["length"] = np.add.reduceat(keep, self.index["offset"], dtype=np.int64)
+        index["offset"] = np.cumsum(index["length"]) - index["length"]
+        return NavColumnarStore(index[index["length"] > 0], self.nav_dates[keep], self.navs[keep], self.meta)
+
+    def subset(self, fund_ids):
+        """
+        Copy with only the given funds' rows, e.g. a few categories of a mapped store
+        """
+        wanted = np.isin(self.index["fund_id"], np.asarray(fund_ids, dtype=np.int64))
+        return self.filtered(np.repeat(wanted, self.index["length"]))
+
+    def save(self, store_dir: str):
+        """
+        Writes a new version directory and atomically repoints CURRENT to it.
+        Readers that already mapped the previous version keep working.
+        """
+        os.makedirs(store_dir, exist_ok=True)
+        version = datetime.now().strftime("v%Y%m%d%H%M%S%f")
+        version_dir = os.path.join(store_dir, version)
+        os.makedirs(version_dir)
+
+        np.save(os.path.join(version_dir, "fund_index.npy"), self.index)
+        np.save(os.path.join(version_dir, "nav_dates.npy"), self.nav_dates)
+        np.save(os.path.join(version_dir, "navs.npy"), self.navs)
+
+        meta = {**self.meta, "fund_count": len(self.index), "row_count": len(self.navs)}
+        with open(os.path.join(version_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+        tmp_pointer = os.path.join(store_dir, "CURRENT.tmp")
+        with open(tmp_pointer, "w") as f:
+            f.write(version)
+        os.replace(tmp_pointer, os.path.join(store_dir, "CURRENT"))
+
+        # Keep the previous version for readers that are still mapping it
+        versions = sorted(d for d in os.listdir(store_dir) if d.startswith("v"))
+        for old in versions[:-2]:
+            shutil.rmtree(os.path.join(store_dir, old), ignore_errors=True)
+
+        logger.info("Saved NAV store | version=%s | funds=%s | rows=%s", version, meta["fund_count"], meta["row_count"])
+
+    @classmethod
+    def load(cls, store_dir: str, mmap: bool = True):
+        """
+        Opens the live version (memory-mapped by default). Returns None if no store exists.
+        """
+        pointer = os.path.join(store_dir, "CURRENT")
+        if not os.path.exists(pointer):
+            return None
+
+        with open(pointer) as f:
+            version_dir = os.path.join(store_dir, f.read().strip())
+
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(version_dir, "meta.json")) as f:
+            meta = json.load(f)
+
+        return cls(
+            np.load(os.path.join(version_dir, "fund_index.npy")),
+            np.load(os.path.join(version_dir, "nav_dates.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(version_dir, "navs.npy"), mmap_mode=mmap_mode),
+            meta
+        )
+
+    @classmethod
+    def refresh(cls, store_dir: str, nav_collection, lookback_years: int = 6, full: bool = False):
+        """
+        Brings the store up to date with nav_collection and saves it.
+        Incremental by default: only rows inserted since the last build are read
+        (ObjectIds carry their insert time), merged in and trimmed to the retention window.
+        """
+        # UTC, because ObjectId timestamps are UTC
+        built_at = datetime.now(timezone.utc)
+        projection = {"fund_id": 1, "nav_date": 1, "nav": 1, "_id": 0}
+        current = None if full else cls.load(store_dir, mmap=False)
+
+        if current is None or "built_at" not in current.meta:
+            logger.info("Building NAV store from scratch...")
+            cursor = nav_collection.find({}, projection).sort([("fund_id", 1), ("nav_date", 1)])
+            store = cls.from_cursor(cursor)
+        else:
+            # Overlap the previous build a little; duplicates are collapsed by from_rows
+            since = datetime.fromisoformat(current.meta["built_at"]) - timedelta(hours=1)
+            new_rows = cls.from_cursor(nav_collection.find({"_id": {"$gt": ObjectId.from_datetime(since)}}, projection))
+            logger.info("Refreshing NAV store | new_rows=%s", len(new_rows.navs))
+
+            store = cls.from_rows(
+                np.concatenate([
+                    np.repeat(current.index["fund_id"], current.index["length"]),
+                    np.repeat(new_rows.index["fund_id"], new_rows.index["length"])
+                ]),
+                np.concatenate([current.nav_dates, new_rows.nav_dates]),
+                np.concatenate([current.navs, new_rows.navs])
+            )
+
+        store = store.drop_before(datetime.now() - pd.DateOffset(years=lookback_years))
+        store.meta = {"built_at": built_at.isoformat()}
+        store.save(store_dir)
+        return store
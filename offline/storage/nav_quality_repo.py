@@ -0,0 +1,40 @@
+import logging
+from datetime import datetime
+from pymongo import ReplaceOne, DeleteMany
+
+logger = logging.getLogger(__name__)
+
+class NavQualityRepo:
+    """
+    NAV anomaly reports from the last validation, one doc per flagged fund:
+        {fund_id, flags: {non_positive, spike, stale, split, gap}, max_gap_days,
+         quarantine: [{reason, start, end, rows}], gaps: [{start, end, days}], checked_at}
+    Quarantined rows are left out of the metrics; the NAVs themselves are untouched.
+    """
+    def __init__(self, db):
+        self.collection = db.nav_quality
+        self.collection.create_index("fund_id", unique=True)
+
+    def save_reports(self, checked_fund_ids: list[int], reports: dict):
+        """
+        Replaces the reports of every checked fund in one unordered bulk write:
+        flagged funds are upserted, funds that came back clean are cleared
+        """
+        now = datetime.now()
+        operations = [
+            ReplaceOne({"fund_id": f_id}, {**report, "checked_at": now}, upsert=True)
+            for f_id, report in reports.items()
+        ]
+        clean = [f_id for f_id in checked_fund_ids if f_id not in reports]
+        if clean:
+            operations.append(DeleteMany({"fund_id": {"$in": clean}}))
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        logger.info("Saved NAV quality reports | checked=%s | flagged=%s", len(checked_fund_ids), len(reports))
+
+    def get_report(self, fund_id: int):
+        return self.collection.find_one({"fund_id": fund_id}, {"_id": 0})
+
+    def get_all_reports(self) -> dict:
+        return {doc["fund_id"]: doc for doc in self.collection.find({}, {"_id": 0})}
@@ -1,5 +1,8 @@
 import logging
+import numpy as np
 from pymongo.errors import DuplicateKeyError
+from config.settings import NAV_WRITE_BATCH_SIZE, METRICS_STREAM_BATCH_ROWS
+from storage.nav_stats_repo import NavStatsRepo
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +25,9 @@ class NavRepo:
         # Regular index for performance (Unique is not supported here)
         self.collection.create_index([("fund_id", 1), ("nav_date", -1)])
 
+        # Per-fund counts and date range, updated by every write below
+        self.stats = NavStatsRepo(db)
+
     def insert_nav(self, fund_id: int, nav_date, nav_value: float) -> bool:
         # Manual duplicate check since Unique Index isn't available for Time Series
         exists = self.collection.find_one({
@@ -41,23 +47,12 @@ class NavRepo:
 
         try:
             self.collection.insert_one(doc)
+            self.stats.record_inserts([doc])
             logger.info(
                 "Inserted NAV | fund_id=%s | date=%s | nav=%s",
                 fund_id, nav_date.date(), nav_value,
             )
             
-            # Remove the "last document" (anything older than 6 years) for this specific fund
-            from datetime import datetime
-            import pandas as pd
-            cutoff_date = datetime.now() - pd.DateOffset(years=6)
-            
-            del_result = self.collection.delete_many({
-                "fund_id": fund_id,
-                "nav_date": {"$lt": cutoff_date}
-            })
-            if del_result.deleted_count > 0:
-                logger.debug("Deleted %s old records for fund_id=%s", del_result.deleted_count, fund_id)
-
             return True
        
         except DuplicateKeyError:
@@ -67,13 +62,64 @@ class NavRepo:
             )
             return False
 
-    def bulk_insert_nav(self, docs: list[dict]):
+    def bulk_insert_nav(self, docs: list[dict]) -> bool:
+        """
+        Unordered insert_many. False if it failed; some of the rows may have landed.
+        """
         if not docs:
-            return
+            return True
         try:
             self.collection.insert_many(docs, ordered=False)
         except Exception as e:
             logger.error("Bulk insert failed | Error: %s", e)
+            # Some rows may have landed; recount the batch's funds from the stored rows
+            self.stats.rebuild(list({doc["fund_id"] for doc in docs}))
+            return False
+        self.stats.record_inserts(docs)
+        return True
+
+    def upsert_nav_batch(self, rows: list[dict], batch_size: int = NAV_WRITE_BATCH_SIZE) -> tuple[int, set[int]]:
+        """
+        Set-based write for many {fund_id, nav_date, nav} rows.
+        Per batch: one $in lookup for existing keys, then one unordered insert_many
+        of the new rows. Retention is left to a single delete_old_nav per run.
+        Returns (rows inserted, fund_ids with rows in a failed insert).
+        """
+        inserted = 0
+        failed_fund_ids = set()
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+
+            fund_ids = list({row["fund_id"] for row in batch})
+            nav_dates = list({row["nav_date"] for row in batch})
+            seen = {
+                (doc["fund_id"], doc["nav_date"])
+                for doc in self.collection.find(
+                    {"fund_id": {"$in": fund_ids}, "nav_date": {"$in": nav_dates}},
+                    {"fund_id": 1, "nav_date": 1, "_id": 0}
+                )
+            }
+
+            new_docs = []
+            for row in batch:
+                key = (row["fund_id"], row["nav_date"])
+                # `seen` also drops repeats within the batch itself
+                if key in seen:
+                    continue
+                seen.add(key)
+                new_docs.append({"fund_id": row["fund_id"], "nav_date": row["nav_date"], "nav": row["nav"]})
+
+            if self.bulk_insert_nav(new_docs):
+                inserted += len(new_docs)
+            else:
+                failed_fund_ids.update(doc["fund_id"] for doc in new_docs)
+
+        logger.info(
+            "NAV batch write | rows=%s | inserted=%s | failed_funds=%s",
+            len(rows), inserted, len(failed_fund_ids)
+        )
+        return inserted, failed_fund_ids
 
     def delete_old_nav(self, lookback_years: int = 6):
         """
@@ -83,7 +129,8 @@ class NavRepo:
         import pandas as pd
         
         cutoff_date = datetime.now() - pd.DateOffset(years=lookback_years)
-        
+        self.stats.record_retention(cutoff_date)
+
         result = self.collection.delete_many({
             "nav_date": {"$lt": cutoff_date}
         })
@@ -91,6 +138,90 @@ class NavRepo:
         if result.deleted_count > 0:
             logger.info("Cleaned up old NAV data | records_deleted=%s", result.deleted_count)
 
+    def find_duplicate_ids(self, min_fund_id: int, max_fund_id: int) -> dict:
+        """
+        Server-side scan of one fund_id range for repeated (fund_id, nav_date) rows.
+        Returns {fund_id: _ids of every copy except the one with the smallest _id}.
+        """
+        pipeline = [
+            {"$match": {"fund_id": {"$gte": min_fund_id, "$lte": max_fund_id}}},
+            {
+                "$group": {
+                    "_id": {"fund_id": "$fund_id", "nav_date": "$nav_date"},
+                    "keep": {"$min": "$_id"},
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1}
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}},
+            {"$project": {"keep": 1, "ids": 1}}
+        ]
+
+        duplicate_ids = {}
+        for group in self.collection.aggregate(pipeline, allowDiskUse=True):
+            duplicate_ids.setdefault(group["_id"]["fund_id"], []).extend(
+                _id for _id in group["ids"] if _id != group["keep"]
+            )
+        return duplicate_ids
+
+    def delete_by_ids(self, ids: list) -> int:
+        if not ids:
+            return 0
+        return self.collection.delete_many({"_id": {"$in": ids}}).deleted_count
+
+    def get_storage_stats(self) -> dict:
+        stats = self.collection.database.command("collStats", self.collection.name)
+        return {
+            "size": stats.get("size", 0),
+            "storage_size": stats.get("storageSize", 0)
+        }
+
+    def get_nav_fingerprints(self, fund_ids: list[int]) -> dict:
+        """
+        One aggregation for {fund_id: {"last_nav_date", "nav_count"}}
+        """
+        pipeline = [
+            {"$match": {"fund_id": {"$in": fund_ids}}},
+            {"$group": {"_id": "$fund_id", "last_nav_date": {"$max": "$nav_date"}, "nav_count": {"$sum": 1}}}
+        ]
+        return {
+            doc["_id"]: {"last_nav_date": doc["last_nav_date"], "nav_count": doc["nav_count"]}
+            for doc in self.collection.aggregate(pipeline, allowDiskUse=True)
+        }
+
+    def iter_fund_arrays(self, fund_ids: list[int], batch_size: int = METRICS_STREAM_BATCH_ROWS):
+        """
+        Streams a (fund_id, nav_date)-sorted cursor and yields one
+        (fund_id, nav_dates int64 ns, navs float64) per fund as soon as its last row
+        has been read. Only the current fund's rows are held; repeated dates keep
+        the last row, like NavColumnarStore.
+        """
+        cursor = self.collection.find(
+            {"fund_id": {"$in": fund_ids}},
+            {"fund_id": 1, "nav_date": 1, "nav": 1, "_id": 0},
+            batch_size=batch_size
+        ).sort([("fund_id", 1), ("nav_date", 1)])
+
+        current_id, dates, navs = None, [], []
+        for doc in cursor:
+            if doc["fund_id"] != current_id:
+                if current_id is not None:
+                    yield (current_id, *self._to_fund_arrays(dates, navs))
+                current_id, dates, navs = doc["fund_id"], [], []
+            dates.append(doc["nav_date"])
+            navs.append(doc["nav"])
+
+        if current_id is not None:
+            yield (current_id, *self._to_fund_arrays(dates, navs))
+
+    @staticmethod
+    def _to_fund_arrays(dates: list, navs: list):
+        nav_dates = np.array(dates, dtype="datetime64[ns]").view("i8")
+        nav_values = np.array(navs, dtype="f8")
+        is_last = np.ones(len(nav_dates), dtype=bool)
+        is_last[:-1] = nav_dates[1:] != nav_dates[:-1]
+        return nav_dates[is_last], nav_values[is_last]
+
     def get_nav_series(self, fund_id: int):
         """
         Returns a list of NAV records sorted by date
@@ -0,0 +1,57 @@
+import logging
+from multiprocessing import shared_memory
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SharedNavArrays:
+    """
+    NAV dates (int64 epoch-ns) and NAVs (float64) of every fund packed into one
+    multiprocessing.shared_memory block, laid out like NavColumnarStore:
+        [ nav_dates (n_rows x int64) | navs (n_rows x float64) ]
+    The offsets table stays with the parent, which hands workers plain
+    (fund_id, offset, length) tuples; workers attach by name and slice views.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, n_rows: int, owner: bool):
+        self.shm = shm
+        self.n_rows = n_rows
+        self.owner = owner
+        self.nav_dates = np.ndarray((n_rows,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.navs = np.ndarray((n_rows,), dtype=np.float64, buffer=shm.buf, offset=n_rows * 8)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(cls, nav_dates: np.ndarray, navs: np.ndarray):
+        """
+        Copies the arrays into a new block owned by the calling process
+        """
+        n_rows = len(navs)
+        # SharedMemory refuses size 0
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * 16))
+        shared = cls(shm, n_rows, owner=True)
+        shared.nav_dates[:] = nav_dates
+        shared.navs[:] = navs
+
+        logger.info("Packed NAV arrays into shared memory | name=%s | rows=%s | bytes=%s", shm.name, n_rows, n_rows * 16)
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, n_rows: int):
+        return cls(shared_memory.SharedMemory(name=name), n_rows, owner=False)
+
+    def slice(self, offset: int, length: int):
+        return self.nav_dates[offset:offset + length], self.navs[offset:offset + length]
+
+    def close(self):
+        """
+        Detaches from the block; the owner also frees it
+        """
+        # Views must go before the buffer can be released
+        self.nav_dates = self.navs = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
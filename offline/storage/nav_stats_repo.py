@@ -0,0 +1,184 @@
+import logging
+from datetime import datetime, timedelta
+from pymongo import UpdateOne, ReplaceOne, DeleteOne
+
+logger = logging.getLogger(__name__)
+
+class NavStatsRepo:
+    """
+    Per-fund NAV statistics {fund_id, nav_count, first_nav_date, last_nav_date},
+    kept in step by NavRepo's write paths so readers never scan nav_timeseries.
+    - Inserts add to the counts and widen the date range ($inc / $min / $max)
+    - Retention deletes subtract the pruned rows and move first_nav_date forward
+    - Duplicate compaction subtracts the removed copies ($inc)
+    - rebuild() recomputes funds from the raw rows (bootstrap and repairs); a full
+      rebuild leaves a marker, since writes before it create partial stats
+    """
+    BOOTSTRAP_ID = "bootstrap"
+
+    # Retention re-reads this many days past the cutoff to find each fund's new first NAV
+    RETENTION_SCAN_DAYS = 31
+
+    def __init__(self, db):
+        self.collection = db.nav_stats
+        self.meta = db.nav_stats_meta
+        self.nav_collection = db.nav_timeseries
+        self.collection.create_index("fund_id", unique=True)
+
+    def record_inserts(self, docs: list[dict]):
+        """
+        Folds freshly inserted {fund_id, nav_date, ...} rows into the stats,
+        one unordered bulk write with an upsert per fund
+        """
+        if not docs:
+            return
+
+        per_fund = {}
+        for doc in docs:
+            stats = per_fund.get(doc["fund_id"])
+            if stats is None:
+                per_fund[doc["fund_id"]] = [1, doc["nav_date"], doc["nav_date"]]
+            else:
+                stats[0] += 1
+                stats[1] = min(stats[1], doc["nav_date"])
+                stats[2] = max(stats[2], doc["nav_date"])
+
+        now = datetime.now()
+        operations = [
+            UpdateOne(
+                {"fund_id": fund_id},
+                {
+                    "$inc": {"nav_count": count},
+                    "$min": {"first_nav_date": first},
+                    "$max": {"last_nav_date": last},
+                    "$set": {"updated_at": now}
+                },
+                upsert=True
+            )
+            for fund_id, (count, first, last) in per_fund.items()
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+
+    def record_deletes(self, removed: dict):
+        """
+        removed: {fund_id: rows deleted}, for deletes that leave every fund's date
+        range as it was (extra copies of a stored date). $inc only, so concurrent
+        inserts folded in by record_inserts are kept.
+        """
+        if not removed:
+            return
+
+        now = datetime.now()
+        operations = [
+            UpdateOne({"fund_id": fund_id}, {"$inc": {"nav_count": -count}, "$set": {"updated_at": now}})
+            for fund_id, count in removed.items()
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+
+    def record_retention(self, cutoff: datetime):
+        """
+        Must run before rows older than cutoff are deleted. One aggregation over the
+        rows up to RETENTION_SCAN_DAYS past the cutoff gives, per fund, the rows about
+        to go and the first row that stays; the rare fund with a longer gap gets an
+        indexed lookup, and a fund left with no rows loses its stats.
+        """
+        pipeline = [
+            {"$match": {"nav_date": {"$lt": cutoff + timedelta(days=self.RETENTION_SCAN_DAYS)}}},
+            {
+                "$group": {
+                    "_id": "$fund_id",
+                    "removed": {"$sum": {"$cond": [{"$lt": ["$nav_date", cutoff]}, 1, 0]}},
+                    "first_kept": {"$min": {"$cond": [{"$gte": ["$nav_date", cutoff]}, "$nav_date", None]}}
+                }
+            },
+            {"$match": {"removed": {"$gt": 0}}}
+        ]
+
+        now = datetime.now()
+        operations = []
+        for item in self.nav_collection.aggregate(pipeline, allowDiskUse=True):
+            fund_id, first_kept = item["_id"], item.get("first_kept")
+            if first_kept is None:
+                next_doc = self.nav_collection.find_one(
+                    {"fund_id": fund_id, "nav_date": {"$gte": cutoff}},
+                    {"nav_date": 1, "_id": 0},
+                    sort=[("nav_date", 1)]
+                )
+                if next_doc is None:
+                    operations.append(DeleteOne({"fund_id": fund_id}))
+                    continue
+                first_kept = next_doc["nav_date"]
+
+            operations.append(UpdateOne(
+                {"fund_id": fund_id},
+                {
+                    "$inc": {"nav_count": -item["removed"]},
+                    "$set": {"first_nav_date": first_kept, "updated_at": now}
+                }
+            ))
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+            logger.info("NAV stats retention | funds=%s", len(operations))
+
+    def rebuild(self, fund_ids: list[int] | None = None) -> int:
+        """
+        Recomputes the stats of fund_ids (every fund when None) from nav_timeseries.
+        Returns the number of funds with NAV rows.
+        """
+        pipeline = [
+            {
+                "$group": {
+                    "_id": "$fund_id",
+                    "nav_count": {"$sum": 1},
+                    "first_nav_date": {"$min": "$nav_date"},
+                    "last_nav_date": {"$max": "$nav_date"}
+                }
+            }
+        ]
+        if fund_ids is not None:
+            if not fund_ids:
+                return 0
+            pipeline.insert(0, {"$match": {"fund_id": {"$in": list(fund_ids)}}})
+
+        now = datetime.now()
+        operations, found = [], set()
+        for item in self.nav_collection.aggregate(pipeline, allowDiskUse=True):
+            found.add(item["_id"])
+            operations.append(ReplaceOne(
+                {"fund_id": item["_id"]},
+                {
+                    "fund_id": item["_id"],
+                    "nav_count": item["nav_count"],
+                    "first_nav_date": item["first_nav_date"],
+                    "last_nav_date": item["last_nav_date"],
+                    "updated_at": now
+                },
+                upsert=True
+            ))
+
+        # Funds whose rows are all gone
+        stale_query = {"fund_id": {"$nin": list(found)}}
+        if fund_ids is not None:
+            stale_query = {"fund_id": {"$in": [f for f in fund_ids if f not in found]}}
+        self.collection.delete_many(stale_query)
+
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        if fund_ids is None:
+            self.meta.replace_one(
+                {"_id": self.BOOTSTRAP_ID}, {"_id": self.BOOTSTRAP_ID, "built_at": now}, upsert=True
+            )
+        logger.info("Rebuilt NAV stats | funds=%s", len(found))
+        return len(found)
+
+    def is_bootstrapped(self) -> bool:
+        """
+        True once a full rebuild has covered every fund
+        """
+        return self.meta.find_one({"_id": self.BOOTSTRAP_ID}) is not None
+
+    def get_all(self) -> list[dict]:
+        return list(self.collection.find(
+            {}, {"fund_id": 1, "nav_count": 1, "first_nav_date": 1, "last_nav_date": 1, "_id": 0}
+        ))
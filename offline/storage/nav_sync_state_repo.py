@@ -0,0 +1,87 @@
+import logging
+from datetime import datetime
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+class NavSyncStateRepo:
+    """
+    Checkpoint state for history syncs.
+    - Watermarks (newest nav_date a history sync stored per fund) let a sync request
+      only newer rows. Rows from the daily syncs don't move them, so a fund that only
+      has daily rows still gets its full lookback.
+    - A run marker plus per-fund checkpoints let a crashed sync skip finished funds
+    """
+    HISTORY_RUN_ID = "nav_history"
+
+    def __init__(self, db):
+        self.collection = db.nav_sync_state
+        self.runs = db.nav_sync_runs
+        self.collection.create_index("fund_id", unique=True)
+        self.collection.create_index("history_synced_at")
+
+    def start_run(self, resume: bool = True) -> tuple[datetime, bool]:
+        """
+        Returns (started_at, resumed). An unfinished run is resumed unless resume=False.
+        """
+        run = self.runs.find_one({"_id": self.HISTORY_RUN_ID})
+        if resume and run and not run.get("completed_at"):
+            logger.info("Resuming unfinished history sync | started_at=%s", run["started_at"])
+            return run["started_at"], True
+
+        started_at = datetime.now()
+        self.runs.replace_one(
+            {"_id": self.HISTORY_RUN_ID},
+            {"_id": self.HISTORY_RUN_ID, "started_at": started_at, "completed_at": None},
+            upsert=True
+        )
+        return started_at, False
+
+    def complete_run(self):
+        self.runs.update_one(
+            {"_id": self.HISTORY_RUN_ID},
+            {"$set": {"completed_at": datetime.now()}}
+        )
+
+    def get_synced_fund_ids(self, since: datetime) -> set[int]:
+        """
+        Funds checkpointed at or after `since` (i.e. already done in the current run)
+        """
+        return {
+            doc["fund_id"] for doc in self.collection.find(
+                {"history_synced_at": {"$gte": since}}, {"fund_id": 1}
+            )
+        }
+
+    def get_watermarks(self, fund_ids: list[int]) -> dict:
+        """
+        {fund_id: last_nav_date of its history checkpoints}. Funds never checkpointed
+        with rows are absent and get the full lookback window.
+        """
+        if not fund_ids:
+            return {}
+
+        return {
+            doc["fund_id"]: doc["last_nav_date"] for doc in self.collection.find(
+                {"fund_id": {"$in": fund_ids}, "last_nav_date": {"$ne": None}},
+                {"fund_id": 1, "last_nav_date": 1, "_id": 0}
+            )
+        }
+
+    def save_checkpoints(self, checkpoints: dict):
+        """
+        checkpoints: {fund_id: newest nav_date inserted, or None if nothing new}
+        """
+        if not checkpoints:
+            return
+
+        now = datetime.now()
+        operations = []
+        for fund_id, last_nav_date in checkpoints.items():
+            update = {"$set": {"history_synced_at": now}}
+            if last_nav_date is not None:
+                # $max keeps the watermark monotonic even if batches land out of order
+                update["$max"] = {"last_nav_date": last_nav_date}
+            operations.append(UpdateOne({"fund_id": fund_id}, update, upsert=True))
+
+        self.collection.bulk_write(operations, ordered=False)
@@ -1,4 +1,6 @@
 import logging
+from pymongo import UpdateOne
+from config.settings import TER_WRITE_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -30,11 +32,29 @@ class TerRepo:
             upsert=True
         )
 
-        logger.info(
+        logger.debug(
             "Upserted TER | fund_id=%s | plan=%s | month=%s | ter=%s",
             doc["fund_id"], doc["plan_type"], doc["as_of_month"], doc["ter"]
         )
 
+    def bulk_upsert(self, docs: list[dict], batch_size: int = TER_WRITE_BATCH_SIZE) -> int:
+        """
+        upsert for many docs, in unordered bulk writes on the (fund_id, plan_type,
+        as_of_month) key. A key given twice keeps its last doc.
+        """
+        latest = {(d["fund_id"], d["plan_type"], d["as_of_month"]): d for d in docs}
+        operations = [
+            UpdateOne(
+                {"fund_id": fund_id, "plan_type": plan_type, "as_of_month": as_of_month},
+                {"$set": doc},
+                upsert=True
+            )
+            for (fund_id, plan_type, as_of_month), doc in latest.items()
+        ]
+        for start in range(0, len(operations), batch_size):
+            self.collection.bulk_write(operations[start:start + batch_size], ordered=False)
+        return len(operations)
+
     def get_latest_ter(self, fund_id: int):
         """
         Returns the most recent TER doc for a fund
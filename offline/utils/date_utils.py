@@ -1,3 +1,7 @@
 # Date Utilities
+
+# Nanoseconds per day, for the int64 epoch-ns dates of the NAV arrays
+NS_PER_DAY = 86_400 * 10**9
+
 def get_current_date():
     pass
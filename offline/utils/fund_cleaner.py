@@ -1,123 +1,95 @@
 import logging
 from datetime import datetime, timedelta
-from storage.mongo_client import MongoDBClient
-from utils.string_utils import normalize_name, extract_base_name
+import numpy as np
 import pandas as pd
+from config.settings import CLEANUP_MIN_DAYS_FOR_RECO, CLEANUP_MIN_DAYS_FOR_ACTIVE, CLEANUP_STALE_LIMIT_DAYS
+from storage.mongo_client import MongoDBClient
+from storage.fund_master_repo import FundMasterRepository
+from storage.nav_stats_repo import NavStatsRepo
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STATUS_FIELDS = ["is_active", "eligible_for_reco", "status_note"]
+
+def classify_funds(funds: pd.DataFrame, now: datetime) -> pd.DataFrame:
+    """
+    funds: one row per fund with nav_count / last_nav_date (NaN without NAV rows).
+    Adds is_active, eligible_for_reco, status_note and the stale / low_history /
+    missing_nav flags, for every fund at once.
+    """
+    stale_date = now - timedelta(days=CLEANUP_STALE_LIMIT_DAYS)
+    has_nav = funds["nav_count"].notna()
+    count = funds["nav_count"].fillna(0).astype(int)
+    latest = pd.to_datetime(funds["last_nav_date"])
+
+    # Criteria 1: inactivity based on stale data
+    stale = has_nav & (latest < stale_date)
+    # Criteria 2: insufficient history for metrics
+    low_history = has_nav & (count < CLEANUP_MIN_DAYS_FOR_RECO)
+    # Criteria 3: too little data to even be considered active
+    too_little = has_nav & (count < CLEANUP_MIN_DAYS_FOR_ACTIVE)
+
+    notes = pd.Series("", index=funds.index)
+    for mask, text in (
+        (stale, "Stale data (Latest: " + latest.dt.strftime("%Y-%m-%d") + ")"),
+        (low_history, "Low history count (" + count.astype(str) + " days)"),
+        (too_little & ~low_history, "Insufficient total data (" + count.astype(str) + " days)"),
+    ):
+        notes = notes.where(~mask, notes + np.where(notes != "", " | ", "") + text)
+
+    result = funds.copy()
+    result["is_active"] = has_nav & ~stale & ~too_little
+    result["eligible_for_reco"] = has_nav & ~low_history
+    result["status_note"] = np.where(has_nav, notes.replace("", "Valid"), "No NAV data found in database")
+    result["stale"] = stale
+    result["low_history"] = low_history
+    result["missing_nav"] = ~has_nav
+    return result
+
 def cleanup_funds():
+    """
+    Classifies every fund from the nav_stats collection (no scan of the NAV rows)
+    and writes only the funds whose status changed, in one bulk write
+    """
     db = MongoDBClient().get_db()
-    nav_col = db.nav_timeseries
-    master_col = db.fund_master
+    master_repo = FundMasterRepository(db)
+    stats_repo = NavStatsRepo(db)
 
     logger.info("Starting fund data validation and cleanup...")
 
-    # 1. Aggregate NAV data to get counts and latest dates
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$fund_id",
-                "nav_count": {"$sum": 1},
-                "latest_nav": {"$max": "$nav_date"}
-            }
-        }
-    ]
-    
-    logger.info("Aggregating NAV record counts per fund...")
-    nav_stats = list(nav_col.aggregate(pipeline))
-    nav_map = {item["_id"]: item for item in nav_stats}
+    if not stats_repo.is_bootstrapped():
+        logger.info("nav_stats has not been built yet; building it from nav_timeseries once...")
+        stats_repo.rebuild()
 
-    # 2. Process all funds in master
-    funds = list(master_col.find({}, {"fund_id": 1, "scheme_name": 1}))
-    total_funds = len(funds)
+    statuses = pd.DataFrame(master_repo.get_statuses(), columns=["fund_id", *STATUS_FIELDS])
+    nav_stats = pd.DataFrame(stats_repo.get_all(), columns=["fund_id", "nav_count", "first_nav_date", "last_nav_date"])
+    total_funds = len(statuses)
     logger.info(f"Processing {total_funds} funds in master list...")
 
-    # Thresholds
-    MIN_DAYS_FOR_RECO = 750  # ~3 years of trading days
-    MIN_DAYS_FOR_ACTIVE = 60 # ~3 months
-    STALE_LIMIT_DAYS = 30    # Consider inactive if no data in last 30 days
-
     now = datetime.now()
-    stale_date = now - timedelta(days=STALE_LIMIT_DAYS)
-
-    updates = []
-    stats = {
-        "deactivated": 0,
-        "made_ineligible": 0,
-        "kept_active": 0,
-        "missing_nav": 0
-    }
-
-    for fund in funds:
-        fund_id = fund["fund_id"]
-        nav_info = nav_map.get(fund_id)
-        scheme_name = fund["scheme_name"]
-
-        is_active = True
-        eligible_for_reco = True
-        status_note = "Valid"
-        
-        if not nav_info:
-            is_active = False
-            eligible_for_reco = False
-            status_note = "No NAV data found in database"
-            stats["missing_nav"] += 1
-            stats["deactivated"] += 1
-            stats["made_ineligible"] += 1
-        else:
-            count = nav_info["nav_count"]
-            latest = nav_info["latest_nav"]
+    funds = classify_funds(
+        statuses[["fund_id"]].merge(nav_stats, on="fund_id", how="left"), now
+    ).set_index("fund_id")
+    current = statuses.set_index("fund_id").reindex(funds.index)
 
-            notes = []
-            # Criteria 1: Inactivity based on stale data
-            if latest < stale_date:
-                is_active = False
-                notes.append(f"Stale data (Latest: {latest.date()})")
-                stats["deactivated"] += 1
-            
-            # Criteria 2: Insufficient history for metrics
-            if count < MIN_DAYS_FOR_RECO:
-                eligible_for_reco = False
-                notes.append(f"Low history count ({count} days)")
-                stats["made_ineligible"] += 1
-            
-            # Criteria 3: Too little data to even be considered active
-            if count < MIN_DAYS_FOR_ACTIVE:
-                is_active = False
-                if f"Low history count ({count} days)" not in notes:
-                    notes.append(f"Insufficient total data ({count} days)")
-            
-            if notes:
-                status_note = " | ".join(notes)
-            
-            if is_active:
-                stats["kept_active"] += 1
+    changed = np.zeros(len(funds), dtype=bool)
+    for field in STATUS_FIELDS:
+        changed |= (current[field] != funds[field]).to_numpy()
 
-        # Update the document
-        master_col.update_one(
-            {"fund_id": fund_id},
-            {
-                "$set": {
-                    "is_active": is_active,
-                    "eligible_for_reco": eligible_for_reco,
-                    "last_nav_date": nav_info["latest_nav"] if nav_info else None,
-                    "nav_record_count": nav_info["nav_count"] if nav_info else 0,
-                    "validation_date": now,
-                    "status_note": status_note,
-                    "normalized_name": normalize_name(scheme_name),
-                    "base_name": normalize_name(extract_base_name(scheme_name))
-                }
-            }
-        )
+    updates = funds.loc[changed, STATUS_FIELDS].reset_index()
+    updates["is_active"] = updates["is_active"].astype(bool)
+    updates["eligible_for_reco"] = updates["eligible_for_reco"].astype(bool)
+    updates["validation_date"] = now
+    written = master_repo.bulk_set_status(updates.to_dict("records"))
 
     logger.info("Cleanup completed!")
     logger.info(f"Total Funds: {total_funds}")
-    logger.info(f"Active Funds: {stats['kept_active']}")
-    logger.info(f"Deactivated (Stale/No Data): {stats['deactivated']}")
-    logger.info(f"Ineligible for Recommendations (<3 yrs data): {stats['made_ineligible']}")
-    logger.info(f"Funds with 0 NAV records: {stats['missing_nav']}")
+    logger.info(f"Status changes written: {written}")
+    logger.info(f"Active Funds: {int(funds['is_active'].sum())}")
+    logger.info(f"Deactivated (Stale/No Data): {int((funds['stale'] | funds['missing_nav']).sum())}")
+    logger.info(f"Ineligible for Recommendations (<3 yrs data): {int((funds['low_history'] | funds['missing_nav']).sum())}")
+    logger.info(f"Funds with 0 NAV records: {int(funds['missing_nav'].sum())}")
 
 if __name__ == "__main__":
     cleanup_funds()
@@ -0,0 +1,168 @@
+import re
+import numpy as np
+from config.settings import FUZZY_MATCH_MIN_SCORE, FUZZY_MATCH_MAX_CANDIDATES
+
+"""
+Indexed fuzzy name matcher.
+
+Names are reduced to lowercase alphanumeric tokens and indexed twice: by
+token and by character trigram, each gram pointing at the names that contain
+it. A query only competes against names that share its leading token (the
+AMC brand in fund names) and the same numbers (series, years, index weights),
+so "tata bse sensex index fund" can't land on Kotak's, or a 2027 target
+maturity fund on the 2026 one. Plan / option words are ignored throughout.
+Those names are ranked by IDF-weighted gram overlap from the postings, and
+only the top candidates get the exact score: the better of an IDF-weighted
+token Dice and a trigram Dice coefficient.
+"""
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_NUMBER = re.compile(r"\d+")
+_ROMAN = re.compile(r"^[ivxl]+$")
+
+# Plan / option words left in names whose base name couldn't be split off; not part of a fund's identity
+PLAN_OPTION_TOKENS = frozenset([
+    "direct", "regular", "plan", "growth", "idcw", "option", "dividend", "payout", "reinvestment", "bonus"
+])
+
+def _raw_tokens(name: str) -> list[str]:
+    return _NON_ALNUM.sub(" ", str(name).lower()).split()
+
+def _tokens(name: str) -> list[str]:
+    return [t for t in _raw_tokens(name) if t not in PLAN_OPTION_TOKENS]
+
+def _trigrams(tokens: list[str]) -> set[str]:
+    # Spaces dropped, so "nifty50" and "nifty 50" share their grams
+    text = f" {''.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _dice(a: set, b: set) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+def _numbers(tokens: list[str]) -> tuple:
+    # Series are numbered in digits or roman numerals
+    numbers = [n for t in tokens for n in _NUMBER.findall(t)]
+    numbers += [t for t in tokens if _ROMAN.match(t)]
+    return tuple(sorted(numbers))
+
+class FuzzyNameMatcher:
+    def __init__(
+        self,
+        names: list[str],
+        min_score: float = FUZZY_MATCH_MIN_SCORE,
+        max_candidates: int = FUZZY_MATCH_MAX_CANDIDATES
+    ):
+        self.names = list(dict.fromkeys(names))
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+
+        self._tokens = [set(_tokens(n)) for n in self.names]
+        self._grams = [_trigrams(_tokens(n)) for n in self.names]
+        self._numbers = [_numbers(_tokens(n)) for n in self.names]
+        self._raw_grams = [_trigrams(_raw_tokens(n)) for n in self.names]
+
+        postings = {}
+        for i, (tokens, grams) in enumerate(zip(self._tokens, self._grams)):
+            for gram in tokens:
+                postings.setdefault(f"t:{gram}", []).append(i)
+            for gram in grams:
+                postings.setdefault(f"g:{gram}", []).append(i)
+        self._postings = {gram: np.asarray(ids) for gram, ids in postings.items()}
+
+        n = max(len(self.names), 1)
+        self._idf = {gram: np.log((n + 1) / (len(ids) + 1)) + 1 for gram, ids in self._postings.items()}
+        self._unseen_idf = np.log(n + 1) + 1
+
+        self._by_leading_token = {}
+        for i, name in enumerate(self.names):
+            tokens = _tokens(name)
+            if tokens:
+                self._by_leading_token.setdefault(tokens[0], []).append(i)
+        self._by_leading_token = {t: np.asarray(ids) for t, ids in self._by_leading_token.items()}
+
+    def _token_weight(self, tokens) -> float:
+        return sum(self._idf.get(f"t:{t}", self._unseen_idf) for t in tokens)
+
+    def _score(self, tokens: list[str], q_grams: set, i: int) -> float:
+        if _numbers(tokens) != self._numbers[i]:
+            return 0.0
+        q_tokens, c_tokens = set(tokens), self._tokens[i]
+
+        token_total = self._token_weight(q_tokens) + self._token_weight(c_tokens)
+        token_dice = 2 * self._token_weight(q_tokens & c_tokens) / token_total if token_total else 0.0
+        gram_dice = _dice(q_grams, self._grams[i])
+        # Either view may carry the match: "midcap" vs "mid cap" only agrees on trigrams, a typo'd
+        # token costs little there too, while reordered words still agree on tokens
+        return max(token_dice, gram_dice)
+
+    def score(self, query: str, i: int) -> float:
+        """
+        Similarity in [0, 1] between query and self.names[i]; 0 when their numbers differ
+        """
+        tokens = _tokens(query)
+        return self._score(tokens, _trigrams(tokens), i)
+
+    def match(self, query: str, allowed: np.ndarray | None = None) -> tuple[str | None, float]:
+        """
+        (best matching name, score), or (None, best score) below min_score.
+        allowed: optional boolean mask over self.names restricting the candidates.
+        """
+        if query in self._ids and (allowed is None or allowed[self._ids[query]]):
+            return query, 1.0
+        tokens = _tokens(query)
+        if not tokens or tokens[0] not in self._by_leading_token:
+            return None, 0.0
+        candidates = self._by_leading_token[tokens[0]]
+        if allowed is not None:
+            candidates = candidates[allowed[candidates]]
+        if not len(candidates):
+            return None, 0.0
+
+        # Rank the candidates by IDF-weighted shared grams, from the postings only
+        q_grams = _trigrams(tokens)
+        grams = [f"t:{t}" for t in set(tokens)] + [f"g:{g}" for g in q_grams]
+        grams = [g for g in grams if g in self._postings]
+        ids = np.concatenate([self._postings[g] for g in grams])
+        weights = np.concatenate([np.full(len(self._postings[g]), self._idf[g]) for g in grams])
+        overlap = np.bincount(ids, weights=weights, minlength=len(self.names))[candidates]
+        if len(candidates) > self.max_candidates:
+            candidates = candidates[np.argpartition(-overlap, self.max_candidates)[:self.max_candidates]]
+
+        # Ties (names that differ only in plan words) go to the closest full name
+        raw_grams = _trigrams(_raw_tokens(query))
+        best_score, _, best = max(
+            (self._score(tokens, q_grams, i), _dice(raw_grams, self._raw_grams[i]), i) for i in candidates
+        )
+        if best_score < self.min_score:
+            return None, float(best_score)
+        return self.names[best], float(best_score)
+
+    def match_many(self, queries: list[str], candidates=None) -> tuple[dict, dict]:
+        """
+        Matches every query, optionally only against the names in candidates.
+        Returns ({query: (name, score)} for the matched queries, a run report:
+        {queries, matched, unmatched: [{query, best_score}], min_score, mean_score})
+        """
+        allowed = None
+        if candidates is not None:
+            candidates = set(candidates)
+            allowed = np.array([name in candidates for name in self.names], dtype=bool)
+
+        matches, unmatched = {}, []
+        for query in dict.fromkeys(queries):
+            name, s = self.match(query, allowed)
+            if name is None:
+                unmatched.append({"query": query, "best_score": round(float(s), 4)})
+            else:
+                matches[query] = (name, float(s))
+
+        scores = [s for _, s in matches.values()]
+        report = {
+            "queries": len(matches) + len(unmatched),
+            "matched": len(matches),
+            "unmatched": unmatched,
+            "min_score": min(scores) if scores else None,
+            "mean_score": float(np.mean(scores)) if scores else None,
+        }
+        return matches, report
@@ -0,0 +1,73 @@
+import logging
+from collections import Counter
+from storage.mongo_client import MongoDBClient
+from storage.nav_repo import NavRepo
+
+logger = logging.getLogger(__name__)
+
+def compact_nav_duplicates(funds_per_batch: int = 500, delete_chunk: int = 10000, reclaim: bool = False):
+    """
+    Removes duplicate (fund_id, nav_date) rows from nav_timeseries.
+
+    - Duplicates are found with a server-side $group, one fund_id range at a time
+    - Only the extra copies (by _id) are deleted, so at least one row per key always
+      survives and it is safe to run while daily ingestion is writing
+    - Deleting by _id on a time-series collection needs MongoDB 7.0+
+    - nav_stats counts drop by the copies removed per fund ($inc), so stats written
+      by concurrent inserts aren't overwritten
+    - reclaim: run `compact` afterwards to hand the freed space back to the OS
+    """
+    db = MongoDBClient().get_db()
+    nav_repo = NavRepo(db)
+
+    logger.info("Starting NAV duplicate compaction...")
+    before = nav_repo.get_storage_stats()
+
+    fund_ids = sorted(nav_repo.collection.distinct("fund_id"))
+    total_removed = 0
+
+    for start in range(0, len(fund_ids), funds_per_batch):
+        fund_range = fund_ids[start:start + funds_per_batch]
+        duplicates = nav_repo.find_duplicate_ids(fund_range[0], fund_range[-1])
+        pairs = [(fund_id, _id) for fund_id, ids in duplicates.items() for _id in ids]
+
+        removed = 0
+        for i in range(0, len(pairs), delete_chunk):
+            chunk = pairs[i:i + delete_chunk]
+            deleted = nav_repo.delete_by_ids([_id for _, _id in chunk])
+            per_fund = Counter(fund_id for fund_id, _ in chunk)
+            if deleted == len(chunk):
+                nav_repo.stats.record_deletes(per_fund)
+            else:
+                # Some copies were already gone (e.g. retention, which counts its own
+                # deletes), so the per-fund split is unknown; recount just these funds
+                nav_repo.stats.rebuild(list(per_fund))
+            removed += deleted
+
+        total_removed += removed
+        if removed:
+            logger.info(
+                "Compacted fund range %s-%s | duplicates_removed=%s",
+                fund_range[0], fund_range[-1], removed
+            )
+
+    if reclaim and total_removed:
+        # Hands freed blocks back to the OS; size drops without it, storageSize may not
+        logger.info("Running compact on %s...", nav_repo.collection.name)
+        db.command("compact", nav_repo.collection.name)
+
+    after = nav_repo.get_storage_stats()
+
+    logger.info("NAV compaction completed!")
+    logger.info(f"Duplicate rows removed: {total_removed}")
+    logger.info(f"Data size reclaimed: {(before['size'] - after['size']) / 1024 / 1024:.2f} MB")
+    logger.info(f"Storage size reclaimed: {(before['storage_size'] - after['storage_size']) / 1024 / 1024:.2f} MB")
+
+    return {
+        "duplicates_removed": total_removed,
+        "size_reclaimed_bytes": before["size"] - after["size"],
+        "storage_reclaimed_bytes": before["storage_size"] - after["storage_size"]
+    }
+
+if __name__ == "__main__":
+    compact_nav_duplicates()
@@ -0,0 +1,47 @@
+import random
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+    Tokens refill continuously at `rate` per second up to `capacity`,
+    so short bursts are allowed while the average rate stays bounded.
+    """
+    def __init__(self, rate: float, capacity: int = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Blocks the calling thread until `tokens` are available.
+        Only the caller sleeps; other workers keep consuming tokens.
+        """
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+
+            time.sleep(wait_time)
+
+def backoff_with_jitter(attempt: int, initial_wait: float = 2.0, max_wait: float = 30.0) -> float:
+    """
+    "Full jitter" exponential backoff: a random wait in [0, initial_wait * 2^attempt],
+    capped at max_wait. Spreads retries out so failing funds don't retry in lockstep.
+    """
+    return random.uniform(0, min(max_wait, initial_wait * (2 ** attempt)))
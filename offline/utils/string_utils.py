@@ -1,48 +1,38 @@
-import re
+import pandas as pd
 
-def normalize_name(name: str) -> str:
+def normalize_names(names: pd.Series) -> pd.Series:
     """
-    Standardizes fund names for matching across different data sources.
+    Standardizes fund names for matching across different data sources, over a
+    whole Series with pandas string ops; missing names give "".
     - Lowers case
     - Replaces '&' with 'and'
     - Replaces '-' with ' '
     - Removes multiple spaces
     - Trims whitespace
     """
-    if not name:
-        return ""
-    
-    name = name.lower()
-    name = name.replace("&", "and")
-    name = name.replace("-", " ")
-    
-    # Remove multiple spaces
-    name = re.sub(r"\s+", " ", name)
-    
-    return name.strip()
+    return (
+        names.fillna("").astype(str)
+        .str.lower()
+        .str.replace("&", "and", regex=False)
+        .str.replace("-", " ", regex=False)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
 
-def extract_base_name(full_name: str) -> str:
+def extract_base_names(full_names: pd.Series) -> pd.Series:
     """
-    Extracts the core fund name by removing plan and option details.
+    Extracts the core fund names by removing plan and option details, over a whole
+    Series with pandas string ops.
     Example: "Axis Bluechip Fund - Direct Plan - Growth" -> "Axis Bluechip Fund"
     """
-    # Common delimiters for plan/option parts
-    delimiters = [" - ", " (", " – "]
-    
-    base_name = full_name
-    for d in delimiters:
-        if d in base_name:
-            base_name = base_name.split(d)[0]
-            
-    # Also handle hyphens without spaces if needed
-    if " - " not in base_name and "-" in base_name:
-        # But be careful not to split names like "ICICI-Prudential"
-        # Usually, plan info starts with "- Direct" or "- Regular"
-        parts = base_name.split("-")
-        if len(parts) > 1:
-            # Check if the second part looks like a plan
-            second_part = parts[1].strip().lower()
-            if any(p in second_part for p in ["direct", "regular", "plan"]):
-                base_name = parts[0]
-                
-    return base_name.strip()
+    base_names = full_names.astype(str)
+    for d in [" - ", " (", " – "]:
+        base_names = base_names.str.split(d, n=1, regex=False).str[0]
+
+    # " - " is gone by now; a bare hyphen only splits when a plan follows it,
+    # so names like "ICICI-Prudential" stay whole
+    second_parts = base_names.str.split("-", n=2, regex=False).str[1]
+    is_plan = second_parts.str.strip().str.lower().str.contains("direct|regular|plan", regex=True, na=False)
+    base_names = base_names.where(~is_plan, base_names.str.split("-", n=1, regex=False).str[0])
+
+    return base_names.str.strip()
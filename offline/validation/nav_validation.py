@@ -1,3 +1,196 @@
-# NAV Validation module
-def validate_nav():
-    pass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from config.settings import (
+    NAV_SPIKE_Z, NAV_SPIKE_MIN_MOVE, NAV_SPLIT_MIN_MOVE, NAV_SPLIT_CONFIRM_ROWS, NAV_GAP_DAYS, NAV_STALE_MIN_RUN
+)
+from validation.normalization import MAD_SCALE
+from utils.date_utils import NS_PER_DAY
+
+"""
+NAV validation module.
+
+Scans every fund of a loaded NavColumnarStore in one vectorized pass over its
+flat (fund, date)-sorted arrays, before any metric is computed:
+  non_positive  zero, negative or missing NAVs
+  spike         a one-day print whose return and the next one are both outliers
+                (robust z-score of log returns against the fund's own median/MAD)
+                in opposite directions; also the prints of a jump that returns to
+                the old level within NAV_SPLIT_CONFIRM_ROWS prints, and of a jump
+                too recent to be confirmed (e.g. a bad latest NAV)
+  stale         repeats of an unchanged NAV in a run of NAV_STALE_MIN_RUN or more
+  split         an outlier jump whose new level holds for NAV_SPLIT_CONFIRM_ROWS
+                more prints; the rows before it are in different units
+  gap           more than NAV_GAP_DAYS between consecutive NAVs (flag only)
+Quarantined rows are dropped from the arrays the metrics engine reads.
+"""
+
+# Quarantine reasons, in priority order when a row matches several (reason code = position + 1)
+QUARANTINE_REASONS = ("non_positive", "spike", "stale", "split")
+
+# An eighth of a fund's returns is plenty for its median / MAD and keeps the scan cheap
+ROBUST_STATS_STRIDE = 8
+
+def _group_median(values: np.ndarray, ranks: np.ndarray, n_funds: int) -> np.ndarray:
+    return pd.Series(values).groupby(ranks).median().reindex(range(n_funds)).to_numpy()
+
+def _to_datetime(ns) -> datetime:
+    return pd.Timestamp(int(ns)).to_pydatetime()
+
+def validate_nav(
+    nav_store,
+    spike_z: float = NAV_SPIKE_Z,
+    spike_min_move: float = NAV_SPIKE_MIN_MOVE,
+    split_min_move: float = NAV_SPLIT_MIN_MOVE,
+    split_confirm_rows: int = NAV_SPLIT_CONFIRM_ROWS,
+    gap_days: int = NAV_GAP_DAYS,
+    stale_min_run: int = NAV_STALE_MIN_RUN
+) -> tuple[np.ndarray, dict]:
+    """
+    Returns (keep mask over the store's rows, {fund_id: quality report} for every
+    fund with at least one flag). A report is
+        {fund_id, flags: {reason: rows, gap: count}, max_gap_days,
+         quarantine: [{reason, start, end, rows}], gaps: [{start, end, days}]}
+    """
+    navs = np.asarray(nav_store.navs, dtype=np.float64)
+    nav_dates = np.asarray(nav_store.nav_dates, dtype=np.int64)
+    n_rows, n_funds = len(navs), len(nav_store.index)
+    if n_rows == 0:
+        return np.ones(0, dtype=bool), {}
+
+    offsets = nav_store.index["offset"]
+    ranks = np.repeat(np.arange(n_funds), nav_store.index["length"])
+
+    # Row i has a previous row of the same fund
+    same_fund = np.ones(n_rows, dtype=bool)
+    same_fund[offsets] = False
+
+    positive = np.isfinite(navs) & (navs > 0)
+    has_return = same_fund.copy()
+    has_return[1:] &= positive[1:] & positive[:-1]
+
+    log_returns = np.full(n_rows, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.log(navs[1:] / navs[:-1], out=log_returns[1:], where=has_return[1:])
+
+    # Robust z-scores against each fund's own median / MAD of log returns, estimated
+    # from the returns on every ROBUST_STATS_STRIDE-th calendar day (layout independent,
+    # so shards and single-node runs agree)
+    sample = (nav_dates // NS_PER_DAY) % ROBUST_STATS_STRIDE == 0
+    median = _group_median(log_returns[sample], ranks[sample], n_funds)
+    deviation = log_returns - median[ranks]
+    mad = _group_median(np.abs(deviation[sample]), ranks[sample], n_funds)
+    with np.errstate(invalid="ignore"):
+        threshold = np.maximum(spike_z * MAD_SCALE * mad, spike_min_move)
+        jump = np.abs(deviation) > threshold[ranks]
+
+    # Jumps are rare, so the rest works on their positions only.
+    # A spike jumps and comes straight back; the reverting return isn't a split
+    jumps = np.flatnonzero(jump)
+    pairs = jumps[:-1][(np.diff(jumps) == 1) & (np.sign(deviation[jumps[:-1]]) != np.sign(deviation[jumps[1:]]))]
+    spike = np.zeros(n_rows, dtype=bool)
+    spike[pairs] = True
+    split_candidates = jumps[~spike[jumps] & ~np.isin(jumps - 1, pairs) & (np.abs(log_returns[jumps]) > split_min_move)]
+
+    # A candidate is a split only once its new level has held for split_confirm_rows
+    # more prints. Returning nearer the old level first makes its prints a spike, as
+    # does running out of prints (nothing confirms a bad latest NAV yet).
+    fund_ends = offsets + np.asarray(nav_store.index["length"]) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_navs = np.log(np.where(positive, navs, np.nan))
+    split_rows, reverting_jumps = [], set()
+    for row in split_candidates:
+        if row in reverting_jumps:
+            continue
+        end = fund_ends[ranks[row]]
+        following = log_navs[row + 1:min(row + split_confirm_rows, end) + 1]
+        reverted = np.flatnonzero(np.abs(following - log_navs[row - 1]) < np.abs(following - log_navs[row]))
+        if len(reverted):
+            back = row + 1 + reverted[0]
+            spike[row:back] = True
+            reverting_jumps.add(back)
+        elif row + split_confirm_rows > end:
+            spike[row:end + 1] = True
+        else:
+            split_rows.append(row)
+
+    # Everything before a fund's last split is in the old units
+    before_split = np.zeros(n_rows, dtype=bool)
+    for row in split_rows:
+        before_split[offsets[ranks[row]]:row] = True
+
+    # Runs of an unchanged NAV; the first print of a run is kept
+    repeats = np.flatnonzero(same_fund[1:] & (navs[1:] == navs[:-1])) + 1
+    run_starts = np.flatnonzero(np.diff(repeats, prepend=-1) != 1)
+    run_lengths = np.diff(np.append(run_starts, len(repeats)))
+    stale = np.zeros(n_rows, dtype=bool)
+    stale[repeats[np.repeat(run_lengths + 1 >= stale_min_run, run_lengths)]] = True
+
+    reason = np.select([~positive, spike, stale, before_split], [1, 2, 3, 4], 0)
+
+    gap_rows = np.flatnonzero(same_fund[1:] & (np.diff(nav_dates) > gap_days * NS_PER_DAY)) + 1
+    gap_lengths = (nav_dates[gap_rows] - nav_dates[gap_rows - 1]) // NS_PER_DAY
+
+    # Reports: counts per fund, then contiguous same-reason rows collapsed into ranges
+    counts = {
+        name: np.bincount(ranks[reason == code], minlength=n_funds)
+        for code, name in enumerate(QUARANTINE_REASONS, start=1)
+    }
+    counts["gap"] = np.bincount(ranks[gap_rows], minlength=n_funds)
+    max_gap_days = np.zeros(n_funds, dtype=np.int64)
+    np.maximum.at(max_gap_days, ranks[gap_rows], gap_lengths)
+
+    flagged_funds = np.flatnonzero(sum(counts.values()))
+    reports = {
+        int(nav_store.index["fund_id"][rank]): {
+            "fund_id": int(nav_store.index["fund_id"][rank]),
+            "flags": {name: int(values[rank]) for name, values in counts.items()},
+            "max_gap_days": int(max_gap_days[rank]),
+            "quarantine": [],
+            "gaps": [],
+        }
+        for rank in flagged_funds
+    }
+
+    flagged_rows = np.flatnonzero(reason)
+    new_range = np.ones(len(flagged_rows), dtype=bool)
+    new_range[1:] = (
+        (np.diff(flagged_rows) != 1)
+        | (reason[flagged_rows[1:]] != reason[flagged_rows[:-1]])
+        | (ranks[flagged_rows[1:]] != ranks[flagged_rows[:-1]])
+    )
+    range_ends = np.ones(len(flagged_rows), dtype=bool)
+    range_ends[:-1] = new_range[1:]
+    range_starts, range_ends = flagged_rows[new_range], flagged_rows[range_ends]
+    for start, end in zip(range_starts, range_ends):
+        reports[int(nav_store.index["fund_id"][ranks[start]])]["quarantine"].append({
+            "reason": QUARANTINE_REASONS[reason[start] - 1],
+            "start": _to_datetime(nav_dates[start]),
+            "end": _to_datetime(nav_dates[end]),
+            "rows": int(end - start + 1),
+        })
+
+    for row, days in zip(gap_rows, gap_lengths):
+        reports[int(nav_store.index["fund_id"][ranks[row]])]["gaps"].append({
+            "start": _to_datetime(nav_dates[row - 1]),
+            "end": _to_datetime(nav_dates[row]),
+            "days": int(days),
+        })
+
+    return reason == 0, reports
+
+def quarantine_ranges(report: dict) -> list[tuple[int, int]]:
+    """
+    A report's quarantine as inclusive (start, end) epoch-ns pairs
+    """
+    return [(pd.Timestamp(q["start"]).value, pd.Timestamp(q["end"]).value) for q in report["quarantine"]]
+
+def drop_quarantined(nav_dates: np.ndarray, navs: np.ndarray, ranges: list):
+    """
+    One fund's (nav_dates, navs) without the rows inside its quarantine ranges
+    """
+    keep = np.ones(len(nav_dates), dtype=bool)
+    for start, end in ranges:
+        keep &= (nav_dates < start) | (nav_dates > end)
+    return nav_dates[keep], navs[keep]
@@ -1,28 +1,219 @@
+import math
+from fractions import Fraction
+
 import pandas as pd
 import numpy as np
 
 # Normalization module
-def normalize_by_category(df: pd.DataFrame, metrics_to_normalize: list) -> pd.DataFrame:
+CATEGORY_STATS = ["count", "mean", "std", "median", "mad", "p_low", "p_high"]
+
+# Scales the MAD to a std-equivalent for normally distributed values
+MAD_SCALE = 1.4826
+
+# Every finite double is an integer multiple of 2**-1074, so sums scaled by this are exact ints
+EXACT_SCALE = 1 << 1074
+
+def _exact_sum(values: np.ndarray) -> int:
+    """
+    Exact sum of finite float64 values, scaled by EXACT_SCALE.
+    Order-independent, so partial sums from any partitioning merge to the same total.
+    """
+    mantissas, exponents = np.frexp(values)
+    mantissas = (mantissas * 2.0**53).astype(np.int64)
+    shifts = exponents.astype(np.int64) + 1021
+
+    total = 0
+    for shift in np.unique(shifts):
+        group = mantissas[shifts == shift]
+        # Split into 26-bit halves so the int64 sums can't overflow
+        part = (int((group >> 26).sum()) << 26) + int((group & ((1 << 26) - 1)).sum())
+        total += part << int(shift) if shift >= 0 else part >> int(-shift)
+    return total
+
+def _exact_sum_sq(values: np.ndarray) -> int:
+    """
+    Exact sum of squares of finite float64 values, scaled by EXACT_SCALE ** 2.
+    Squares the integer mantissas, so nothing is rounded (x * x in floats would be).
+    """
+    mantissas, exponents = np.frexp(values)
+    mantissas = (mantissas * 2.0**53).astype(np.int64)
+    shifts = 2 * (exponents.astype(np.int64) + 1021)
+
+    total = 0
+    for shift in np.unique(shifts):
+        part = sum(m * m for m in mantissas[shifts == shift].tolist())
+        # Subnormal mantissas carry enough trailing zeros for the right shift to be exact
+        total += part << int(shift) if shift >= 0 else part >> int(-shift)
+    return total
+
+def exact_moments(values: np.ndarray) -> tuple[int, int, int]:
+    """
+    (count, sum, sum of squares) of the finite values; the sum is scaled by
+    EXACT_SCALE, the sum of squares by EXACT_SCALE ** 2
+    """
+    values = values[np.isfinite(values)]
+    return len(values), _exact_sum(values), _exact_sum_sq(values)
+
+def moments_to_mean_std(count: int, total: int, total_sq: int) -> tuple[float, float]:
+    """
+    Correctly rounded mean and sample std (ddof=1) from exact moments; NaN when undefined
+    """
+    if count == 0:
+        return np.nan, np.nan
+    mean = float(Fraction(total, EXACT_SCALE * count))
+    if count < 2:
+        return mean, np.nan
+    # Exact, so identical values give exactly 0; the clamp only guards malformed input
+    variance = Fraction(total_sq * count - total * total, EXACT_SCALE * EXACT_SCALE * count * (count - 1))
+    return mean, math.sqrt(max(float(variance), 0.0))
+
+def category_moments(df: pd.DataFrame, metrics: list) -> dict:
+    """
+    {(scheme_category, metric): (count, sum, sum_sq)} exact sufficient statistics
+    """
+    values = df[metrics].apply(pd.to_numeric, errors="coerce")
+    moments = {}
+    for category, rows in df.groupby("scheme_category").indices.items():
+        for metric in metrics:
+            moments[(category, metric)] = exact_moments(values[metric].to_numpy(dtype=np.float64)[rows])
+    return moments
+
+def moments_to_stats(moments: dict, metrics: list) -> pd.DataFrame:
+    """
+    count / mean / std frame (same layout as compute_category_stats) from category moments
+    """
+    categories = sorted({category for category, _ in moments})
+    frames = {stat: pd.DataFrame(np.nan, index=categories, columns=metrics) for stat in ("count", "mean", "std")}
+    for (category, metric), (count, total, total_sq) in moments.items():
+        frames["count"].loc[category, metric] = count
+        frames["mean"].loc[category, metric], frames["std"].loc[category, metric] = moments_to_mean_std(count, total, total_sq)
+    return pd.concat(frames, axis=1)
+
+def moments_to_docs(moments: dict) -> list[dict]:
+    """
+    Partial-statistics docs; the scaled sums don't fit a BSON int, so they're stored as strings
+    """
+    return [
+        {"scheme_category": category, "metric": metric, "count": count, "sum": str(total), "sum_sq": str(total_sq)}
+        for (category, metric), (count, total, total_sq) in moments.items()
+    ]
+
+def merge_moment_docs(docs) -> dict:
+    """
+    Combines partial-statistics docs from any number of shards into category moments
+    """
+    merged = {}
+    for doc in docs:
+        key = (doc["scheme_category"], doc["metric"])
+        count, total, total_sq = merged.get(key, (0, 0, 0))
+        merged[key] = (count + doc["count"], total + int(doc["sum"]), total_sq + int(doc["sum_sq"]))
+    return merged
+
+def compute_category_stats(df: pd.DataFrame, metrics: list, winsor_limits: tuple = (0.05, 0.95)) -> pd.DataFrame:
+    """
+    Per-category statistics for every metric in one groupby pass.
+    Returns a frame indexed by scheme_category with (stat, metric) columns.
+    count / mean / std come from exact moments, so sharded runs merge to the same values.
+    """
+    values = df[metrics].apply(pd.to_numeric, errors="coerce")
+    categories = df["scheme_category"]
+    grouped = values.groupby(categories)
+
+    median = grouped.median()
+    abs_dev = (values - median.reindex(categories).to_numpy()).abs()
+    exact = moments_to_stats(category_moments(df, metrics), metrics)
+
+    return pd.concat(
+        {
+            "count": exact["count"],
+            "mean": exact["mean"],
+            "std": exact["std"],
+            "median": median,
+            "mad": abs_dev.groupby(categories).median(),
+            "p_low": grouped.quantile(winsor_limits[0]),
+            "p_high": grouped.quantile(winsor_limits[1]),
+        },
+        axis=1
+    )
+
+def normalize_by_category(
+    df: pd.DataFrame,
+    metrics_to_normalize: list,
+    percentiles: bool = False,
+    robust: bool = False,
+    stats: pd.DataFrame = None
+) -> pd.DataFrame:
     """
     Applies Z-score normalization to specified metrics, grouped by 'scheme_category'.
-    z = (x - mean) / std
+    z = (x - mean) / std, 0 where the category std is 0/undefined or the value is missing.
+    percentiles: also adds pct_<metric>, the percentile rank within the category
+    robust: also adds robust_<metric>, (winsorized x - median) / (1.4826 * MAD)
+    stats: output of compute_category_stats, computed here if not given
     """
     if df.empty:
         return df
 
     # We work on a copy to avoid modifying the original during processing
     result_df = df.copy()
+    if stats is None:
+        stats = compute_category_stats(df, metrics_to_normalize)
+
+    values = df[metrics_to_normalize].apply(pd.to_numeric, errors="coerce")
+
+    # Broadcast the per-category stats back to the rows (NaN for unknown categories)
+    row_stats = stats.reindex(df["scheme_category"]).set_axis(df.index)
 
-    for metric in metrics_to_normalize:
-        norm_col_name = f"norm_{metric}"
-        
-        # Group by category and apply z-score
-        # transform allows us to broadcast the mean/std back to the original index
-        result_df[norm_col_name] = df.groupby('scheme_category')[metric].transform(
-            lambda x: (x - x.mean()) / x.std() if x.std() > 0 else 0
-        )
-        
-        # Handle cases where std is 0 (all values same) or only one element in category
-        result_df[norm_col_name] = result_df[norm_col_name].fillna(0)
+    def per_row(stat):
+        return row_stats[stat][metrics_to_normalize]
+
+    std = per_row("std")
+    z_scores = ((values - per_row("mean")) / std).where(std > 0, 0).fillna(0)
+    result_df[[f"norm_{m}" for m in metrics_to_normalize]] = z_scores.to_numpy()
+
+    if percentiles:
+        ranks = values.groupby(df["scheme_category"]).rank(pct=True)
+        result_df[[f"pct_{m}" for m in metrics_to_normalize]] = ranks.to_numpy()
+
+    if robust:
+        scale = per_row("mad") * MAD_SCALE
+        clipped = values.clip(lower=per_row("p_low"), upper=per_row("p_high"))
+        robust_z = ((clipped - per_row("median")) / scale).where(scale > 0, 0).fillna(0)
+        result_df[[f"robust_{m}" for m in metrics_to_normalize]] = robust_z.to_numpy()
 
     return result_df
+
+def category_stats_to_docs(stats: pd.DataFrame) -> list[dict]:
+    """
+    One {scheme_category, metrics: {metric: {stat: value}}} doc per category, NaN -> None
+    """
+    docs = []
+    for category, row in stats.iterrows():
+        metrics = {}
+        for (stat, metric), value in row.items():
+            metrics.setdefault(metric, {})[stat] = None if pd.isna(value) else float(value)
+        docs.append({"scheme_category": category, "metrics": metrics})
+    return docs
+
+def normalize_fund(metrics: dict, category_doc: dict, robust: bool = False) -> dict:
+    """
+    Normalizes one fund's raw metrics against a persisted category_stats doc,
+    without reloading the universe. Matches normalize_by_category for funds that
+    were part of the run the stats came from (percentile ranks need the universe).
+    """
+    result = {}
+    for metric, stats in category_doc.get("metrics", {}).items():
+        value = metrics.get(metric)
+        missing = value is None or np.isnan(value)
+
+        std = stats.get("std")
+        result[f"norm_{metric}"] = 0 if missing or not std else (value - stats["mean"]) / std
+
+        if robust:
+            scale = (stats.get("mad") or 0) * MAD_SCALE
+            if missing or not scale:
+                result[f"robust_{metric}"] = 0
+            else:
+                clipped = min(max(value, stats["p_low"]), stats["p_high"])
+                result[f"robust_{metric}"] = (clipped - stats["median"]) / scale
+
+    return result
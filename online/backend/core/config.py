@@ -26,6 +26,16 @@ class Settings(BaseSettings):
     CARTESIA_API_KEY: str = ""
 
     DAILY_API_KEY: str =""
+
+    # Recommendation score weights per normalized metric; "cagr" is 3y or 5y by horizon.
+    # Category-relative metrics (alpha, information_ratio, up/down_capture, beta,
+    # tracking_error) are published by the offline pipeline and off by default.
+    SCORE_WEIGHTS: dict[str, float] = {
+        "cagr": 0.4,
+        "consistency": 0.25,
+        "max_drawdown": 0.2,
+        "expense_ratio": 0.15,
+    }
     
     class Config:
         env_file = ".env"
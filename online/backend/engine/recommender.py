@@ -1,5 +1,6 @@
 from loguru import logger
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from online.backend.core.config import get_settings
 
 """
 [LLD 4.5] Engine - Recommendation Engine.
@@ -13,8 +14,10 @@ class RecommendationEngine:
     """
     Deterministic engine for ranking mutual funds based on weighted metrics.
     
-    The scoring formula is predefined to Ensure explainability and consistency:
+    The score is a weighted sum of normalized metrics, which keeps it explainable.
+    The weights come from settings.SCORE_WEIGHTS, which defaults to
     Score = 0.4*CAGR + 0.25*Consistency + 0.2*MaxDrawdown + 0.15*ExpenseRatio
+    and can include the category-relative metrics (alpha, information_ratio, up_capture, ...).
     """
 
     def __init__(self, db: AsyncIOMotorDatabase):
@@ -26,6 +29,30 @@ class RecommendationEngine:
         """
         self.db = db
         self.collection_name = "fund_metrics"
+        self.weights = get_settings().SCORE_WEIGHTS
+
+    async def get_metrics_version(self) -> int:
+        """
+        Returns the version of the currently published fund_metrics collection.
+
+        The offline pipeline swaps in a new collection atomically and bumps this
+        number, so anything cached from fund_metrics is stale once it changes.
+        """
+        meta = await self.db["metrics_meta"].find_one({"_id": "fund_metrics"}, {"version": 1})
+        return (meta or {}).get("version", 0)
+
+    @staticmethod
+    def _component_value(metrics: dict, component: str, cagr_key: str) -> float:
+        """
+        Normalized value of one score component (norm_<component> in fund_metrics).
+        """
+        if component == "cagr":
+            return metrics.get(cagr_key, 0)
+        if component == "consistency":
+            # The offline pipeline publishes norm_rolling_3y_consistency; the engine used
+            # to read norm_consistency, a key that never existed, so consistency scored 0
+            return metrics.get("norm_rolling_3y_consistency", 0)
+        return metrics.get(f"norm_{component}", 0)
 
     async def get_recommendations(self, snapshot, top_k: int = 5) -> list:
         """
@@ -104,16 +131,13 @@ class RecommendationEngine:
             for item in funds_data:
                 metrics = item["metrics"]
                 
-                norm_cagr = metrics.get(cagr_key, 0)
-                norm_consistency = metrics.get("norm_consistency", 0)
+                norm_consistency = self._component_value(metrics, "consistency", cagr_key)
                 norm_drawdown = metrics.get("norm_max_drawdown", 0)
                 norm_expense = metrics.get("norm_expense_ratio", 0)
                 
-                score = (
-                    0.4 * norm_cagr +
-                    0.25 * norm_consistency +
-                    0.2 * norm_drawdown +
-                    0.15 * norm_expense
+                score = sum(
+                    weight * self._component_value(metrics, component, cagr_key)
+                    for component, weight in self.weights.items()
                 )
                 
                 # Flatten the response